@@ -8,7 +8,9 @@ from dash.dependencies import Input, Output
 import plotly.express as px
 import diskcache
 from dash.long_callback import DiskcacheLongCallbackManager
-from config import CACHE_PATH
+from config import CACHE_PATH, DB, DB_READ_ONLY, WARM_PAGES
+from python import lazypage
+from python.lecturefacts import create_lecture_facts
 
 cache = diskcache.Cache(CACHE_PATH + 'disccache\\')
 
@@ -25,6 +27,7 @@ app = Dash(__name__,
            external_scripts=external_js,
            external_stylesheets=external_css,
            assets_ignore='sidebar.js',
+           suppress_callback_exceptions=True,  # The pages build their content lazily
            background_callback_manager=DiskcacheLongCallbackManager(cache)
            )
 
@@ -57,5 +60,13 @@ app.layout = html.Div(id='app', children=[
     dji.Import(src=app.get_asset_url('sidebar.js'))
 ])
 
+# The pages only read the lecture facts, so they are built before (if they are missing or outdated)
+if not DB_READ_ONLY:
+    create_lecture_facts(DB)
+
+# The pages load their data on first access, warming builds it before the first request
+if WARM_PAGES:
+    lazypage.warm()
+
 if __name__ == '__main__':
     app.run_server(debug=True)
@@ -1,12 +1,31 @@
-import sqlalchemy
-from python.geomanager import GeoManager
+from python.addressindex import AddressIndex
+from python.database import create_engine, DatabaseStats
+from python.geomanager import GeoManager, GeoStore
+from python.osmroute import KIEL_CAMPUS_BBOX, RouteStore, RoutingService
+from python.pagecache import PageCache
+from python.queryprofile import QueryProfiler
 
 # TODO: Please configure the website here
 CACHE_PATH = '/path/to/webcache/'         # The Path where the website should cache data in json format (should end with '/')
 DB_PATH = r'sqlite:////path/to/univis.db' # The path of the database
 GM_MAIL = 'mail@example.com'             # See also: https://operations.osmfoundation.org/policies/nominatim/
+GEOCODER_INDEX = None                    # The path of the offline address index (see python/addressindex.py) or None
+GEOCODER_ONLINE = True                   # Whether addresses missing in the index are looked up with Nominatim
+ROUTING_OSM_FILE = None                  # The path of a local OSM extract of the campus for routing or None (download)
+ROUTING_PROCESSES = 4                    # The number of processes computing the routes of the schedule maps
+WARM_PAGES = True                        # Whether the data of all pages should be built in the background at startup
+DB_READ_ONLY = False                     # Whether the database is opened read-only (run the precompute command first)
+DB_WAL = False                           # Whether the database uses write-ahead logging (readers do not block writers)
+DB_POOL_SIZE = 5                         # The number of database connections kept open for the server threads
+PROFILE_QUERIES = False                  # Whether the queries are profiled (see the hidden page /profile)
 
 
 # The instances used by the website
-DB = sqlalchemy.create_engine(DB_PATH)
-GM = GeoManager(GM_MAIL)
+DB = create_engine(DB_PATH, read_only=DB_READ_ONLY, wal=DB_WAL, pool_size=DB_POOL_SIZE)
+DB_STATS = DatabaseStats(DB)
+PROFILER = QueryProfiler(DB, enabled=PROFILE_QUERIES)
+GM = GeoManager(GM_MAIL, GeoStore(CACHE_PATH + 'geocodes.sqlite'),
+                index=AddressIndex.load(GEOCODER_INDEX) if GEOCODER_INDEX else None, online=GEOCODER_ONLINE)
+ROUTES = RoutingService(ROUTING_OSM_FILE, KIEL_CAMPUS_BBOX, RouteStore(CACHE_PATH + 'routes.sqlite'),
+                        ROUTING_PROCESSES)
+PAGE_CACHE = PageCache(CACHE_PATH + 'pages/', DB)
@@ -1,12 +1,10 @@
-import os
 import dash
 from dash import html, dcc
 import plotly.express as px
-import pandas as pd
+from python import genderdata, pagedata
 from python.faculty import FACULTY_COLORS
-import python.genderdata as genderdata
+from python.lazypage import LazyData
 from dash.dependencies import Input, Output
-from config import DB, CACHE_PATH
 
 title = 'Geschlechterverteilung'
 path = '/genders'
@@ -15,20 +13,8 @@ dash.register_page(__name__, name=title, path=path)
 
 app = dash.get_app()
 
-df_cache = {'True': {}, 'False': {}}
-if not os.path.exists(CACHE_PATH + 'genders/'):
-    os.makedirs(CACHE_PATH + 'genders/')
-    for i in range(101):
-        df_cache['True'][i] = genderdata.get_gender_data(DB, True, i, 0)
-        df_cache['False'][i] = genderdata.get_gender_data(DB, False, i, 0)
-        df_cache['True'][i].to_json(CACHE_PATH + 'genders/' + str(i) + '_True.json')
-        df_cache['False'][i].to_json(CACHE_PATH + 'genders/' + str(i) + '_False.json')
-else:
-    for i in range(101):
-        df_cache['True'][i] = pd.read_json(CACHE_PATH + 'genders/' + str(i) + '_True.json')
-        df_cache['False'][i] = pd.read_json(CACHE_PATH + 'genders/' + str(i) + '_False.json')
-
-print(f'{path} loaded')
+# The data is loaded by the first callback, the graph shows a loading state meanwhile
+DATA = LazyData(lambda: genderdata.get_gender_cube(pagedata.gender_counts()), pagedata.gender_counts.is_cached)
 
 
 # TODO: hinweis auf gender API
@@ -42,9 +28,9 @@ print(f'{path} loaded')
     ]
 )
 def update_graph(f, p):
-    f = str(str(f) == 'True')
+    f = str(f) == 'True'
     p = int(p)
-    df = df_cache[f][p]
+    df = genderdata.get_gender_data_from_cube(DATA.get(), f, p)
 
     fig = px.line(df, x='Semester', y='Prozentualer Anteil', color='Fakultät', title='',
                   custom_data=['Anzahl', 'Gesamt'], color_discrete_map=FACULTY_COLORS)
@@ -91,12 +77,12 @@ layout = [
                 "value": 'True',
             },
         ]),
-        dcc.Graph(
+        dcc.Loading(dcc.Graph(
             id='gender-graph',
             config={
                 'displaylogo': False
             }
-        ),
+        )),
         html.P('Die Theologische Fakultät hat sich am meisten entwickelt: Der Anteil von Mitarbeitenden mit '
                'nicht-männlich erkannten Vornamen startet im Sommersemester 2000 bei ca. 21% und '
                'liegt im Wintersemester 2022/23 bei ca. 54%.'),
@@ -0,0 +1,56 @@
+from typing import Any, Dict, List
+import dash
+from dash import html
+from config import DB_STATS, PROFILER
+
+title = 'Profil'
+path = '/profile'
+
+dash.register_page(__name__, name=title, path=path, hidden=True)
+
+
+def table(columns: List[str], rows: List[List[Any]]) -> html.Table:
+    return html.Table(children=[
+        html.Thead(html.Tr([html.Th(column) for column in columns])),
+        html.Tbody([html.Tr([html.Td(cell) for cell in row]) for row in rows]),
+    ])
+
+
+def query_rows(report: Dict[str, Any], limit: int = 50) -> List[List[Any]]:
+    return [[query['fingerprint'], html.Code(query['statement'][:300]), query['calls'], query['rows'],
+             f'{query["seconds"]:.3f}', f'{query["max_seconds"]:.3f}',
+             ', '.join(f'{caller} ({calls})' for caller, calls in query['callers'].items())]
+            for query in report['queries'][:limit]]
+
+
+def layout() -> List[Any]:
+    if not PROFILER.enabled:
+        return [
+            html.Div(children=[
+                html.H1(id='title', children=title),
+                html.P('Die Abfragen werden nicht gemessen (siehe PROFILE_QUERIES in config.py).'),
+            ])
+        ]
+
+    report = PROFILER.report()
+    stats = DB_STATS.report()
+    return [
+        html.Div(children=[
+            html.H1(id='title', children=title),
+            html.P(f'Offene Verbindungen: {stats["open_connections"]} '
+                   f'(höchstens {stats["max_open_connections"]} gleichzeitig)'),
+        ]),
+        html.Div(children=[
+            html.H3('Seiten'),
+            table(['Seite', 'Abfragen', 'Dauer (s)'],
+                  [[page, s['queries'], f'{s["seconds"]:.3f}']
+                   for page, s in sorted(stats['pages'].items(), key=lambda p: p[1]['seconds'], reverse=True)]),
+            html.H3('Funktionen'),
+            table(['Funktion', 'Aufrufe', 'Dauer (s)', 'Längster Aufruf (s)'],
+                  [[f['name'], f['calls'], f'{f["seconds"]:.3f}', f'{f["max_seconds"]:.3f}']
+                   for f in report['functions']]),
+            html.H3('Abfragen'),
+            table(['Fingerprint', 'Abfrage', 'Aufrufe', 'Zeilen', 'Dauer (s)', 'Längste Ausführung (s)', 'Aufrufer'],
+                  query_rows(report)),
+        ])
+    ]
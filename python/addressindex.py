@@ -0,0 +1,248 @@
+import csv
+import re
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+import osmiter
+
+# The column names of street, house number, latitude and longitude in CSV extracts (e.g. of OpenAddresses)
+CSV_COLUMNS = {
+    'street': ['street', 'addr:street', 'strasse', 'straße'],
+    'housenumber': ['housenumber', 'addr:housenumber', 'number', 'hausnummer'],
+    'lat': ['lat', 'latitude', 'y'],
+    'lon': ['lon', 'lng', 'longitude', 'x'],
+}
+
+# The street and house number at the beginning of an address, e.g. "Olshausenstraße 40 Kiel Germany"
+_ADDRESS = re.compile(r'^\s*(?P<street>[^\d,(]+?)\s*(?P<number>\d{1,4}(?:\s?[a-z](?![a-zäöüß]))?)(?!\d)',
+                      re.IGNORECASE)
+# The city at the end of an address without a house number, e.g. "Kiellinie Kiel Germany"
+_CITY = re.compile(r'\s*(\d{5}\s+\w+|Kiel Germany|Kiel|Germany)\s*$', re.IGNORECASE)
+
+
+def normalize_street(street: str) -> str:
+    """
+    Normalize the name of a street, so that different spellings are equal (e.g. "Ludewig-Meyn-Str." and
+    "ludewig meyn straße")
+
+    :param street: The name of the street
+    :return:       The normalized name
+    """
+    street = street.casefold().replace('strasse', 'straße')
+    street = re.sub(r'str\.?$|str\.', 'straße', street)
+    return re.sub(r'[\W_]+', '', street)
+
+
+def normalize_housenumber(number: str) -> str:
+    """
+    Normalize a house number (e.g. "12 A" to "12a")
+
+    :param number: The house number
+    :return:       The normalized house number
+    """
+    return re.sub(r'\s+', '', number).casefold()
+
+
+def split_address(addr: str) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    Split an address (as created by `parse_addr.new_addr`) into the normalized street and house number
+
+    :param addr: The address
+    :return:     The street and the house number (or None if the address has none) or None if the address has no street
+    """
+    match = _ADDRESS.match(addr)
+    if match is not None:
+        return normalize_street(match.group('street')), normalize_housenumber(match.group('number'))
+    street = normalize_street(_CITY.sub('', re.split(r'\d|,|\(', addr)[0]))
+    return (street, None) if street else None
+
+
+def expand_housenumbers(numbers: str) -> List[str]:
+    """
+    Get the single house numbers of a house number tag of OSM, e.g. "10-12" or "10;12"
+
+    :param numbers: The house number tag
+    :return:        The normalized house numbers
+    """
+    result = []
+    for number in re.split(r'[;,]', numbers):
+        number_range = re.fullmatch(r'\s*(\d+)\s*-\s*(\d+)\s*', number)
+        if number_range is not None and 0 <= int(number_range.group(2)) - int(number_range.group(1)) <= 20:
+            result += [str(n) for n in range(int(number_range.group(1)), int(number_range.group(2)) + 1)]
+        elif number.strip():
+            result.append(normalize_housenumber(number))
+    return result
+
+
+class AddressIndex:
+    """
+    An index from street and house number to coordinates, built from a local OSM or CSV extract, to geocode addresses
+    without a geocoding service. Addresses without a house number are resolved to the center of their street.
+    An index is a geocoder as well (see `geomanager.Geocoder`).
+    """
+    min_delay = 0.0
+
+    def __init__(self):
+        """
+        Initialize an empty index
+        """
+        self.entries: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        # The sums of the coordinates and the number of addresses of every street
+        self.streets: Dict[str, Tuple[float, float, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, street: str, housenumber: str, lat: float, lon: float):
+        """
+        Add an address to the index
+
+        :param street:      The name of the street
+        :param housenumber: The house number
+        :param lat:         The latitude
+        :param lon:         The longitude
+        """
+        key = normalize_street(street), normalize_housenumber(housenumber)
+        if not key[0] or not key[1] or key in self.entries:
+            return
+        self.entries[key] = (lat, lon)
+        sum_lat, sum_lon, count = self.streets.get(key[0], (0.0, 0.0, 0))
+        self.streets[key[0]] = (sum_lat + lat, sum_lon + lon, count + 1)
+
+    def __call__(self, addr: str) -> Optional[Tuple[float, float]]:
+        return self.lookup(addr)
+
+    def lookup(self, addr: str) -> Optional[Tuple[float, float]]:
+        """
+        Get the coordinates of an address
+
+        :param addr: The address
+        :return:     The coordinates (lat, lon) or None if the address is not in the index
+        """
+        key = split_address(addr)
+        if key is None:
+            return None
+        street, number = key
+        if number is not None:
+            return self.entries.get((street, number))
+        if street not in self.streets:
+            return None
+        sum_lat, sum_lon, count = self.streets[street]
+        return sum_lat / count, sum_lon / count
+
+    @classmethod
+    def from_csv(cls, path: str) -> 'AddressIndex':
+        """
+        Build the index from a CSV file with a header (see `CSV_COLUMNS` for the supported column names)
+
+        :param path: The path of the CSV file
+        :return:     The index
+        """
+        index = cls()
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            header = {name.casefold(): name for name in reader.fieldnames or []}
+            columns = {}
+            for column, names in CSV_COLUMNS.items():
+                found = [header[name] for name in names if name in header]
+                if not found:
+                    raise ValueError(f'The CSV file has no column for the {column} ({", ".join(names)})')
+                columns[column] = found[0]
+            for row in reader:
+                for number in expand_housenumbers(row[columns['housenumber']] or ''):
+                    index.add(row[columns['street']] or '', number, float(row[columns['lat']]),
+                              float(row[columns['lon']]))
+        return index
+
+    @classmethod
+    def from_osm(cls, path: str) -> 'AddressIndex':
+        """
+        Build the index from an OSM extract (XML or PBF, optionally compressed). Nodes and ways (e.g. buildings) with
+        the tags "addr:street" and "addr:housenumber" are indexed, ways at the center of their nodes.
+
+        :param path: The path of the extract
+        :return:     The index
+        """
+        # The nodes come before the ways in an extract, so the nodes of the addressed ways are collected first
+        way_nodes = {}
+        for feature in osmiter.iter_from_osm(path):
+            tags = feature.get('tag', {})
+            if feature['type'] == 'way' and 'addr:street' in tags and 'addr:housenumber' in tags:
+                way_nodes[feature['id']] = (tags['addr:street'], tags['addr:housenumber'], feature['nd'])
+        needed = {node for _, _, nodes in way_nodes.values() for node in nodes}
+
+        index = cls()
+        coords = {}
+        for feature in osmiter.iter_from_osm(path):
+            if feature['type'] != 'node':
+                continue
+            if feature['id'] in needed:
+                coords[feature['id']] = (feature['lat'], feature['lon'])
+            tags = feature.get('tag', {})
+            if 'addr:street' in tags and 'addr:housenumber' in tags:
+                for number in expand_housenumbers(tags['addr:housenumber']):
+                    index.add(tags['addr:street'], number, feature['lat'], feature['lon'])
+        for street, numbers, nodes in way_nodes.values():
+            points = [coords[node] for node in nodes if node in coords]
+            if points:
+                lat = sum(p[0] for p in points) / len(points)
+                lon = sum(p[1] for p in points) / len(points)
+                for number in expand_housenumbers(numbers):
+                    index.add(street, number, lat, lon)
+        return index
+
+    @classmethod
+    def load(cls, path: str) -> 'AddressIndex':
+        """
+        Load an index saved with `save`
+
+        :param path: The path of the SQLite file
+        :return:     The index
+        """
+        index = cls()
+        con = sqlite3.connect(path)
+        try:
+            for street, number, lat, lon in con.execute('SELECT street, housenumber, lat, lon FROM addresses'):
+                index.add(street, number, lat, lon)
+        finally:
+            con.close()
+        return index
+
+    def save(self, path: str):
+        """
+        Save the index into a SQLite file (an existing index in the file is replaced)
+
+        :param path: The path of the SQLite file
+        """
+        con = sqlite3.connect(path)
+        try:
+            with con:
+                con.execute('DROP TABLE IF EXISTS addresses')
+                con.execute('CREATE TABLE addresses ('
+                            'street TEXT NOT NULL, '
+                            'housenumber TEXT NOT NULL, '
+                            'lat REAL NOT NULL, '
+                            'lon REAL NOT NULL, '
+                            'PRIMARY KEY (street, housenumber))')
+                con.executemany('INSERT INTO addresses VALUES (?, ?, ?, ?)',
+                                ((street, number, lat, lon) for (street, number), (lat, lon) in self.entries.items()))
+        finally:
+            con.close()
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Builds the offline address index for geocoding (set GEOCODER_INDEX '
+                                                 'in config.py to its path).')
+    parser.add_argument('extract', help='the OSM extract (.osm, .osm.pbf, optionally compressed) or a CSV file')
+    parser.add_argument('index', help='the SQLite file to save the index to')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    address_index = AddressIndex.from_csv(args.extract) if args.extract.lower().endswith('.csv') \
+        else AddressIndex.from_osm(args.extract)
+    address_index.save(args.index)
+    print(f'Indexed {len(address_index)} addresses of {len(address_index.streets)} streets '
+          f'in {time.perf_counter() - start:.2f}s.')
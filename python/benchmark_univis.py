@@ -0,0 +1,315 @@
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+import pandas as pd
+import sqlalchemy
+import xmltodict
+
+import univis
+
+
+def synthetic_responses(responses: int = 200,
+                        records: int = 100,
+                        overlap: float = 0.5
+                        ) -> List[Dict[str, Any]]:
+    """
+    Generate parsed UnivIS responses with overlapping lectures, like the responses for different search terms.
+
+    :param responses: The number of responses to generate.
+    :param records:   The number of lectures per response.
+    :param overlap:   The share of lectures that were already part of the previous response.
+    :return:          The parsed responses.
+    """
+    parsed = []
+    step = max(int(records * (1 - overlap)), 1)
+    for r in range(responses):
+        lectures = ''.join(
+            f'<Lecture key="Lecture.{i}"><name>Lecture {i}</name><short>L{i}</short><ects>{i % 10}</ects>'
+            f'<dozs><doz><UnivISRef type="Person" key="Person.{i % 50}"/></doz></dozs></Lecture>'
+            for i in range(r * step, r * step + records)
+        )
+        parsed.append(xmltodict.parse(f'<?xml version="1.0"?>\n<UnivIS semester="2022s">{lectures}</UnivIS>'))
+    return parsed
+
+
+def concat_accumulate(responses: List[Dict[str, Any]]) -> Dict[str, pd.DataFrame]:
+    """
+    Accumulate the responses by concatenating dataframes (the former implementation of `UnivIS.find_all`).
+
+    :param responses: The parsed responses.
+    :return:          The dataframe of every table.
+    """
+    dfs = {}
+    for res in responses:
+        for name, data in res['UnivIS'].items():
+            if name[0] == '@':
+                continue
+            if type(data) != list:
+                data = [data]
+            df = pd.DataFrame().from_records(data).set_index(['@key'])
+            if name not in dfs:
+                dfs[name] = pd.DataFrame()
+            new_df = pd.concat([dfs[name], df])
+            dfs[name] = new_df[~new_df.index.duplicated(keep='first')]
+    return dfs
+
+
+def buffer_accumulate(responses: List[Dict[str, Any]]) -> Dict[str, pd.DataFrame]:
+    """
+    Accumulate the responses with record buffers (the current implementation of `UnivIS.find_all`).
+
+    :param responses: The parsed responses.
+    :return:          The dataframe of every table.
+    """
+    buffers = {}
+    for res in responses:
+        for name, data in res['UnivIS'].items():
+            if name[0] == '@':
+                continue
+            if type(data) != list:
+                data = [data]
+            if name not in buffers:
+                buffers[name] = univis.RecordBuffer()
+            buffers[name].add(data)
+    return {name: buffer.to_df() for name, buffer in buffers.items()}
+
+
+def measure(func: Callable, *args: Any) -> Tuple[Any, float, int]:
+    """
+    Measure the wall time and the peak memory of a function call.
+
+    :param func: The function to call.
+    :param args: The arguments of the function.
+    :return:     The result, the wall time in seconds and the peak memory in bytes.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, duration, peak
+
+
+def benchmark_accumulation():
+    """
+    Compare the accumulation of responses with `pd.concat` and with record buffers.
+    """
+    for n in [50, 200, 800]:
+        responses = synthetic_responses(responses=n)
+        expected, t_concat, m_concat = measure(concat_accumulate, responses)
+        result, t_buffer, m_buffer = measure(buffer_accumulate, responses)
+        for name in expected:
+            pd.testing.assert_frame_equal(expected[name], result[name])
+        print(f'{n:4d} responses: concat {t_concat:7.3f}s {m_concat / 2 ** 20:8.1f} MiB | '
+              f'buffer {t_buffer:7.3f}s {m_buffer / 2 ** 20:8.1f} MiB')
+
+
+def benchmark_cache_backends(entries: int = 5000):
+    """
+    Compare warm-cache lookups of the directory and the SQLite cache backend.
+
+    :param entries: The number of cached responses.
+    """
+    body = xmltodict.unparse(synthetic_responses(responses=1, records=20)[0])
+    urls = [f'https://univis.uni-kiel.de/prg?show=xml&noimports=1&search=lectures&sem=2022s&name={i}'
+            for i in range(entries)]
+    with tempfile.TemporaryDirectory() as cache_path:
+        cache_path += '/'
+        directory = univis.DirectoryCacheBackend(cache_path)
+        for url in urls:
+            directory.store(url, univis.ResponseCache.entry(url, body))
+
+        start = time.perf_counter()
+        univis.migrate_cache(cache_path)
+        t_migrate = time.perf_counter() - start
+
+        for name, backend in [('directory', directory),
+                              ('sqlite', univis.SQLiteCacheBackend(f'{cache_path}responses.sqlite'))]:
+            start = time.perf_counter()
+            for url in urls:
+                backend.load(url)
+            for url in urls:
+                backend.load(url + 'missing')
+            duration = time.perf_counter() - start
+            print(f'{name:9s}: {entries} hits and {entries} misses in {duration:.3f}s')
+        print(f'migration: {entries} responses in {t_migrate:.3f}s')
+
+
+def synthetic_database(db: sqlalchemy.engine.Engine,
+                       semesters: int = 20,
+                       lectures: int = 2000
+                       ) -> Dict[str, Dict[str, Union[bool, str, List[str]]]]:
+    """
+    Fill a database with synthetic lectures, persons and rooms, like `univis_to_sql` would (without indexes).
+
+    :param db:        The database to fill.
+    :param semesters: The number of semesters.
+    :param lectures:  The number of lectures per semester.
+    :return:          The UnivIS scheme of the tables.
+    """
+    def entry(attr: List[str], is_list: bool = False, is_ref: bool = False):
+        return {'is_list': is_list, 'is_ref': is_ref, 'type': 'TEXT', 'attr': attr}
+
+    scheme = {
+        'Lecture': entry(['name', 'type', 'englisch', 'turnout', 'parent-lv', 'orgunits', 'terms', 'dozs', 'courses']),
+        'Person': entry(['firstname', 'lastname', 'title', 'lehr']),
+        'Room': entry(['name', 'short', 'size', 'reducedsize', 'rolli', 'address']),
+        'orgunits': entry(['orgunit'], is_list=True), 'terms': entry(['term'], is_list=True),
+        'term': entry(['starttime', 'endtime', 'repeat', 'enddate', 'room']), 'room': entry(['Room'], is_ref=True),
+        'dozs': entry(['doz'], is_list=True), 'doz': entry(['Person'], is_ref=True),
+        'courses': entry(['course'], is_list=True), 'course': entry(['Lecture'], is_ref=True),
+        **{attr: entry(['#PCDATA']) for attr in ['name', 'type', 'englisch', 'turnout', 'parent-lv', 'orgunit',
+                                                 'firstname', 'lastname', 'title', 'lehr', 'short', 'size',
+                                                 'reducedsize', 'rolli', 'address', 'starttime', 'endtime', 'repeat',
+                                                 'enddate']},
+    }
+    faculties = ['Technische Fakultät', 'Medizinische Fakultät', 'Philosophische Fakultät',
+                 'Institut für Informatik']
+    rng = random.Random(0)
+    rows = {table: [] for table in ['Lecture', 'Person', 'Room', 'orgunits', 'terms', 'dozs', 'courses']}
+    for year in range(2022 - semesters // 2, 2022):
+        for semester in [f'{year}s', f'{year}w']:
+            for i in range(lectures // 4):
+                rows['Person'].append({'semester': semester, '@key': f'Person.{i}', 'firstname': f'Name {i % 300}',
+                                       'lastname': f'Last {i}', 'title': rng.choice(['Prof. Dr.', None]), 'lehr': 1})
+            for i in range(lectures // 10):
+                rows['Room'].append({'semester': semester, '@key': f'Room.{i}', 'name': f'Room {i}', 'short': f'R{i}',
+                                     'size': rng.randint(10, 400), 'reducedsize': rng.randint(5, 50),
+                                     'rolli': rng.randint(0, 1), 'address': f'Street {i % 50}'})
+            for i in range(lectures):
+                key = f'Lecture.{i}'
+                rows['Lecture'].append({'semester': semester, '@key': key, 'name': f'Lecture {i}',
+                                        'type': rng.choice(['V', 'S', 'UE']), 'englisch': rng.randint(0, 1),
+                                        'turnout': rng.randint(5, 300)})
+                rows['orgunits'].append({'semester': semester, '@key': key, 'orgunit': rng.choice(faculties)})
+                for _ in range(rng.randint(1, 3)):
+                    hour = rng.choice([8, 10, 12, 14, 16])
+                    rows['terms'].append({'semester': semester, '@key': key, 'starttime': f'{hour}:15',
+                                          'endtime': f'{hour + 1}:45', 'repeat': f'w1 {rng.randint(1, 5)}',
+                                          'room': f'Room.{rng.randrange(lectures // 10)}'})
+                # Every tenth lecture is a course of the next one
+                if i % 10 == 0 and i + 1 < lectures:
+                    rows['courses'].append({'semester': semester, '@key': key, 'course': f'Lecture.{i + 1}'})
+                rows['dozs'].append({'semester': semester, '@key': key,
+                                     'doz': f'Person.{rng.randrange(lectures // 4)}'})
+    with db.connect() as con:
+        univis.create_tables(con, scheme, indexes=False)
+        for table, table_rows in rows.items():
+            pd.DataFrame(table_rows).to_sql(name=table, con=con, if_exists='append', index=False)
+        con.execute('CREATE TABLE genders (query TEXT, gender TEXT, prob INTEGER, count INTEGER)')
+        con.execute("INSERT INTO genders VALUES ('Name 1', 'f', 98, 100), ('Name 2', 'm', 99, 100)")
+        con.execute('CREATE TABLE new_addresses (old_address TEXT, new_address TEXT)')
+        for i in range(50):
+            con.execute('INSERT INTO new_addresses VALUES (?, ?)', (f'Street {i}', f'Street {i} Kiel Germany'))
+    return scheme
+
+
+def benchmark_indexes(semesters: int = 20, lectures: int = 2000):
+    """
+    Compare the cold build of page data without and with the indexes of `generate_sql_indexes`.
+    The pages whose data modules can be imported without the dashboard dependencies are measured. The pages that read
+    the lecture facts build them from the source tables first, because the lecture facts have their own indexes.
+
+    :param semesters: The number of semesters of the synthetic database.
+    :param lectures:  The number of lectures per semester.
+    """
+    # The page data modules are imported as part of the "python" package, like the pages do
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from python import genderdata, lectureinf, lecturefacts, rolli, workload
+
+    def from_sources(build: Callable[[sqlalchemy.engine.Engine], Any]) -> Callable[[sqlalchemy.engine.Engine], Any]:
+        # Build the page data from the source tables, like after an update of the database
+        def build_from_sources(db: sqlalchemy.engine.Engine) -> Any:
+            lecturefacts.drop_lecture_facts(db)
+            lecturefacts.create_lecture_facts(db)
+            return build(db)
+        return build_from_sources
+
+    # The lectures of six study programme semesters in the last semesters, like the schedules of `lectureinf` (the
+    # terms of every study programme semester are queried even if the random terms do not fit into a schedule)
+    schedule = {semester: {str(study_sem): [f'Lecture.{study_sem * 50 + i * 10}' for i in range(8)]
+                           for study_sem in range(1, 7)}
+                for semester in ['2020s', '2020w', '2021s', '2021w']}
+
+    pages = {
+        'lecture facts': lambda db: lecturefacts.create_lecture_facts(db, replace=True),
+        'workload': from_sources(workload.workloads),
+        'rolli': from_sources(rolli.rollis),
+        'gender': from_sources(lambda db: [genderdata.get_gender_data(db, only_female, threshold)
+                                           for only_female in [True, False] for threshold in range(0, 101, 10)]),
+        'dependencies': lambda db: lectureinf.get_dependencies(db, schedule),
+        'lecture lookups': lambda db: [db.execute('SELECT * FROM Lecture L JOIN dozs d ON L.semester = d.semester '
+                                                  'AND L.[@key] = d.[@key] WHERE L.semester = ? AND L.[@key] = ?',
+                                                  ('2021s', f'Lecture.{i}')).fetchall()
+                                       for i in range(0, lectures, 10)],
+    }
+    with tempfile.TemporaryDirectory() as path:
+        db = sqlalchemy.create_engine(f'sqlite:///{path}/univis.db')
+        scheme = synthetic_database(db, semesters, lectures)
+        durations = {}
+        for indexed in [False, True]:
+            if indexed:
+                start = time.perf_counter()
+                univis.add_indexes(db, scheme)
+                print(f'creating the indexes: {time.perf_counter() - start:.3f}s')
+            for name, build in pages.items():
+                start = time.perf_counter()
+                build(db)
+                durations[name, indexed] = time.perf_counter() - start
+        for name in pages:
+            print(f'{name:15s}: without indexes {durations[name, False]:7.3f}s | '
+                  f'with indexes {durations[name, True]:7.3f}s')
+        db.dispose()
+
+
+def benchmark_in_lists(semesters: int = 4, lectures: int = 20000, queries: int = 50):
+    """
+    Compare IN-lists interpolated as literals with bound parameters (`sqlparams.in_values`) for lookups of the terms
+    of many lectures, like the lookups of `lectureinf.get_dependencies`.
+
+    :param semesters: The number of semesters of the synthetic database.
+    :param lectures:  The number of lectures per semester.
+    :param queries:   The number of lookups per list size.
+    """
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from python.sqlparams import in_values
+
+    query = 'SELECT T.[@key], T.starttime, L.name FROM terms T ' \
+            'LEFT JOIN Lecture L ON T.[@key] = L.[@key] AND T.semester = L.semester ' \
+            'WHERE T.semester = :sem AND T.[@key] IN {lectures} ORDER BY T.[@key], T.starttime, T.room'
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as path:
+        db = sqlalchemy.create_engine(f'sqlite:///{path}/univis.db')
+        scheme = synthetic_database(db, semesters, lectures)
+        univis.add_indexes(db, scheme)
+        with db.connect() as con:
+            for size in [10, 100, 1000, 10000]:
+                keys = [[f'Lecture.{i}' for i in rng.sample(range(lectures), rng.randint(size // 2, size))]
+                        for _ in range(queries)]
+                start = time.perf_counter()
+                expected = [con.execute(query.format(lectures=str(tuple(k))), sem='2021s').fetchall() for k in keys]
+                t_literal = time.perf_counter() - start
+
+                start = time.perf_counter()
+                result = []
+                for k in keys:
+                    clause, params = in_values(con, 'lectures', k)
+                    result.append(con.execute(query.format(lectures=clause), sem='2021s', **params).fetchall())
+                t_bound = time.perf_counter() - start
+                assert result == expected
+                print(f'{queries} lookups of up to {size:5d} lectures: literals {t_literal:7.3f}s | '
+                      f'parameters {t_bound:7.3f}s')
+        db.dispose()
+
+
+if __name__ == '__main__':
+    benchmark_accumulation()
+    benchmark_cache_backends()
+    benchmark_indexes()
+    benchmark_in_lists()
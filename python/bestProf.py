@@ -3,6 +3,7 @@ import sqlalchemy.engine
 import pandas as pd
 import plotly.express as px
 import python.moduldbparser as moduldbparser
+from python.sqlparams import in_values
 
 # List of all Best Prof Award winners: (name, year, place).
 winner = [("Landsiedel", "Olaf", 2019, 1), ("Langfeld", "Barbara", 2019, 2), ("Mühling", "Andreas", 2019, 3),
@@ -48,22 +49,76 @@ def create_df_modul_db() -> pd.DataFrame:
     df_modul_db = pd.read_csv("..\\..\\Test\\data\\moduldb_df.csv")
     return df_modul_db
 
-def sql_query_lecture(semester: str, prof_name: str, prof_firstname: str, db: sqlalchemy.engine.Engine) -> list:
+def winner_semesters() -> list:
     """
-    SQL query that retrieves all lectures held by a professor in a semester.
-    :param semester: Semester for the search query in the format '2021w' for winter and '2021s' for summer.
-    :param prof_name: Last name of the professor for the search query.
-    :param prof_firstname: First name of the professor for the search query.
-    :param db A SQL database.
-    :return: The lectures given by the :prof in the :semester.
+    This function lists the two semesters every Best Prof Award refers to.
+    :return: A list of tuples (lastname, firstname, year, semester, place), the summer semester before the winter semester.
     """
-    result = db.execute("SELECT Lecture.name "
-                        "FROM Dozs INNER JOIN Person INNER JOIN Lecture "
-                        "ON dozs.doz = person.'@key' AND dozs.semester = lecture.semester AND dozs.semester = person.semester "
-                        "AND dozs.'@key' = lecture.'@key'"
-                        "WHERE lecture.semester =? AND person.lastname =? AND person.firstname =?", (semester, prof_name, prof_firstname))
+    semesters = []
+    for elem in winner:
+        # Matching summer semester to year. Award refers to the current summer semester.
+        semesters += [(elem[0], elem[1], elem[2], str(elem[2]) + "s", elem[3])]
+        # Matching winter semester to year. Award refers to winter semester started last year.
+        semesters += [(elem[0], elem[1], elem[2], str(elem[2] - 1) + "w", elem[3])]
+    return semesters
 
-    return result
+def is_exercise(lecture_name: str) -> bool:
+    """
+    This function checks whether a lecture is an exercise.
+    :param lecture_name: Name of the lecture.
+    :return: True if the lecture is an exercise, otherwise False.
+    """
+    return "Übung" in lecture_name or "übung" in lecture_name or "Exercise" in lecture_name
+
+def load_winners(con: sqlalchemy.engine.Connection):
+    """
+    This function loads the semesters of all Best Prof Award winners into the temporary table winners.
+    :param con: A connection to a SQL database. The temporary table only exists for this connection.
+    """
+    con.execute("DROP TABLE IF EXISTS temp.winners")
+    con.execute("CREATE TEMP TABLE winners (position INTEGER PRIMARY KEY, lastname TEXT, firstname TEXT, year INTEGER, "
+                "semester TEXT, place INTEGER)")
+    con.execute("INSERT INTO winners VALUES (?, ?, ?, ?, ?, ?)",
+                [(i,) + elem for i, elem in enumerate(winner_semesters())])
+
+def load_winner_lectures(df_lec: pd.DataFrame, con: sqlalchemy.engine.Connection):
+    """
+    This function loads all lectures given by Best Profs in their winning year into the temporary table winner_lectures.
+    :param df_lec: Data frame from all lectures given by Best Profs in their winning year (get by create_lecture_df()).
+    :param con: A connection to a SQL database. The temporary table only exists for this connection.
+    """
+    con.execute("DROP TABLE IF EXISTS temp.winner_lectures")
+    con.execute("CREATE TEMP TABLE winner_lectures (position INTEGER PRIMARY KEY, name TEXT, semester TEXT)")
+    rows = [(i, x[0], x[2]) for i, x in enumerate(df_lec.values.tolist())]
+    if rows:
+        con.execute("INSERT INTO winner_lectures VALUES (?, ?, ?)", rows)
+
+def group_by_position(result, length: int) -> list:
+    """
+    This function splits the result of a query against a temporary table by the position of the joined row.
+    :param result: A SQL query result whose first column is the position.
+    :param length: The number of rows in the temporary table.
+    :return: A list with the remaining columns of all result rows for every position.
+    """
+    grouped = [[] for _ in range(length)]
+    for row in result:
+        grouped[row[0]].append(tuple(row[1:]))
+    return grouped
+
+def sql_query_lecture(con: sqlalchemy.engine.Connection) -> list:
+    """
+    SQL query that retrieves all lectures held by the winning professors in the semesters of their award.
+    :param con: A connection to a SQL database with the loaded winners table (see load_winners()).
+    :return: The lectures given by the prof in the semester for every row of winner_semesters().
+    """
+    result = con.execute("SELECT W.position, Lecture.name "
+                         "FROM winners W INNER JOIN Person ON person.lastname = W.lastname AND person.firstname = W.firstname "
+                         "AND person.semester = W.semester "
+                         "INNER JOIN Dozs ON dozs.doz = person.'@key' AND dozs.semester = person.semester "
+                         "INNER JOIN Lecture ON dozs.semester = lecture.semester AND dozs.'@key' = lecture.'@key' "
+                         "ORDER BY W.position, dozs.rowid, person.rowid, lecture.rowid")
+
+    return group_by_position(result, 2 * len(winner))
 
 def create_lecture_df(db: sqlalchemy.engine.Engine) -> pd.DataFrame:
     """
@@ -71,81 +126,41 @@ def create_lecture_df(db: sqlalchemy.engine.Engine) -> pd.DataFrame:
     :param db A SQL database.
     :return: A Data Frame with the lectures given by the :prof in the :semester.
     """
-    # Data Frame, which stores the winning lectures with place and year.
-    df_lec = pd.DataFrame()
-
-    # Iterates through winner and determines winner's lectures for each semester.
-    for elem in winner:
-        # Lastname of the professor.
-        prof_lastname = elem[0]
-        # Lastname of the professor.
-        prof_firstname = elem[1]
-        # Year of the award.
-        year = elem[2]
-        # Matching winter semester to year. Award refers to winter semester started last year.
-        winter_sem = str(elem[2] - 1) + "w"
-        # Matching summer semester to year. Award refers to the current summer semester.
-        summer_sem = str(elem[2]) + "s"
-        # Award placement.
-        place = elem[3]
-
+    with db.connect() as con:
+        load_winners(con)
         # SQL query result, which determines the lectures given by the winning professors for each semester.
-        result_summer = sql_query_lecture(summer_sem, prof_lastname, prof_firstname, db)
-        result_winter = sql_query_lecture(winter_sem, prof_lastname, prof_firstname, db)
-
-        # Saves the result of the SQL query to a list.
-        lectures_summer = [elem[0] for elem in result_summer]
-        lectures_winter = [elem[0] for elem in result_winter]
+        result = sql_query_lecture(con)
 
+    # Collects the winning lectures with place and year. Every semester keeps its own index, starting at 0.
+    lectures = []
+    index = []
+    for (_, _, year, semester, place), names in zip(winner_semesters(), result):
         # Filters all exercises
-        filtered_lectures_winter = []
-        for ele in lectures_winter:
-            if "Übung" not in ele:
-                if "übung" not in ele:
-                    if "Exercise" not in ele:
-                        filtered_lectures_winter.append(ele)
-
-        filtered_lectures_summer = []
-        for ele in lectures_summer:
-            if "Übung" not in ele:
-                if "übung" not in ele:
-                    if "Exercise" not in ele:
-                        filtered_lectures_summer.append(ele)
-
-        # Creates and stores all found lectures in a temporary data frame with the matching year and placement.
-        df_temp_winter = pd.DataFrame()
-        df_temp_summer = pd.DataFrame()
-
-        df_temp_winter['Vorlesungen'] = filtered_lectures_winter
-        df_temp_winter['Jahr'] = year
-        df_temp_winter['Semester'] = winter_sem
-        df_temp_winter['Platz'] = place
-
-        df_temp_summer['Vorlesungen'] = filtered_lectures_summer
-        df_temp_summer['Jahr'] = year
-        df_temp_summer['Semester'] = summer_sem
-        df_temp_summer['Platz'] = place
-
-        # Combines the temporary data frame with the lecture data frame.
-        df_temp = pd.concat([df_temp_summer, df_temp_winter])
-        df_lec = pd.concat([df_lec, df_temp])
+        filtered_lectures = [elem[0] for elem in names if not is_exercise(elem[0])]
+        lectures += [(name, year, semester, place) for name in filtered_lectures]
+        index += range(len(filtered_lectures))
+
+    df_lec = pd.DataFrame(lectures, columns=['Vorlesungen', 'Jahr', 'Semester', 'Platz'], index=index)
 
     # Prints the data frame and removes missing values.
     return df_lec.dropna()
 
-def sql_query_all_moduls(semester: str, db: sqlalchemy.engine.Engine) -> list:
+def sql_query_all_moduls(con: sqlalchemy.engine.Connection) -> dict:
     """
-    SQL query that searches out all ECTS of the winning lectures.
-    :param semester: Semester for the search query in the format '2021w' for winter and '2021s' for summer.
-    :param db A SQL database.
-    :return: The lecture name, ects, expected number of participants, lecturer last name and first name for all computer science moduls for given :semester.
+    SQL query that searches out all computer science moduls in the semesters of the Best Prof Awards.
+    :param con: A connection to a SQL database with the loaded winners table (see load_winners()).
+    :return: The lecture name, ects, expected number of participants, lecturer last name and first name for all computer science moduls per semester.
     """
-    result = db.execute("SELECT L.name, L.Ects_cred, turnout, p.lastname, p.firstname "
-                        "FROM Lecture L INNER JOIN orgunits o on L.semester = o.semester and L.'@key' = o.'@key' "
-                        "INNER JOIN dozs d on L.semester = d.semester and L.'@key' = d.'@key' "
-                        "INNER JOIN Person P on d.doz = P.'@key' AND d.semester = P.semester "
-                        "WHERE o.Semester = ? AND orgunit = 'Institut für Informatik' ", semester)
-    return result
+    result = con.execute("SELECT o.semester, L.name, L.Ects_cred, turnout, p.lastname, p.firstname "
+                         "FROM Lecture L INNER JOIN orgunits o on L.semester = o.semester and L.'@key' = o.'@key' "
+                         "INNER JOIN dozs d on L.semester = d.semester and L.'@key' = d.'@key' "
+                         "INNER JOIN Person P on d.doz = P.'@key' AND d.semester = P.semester "
+                         "WHERE o.Semester IN (SELECT semester FROM winners) AND orgunit = 'Institut für Informatik' "
+                         "ORDER BY L.rowid, o.rowid, d.doz, d.rowid, P.rowid")
+    moduls = {}
+    for row in result:
+        moduls.setdefault(row[0], []).append(tuple(row[1:]))
+    return moduls
 
 def create_df_all_moduls(db: sqlalchemy.engine.Engine):
     """
@@ -153,74 +168,25 @@ def create_df_all_moduls(db: sqlalchemy.engine.Engine):
     :param db A SQL database.
     :return: A data frame, that stores all lecture names, lecturer last name and first name, ects, expected number of participants, year and semester.
     """
-    # Data Frame, which stores all modul data.
-    df_all_moduls = pd.DataFrame()
-
-    for x in winner:
-        # Year of the award.
-        year = x[2]
-        # Matching winter semester to year. Award refers to winter semester started last year.
-        winter_sem = str(x[2] - 1) + "w"
-        # Matching summer semester to year. Award refers to the current summer semester.
-        summer_sem = str(x[2]) + "s"
-
+    with db.connect() as con:
+        load_winners(con)
         # SQL query result that determines all lectures of the Institute of Computer Science for each semester.
-        result_winter = sql_query_all_moduls(winter_sem, db)
-        result_summer = sql_query_all_moduls(summer_sem, db)
+        result = sql_query_all_moduls(con)
 
-        # Saves the result of the SQL query to a list.
-        result_winter = [x for x in result_winter]
-        result_summer = [x for x in result_summer]
+    # Collects all modul data, the latest winner first and the summer before the winter semester.
+    moduls = []
+    semesters = winner_semesters()
+    for i in reversed(range(0, len(semesters), 2)):
+        for (_, _, year, semester, _) in semesters[i:i + 2]:
+            moduls += [(y[0], y[3], y[4], y[2], y[1], year, semester, "Durchschnitt aller Module")
+                       for y in result.get(semester, []) if not is_exercise(y[0])]
 
-        # Filters all exercises
-        filtered_list_summer = []
-        for ele in result_summer:
-            if "Übung" not in ele[0]:
-                if "übung" not in ele[0]:
-                    if "Exercise" not in ele[0]:
-                        filtered_list_summer.append(ele)
-
-        filtered_list_winter = []
-        for ele in result_winter:
-            if "Übung" not in ele[0]:
-                if "übung" not in ele[0]:
-                    if "Exercise" not in ele[0]:
-                        filtered_list_winter.append(ele)
-
-        df_temp = pd.DataFrame()
-
-        for y in filtered_list_summer:
-            df_temp1 = pd.DataFrame()
-            df_temp1['Vorlesungen'] = [y[0]]
-            df_temp1['Nachname'] = [y[3]]
-            df_temp1['Vorname'] = [y[4]]
-            df_temp1['Teilnehmerzahl'] = [y[2]]
-            df_temp1['ECTS'] = [y[1]]
-            df_temp1['Jahr'] = [year]
-            df_temp1['Semester'] = [summer_sem]
-            df_temp1['Platz'] = "Durchschnitt aller Module"
-
-            df_temp = pd.concat([df_temp, df_temp1])
-
-        df_temp3 = pd.DataFrame()
-
-        for y in filtered_list_winter:
-            df_temp2 = pd.DataFrame()
-            df_temp2['Vorlesungen'] = [y[0]]
-            df_temp2['Nachname'] = [y[3]]
-            df_temp2['Vorname'] = [y[4]]
-            df_temp2['Teilnehmerzahl'] = [y[2]]
-            df_temp2['ECTS'] = [y[1]]
-            df_temp2['Jahr'] = [year]
-            df_temp2['Semester'] = [winter_sem]
-            df_temp2['Platz'] = "Durchschnitt aller Module"
-
-            df_temp3 = pd.concat([df_temp3, df_temp2])
-
-        # Combines the temporary data frame with the modul data frame.
-        df_all_moduls = pd.concat([df_temp, df_temp3, df_all_moduls])
-
-    return df_all_moduls
+    if not moduls:
+        return pd.DataFrame()
+
+    # Every modul keeps the index of its single row data frame.
+    return pd.DataFrame(moduls, columns=['Vorlesungen', 'Nachname', 'Vorname', 'Teilnehmerzahl', 'ECTS', 'Jahr',
+                                         'Semester', 'Platz'], index=[0] * len(moduls))
 
 def calculates_num_of_moduls(df_lecture: pd.DataFrame, df_all_moduls: pd.DataFrame) -> pd.DataFrame:
     """
@@ -261,17 +227,17 @@ def calculates_num_of_moduls(df_lecture: pd.DataFrame, df_all_moduls: pd.DataFra
 
     return df_count_lec
 
-def sql_query_ects(semester: str, lecture_name: str, db: sqlalchemy.engine.Engine) -> list:
+def sql_query_ects(con: sqlalchemy.engine.Connection, length: int) -> list:
     """
     SQL query that searches out all ECTS of the winning lectures.
-    :param semester: Semester for the search query in the format '2021w' for winter and '2021s' for summer.
-    :param lecture_name: Name of the lecture for the search query.
-    :param db A SQL database.
-    :return: The ECTS given by the :lecture in the :semester.
+    :param con: A connection to a SQL database with the loaded winning lectures (see load_winner_lectures()).
+    :param length: The number of winning lectures.
+    :return: The ECTS given by the lecture in the semester for every winning lecture.
     """
-    result = db.execute("SELECT Ects_cred FROM Lecture "
-                        "WHERE Semester = ? AND Name = ? ", (semester, lecture_name))
-    return result
+    result = con.execute("SELECT W.position, Ects_cred FROM winner_lectures W "
+                         "INNER JOIN Lecture ON Lecture.Semester = W.semester AND Lecture.Name = W.name "
+                         "ORDER BY W.position, Lecture.rowid")
+    return group_by_position(result, length)
 
 def create_ects_df(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine) -> pd.DataFrame:
     """
@@ -281,16 +247,19 @@ def create_ects_df(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine) -> pd.Dat
     :param db A SQL database.
     :return: A data frame from all ects of lectures.
     """
-    # Data frame that stores the ECTS with the placement.
-    df_ects = pd.DataFrame()
-
     # Creates a list from the data frame of all winning lectures.
     lecture_list = df_lec.values.tolist()
 
+    # SQL query result, which determines the ECTS of all winning lectures.
+    with db.connect() as con:
+        load_winner_lectures(df_lec, con)
+        result = sql_query_ects(con, len(lecture_list))
+
+    # Stores the ECTS with the placement.
+    ects = []
+
     # Iterates through lecture_list and determines winner's lectures for each semester.
-    for x in lecture_list:
-        # Name of the lecture.
-        lec = x[0]
+    for x, rows in zip(lecture_list, result):
         # Year of the award.
         year = x[1]
         # Matching semester to year. Award refers to winter semester started last year.
@@ -298,40 +267,25 @@ def create_ects_df(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine) -> pd.Dat
         # Award placement.
         place = x[3]
 
-        # SQL query result, which determines the lectures given by the winning professors for each semester.
-        result = sql_query_ects(semester, lec, db)
-
-        # Saves the result of the SQL query to a list.
-        ects = [x[0] for x in result]
-
-        # Creates and stores all found lectures in a temporary data frame with the matching year and placement.
-        df_temp = pd.DataFrame()
-        df_temp['ECTS'] = ects
-        df_temp['Jahr'] = year
-        df_temp['Semester'] = semester
-        df_temp['Platz'] = str(place)
-
-        # Combines the temporary data frame with the ects data frame.
-        df_ects = pd.concat([df_ects, df_temp])
+        ects += [(y[0], year, semester, str(place)) for y in rows]
 
     # Creates DataFrames with a continuous index.
-    ects = df_ects.values.tolist()
     df_ects = pd.DataFrame(ects, columns=['ECTS', 'Jahr', 'Semester', 'Platz'])
 
     # Prints the data frame and removes missing values.
     return df_ects.dropna()
 
-def sql_query_language(semester: str, lecture_name: str, db: sqlalchemy.engine.Engine) -> list:
+def sql_query_language(con: sqlalchemy.engine.Connection, length: int) -> list:
     """
-    SQL query that outputs whether a given module has English or German as the teaching language in a semester.
-    :param semester: Semester for the search query in the format '2021w' for winter and '2021s' for summer.
-    :param lecture_name: Name of the lecture for the search query.
-    :param db A SQL database.
-    :return: 1 if the language is english, otherwise 0
+    SQL query that outputs whether the winning lectures have English or German as the teaching language.
+    :param con: A connection to a SQL database with the loaded winning lectures (see load_winner_lectures()).
+    :param length: The number of winning lectures.
+    :return: 1 if the language is english, otherwise 0, for every winning lecture.
     """
-    result = db.execute("SELECT englisch FROM Lecture "
-                        "WHERE Semester = ? AND name = ?", (semester, lecture_name))
-    return result
+    result = con.execute("SELECT W.position, englisch FROM winner_lectures W "
+                         "INNER JOIN Lecture ON Lecture.Semester = W.semester AND Lecture.name = W.name "
+                         "ORDER BY W.position, Lecture.rowid")
+    return group_by_position(result, length)
 
 def create_lecture_language(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine) -> pd.DataFrame:
     """
@@ -343,13 +297,16 @@ def create_lecture_language(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine)
     # Creates a list from the data frame of all winning lectures.
     lecture_list = df_lec.values.tolist()
 
-    # Data Frame, which stores the winning lectures with place and year.
-    df_lan = pd.DataFrame()
+    # SQL query result that determines the language for lectures of the winning professors for each semester.
+    with db.connect() as con:
+        load_winner_lectures(df_lec, con)
+        result = sql_query_language(con, len(lecture_list))
+
+    # Stores the languages with place and year.
+    language = []
 
     # Iterates through lecture_list and determines winner's lectures for each semester.
-    for x in lecture_list:
-        # Name of the lecture.
-        lec = x[0]
+    for x, rows in zip(lecture_list, result):
         # Year of the award.
         year = x[1]
         # Matching semester to year. Award refers to winter semester started last year.
@@ -357,30 +314,14 @@ def create_lecture_language(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine)
         # Award placement.
         place = x[3]
 
-        # SQL query result that determines the language for lectures of the winning professors for each semester.
-        result = sql_query_language(semester, lec, db)
-
-        # Saves the result of the SQL query to a list.
-        english = [x[0] for x in result]
-
-        # Creates and stores all found lectures in a temporary data frame with the matching year and placement.
-        df_temp = pd.DataFrame()
-        for y in english:
-            if y == 1:
-                df_temp['Englisch'] = [1]
-                df_temp['Deutsch'] = [0]
+        # Only the last matching lecture counts.
+        if rows:
+            if rows[-1][0] == 1:
+                language += [(1, 0, year, semester, place)]
             else:
-                df_temp['Englisch'] = [0]
-                df_temp['Deutsch'] = [1]
-            df_temp['Jahr'] = [year]
-            df_temp['Semester'] = [semester]
-            df_temp['Platz'] = [place]
-
-        # Combines the temporary data frame with the lecture data frame.
-        df_lan = pd.concat([df_lan, df_temp])
+                language += [(0, 1, year, semester, place)]
 
     # Creates DataFrames with a continuous index.
-    language = df_lan.values.tolist()
     df_language = pd.DataFrame(language, columns=['Englisch', 'Deutsch', 'Jahr', 'Semester', 'Platz'])
 
     # Prints the data frame and removes missing values.
@@ -414,17 +355,17 @@ def count_lecture_language(df_language: pd.DataFrame) -> pd.DataFrame:
 
     return df_count_language
 
-def sql_query_num_of_participants(semester: str, lecture_name: str, db: sqlalchemy.engine.Engine) -> list:
+def sql_query_num_of_participants(con: sqlalchemy.engine.Connection, length: int) -> list:
     """
-    SQL query that searches out the expected number of participants for the modules.
-    :param semester: Semester for the search query in the format '2021w' for winter and '2021s' for summer.
-    :param lecture_name: Name of the lecture for the search query.
-    :param db A SQL database.
-    :return: The expected number of participants.
+    SQL query that searches out the expected number of participants for the winning lectures.
+    :param con: A connection to a SQL database with the loaded winning lectures (see load_winner_lectures()).
+    :param length: The number of winning lectures.
+    :return: The expected number of participants for every winning lecture.
     """
-    result = db.execute("SELECT turnout FROM Lecture "
-                        "WHERE Semester = ? AND Name = ? ", (semester, lecture_name))
-    return result
+    result = con.execute("SELECT W.position, turnout FROM winner_lectures W "
+                         "INNER JOIN Lecture ON Lecture.Semester = W.semester AND Lecture.Name = W.name "
+                         "ORDER BY W.position, Lecture.rowid")
+    return group_by_position(result, length)
 
 def create_num_of_participants(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine) -> pd.DataFrame:
     """
@@ -436,8 +377,13 @@ def create_num_of_participants(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engin
     # Creates a list from the data frame of all winning lectures.
     lecture_list = df_lec.values.tolist()
 
-    # Data Frame, which stores the winning lectures with place and year.
-    df_num = pd.DataFrame()
+    # SQL query result that determines the number of participants for lectures of the winning professors.
+    with db.connect() as con:
+        load_winner_lectures(df_lec, con)
+        result = sql_query_num_of_participants(con, len(lecture_list))
+
+    # Stores the number of participants with place and year.
+    participants = []
 
     previous_year = 2019
     previous_place = 1
@@ -446,37 +392,25 @@ def create_num_of_participants(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engin
 
     # Iterates through lecture_list and determines winner's lectures for each semester.
     for i in range(length):
-        # Name of the lecture.
-        lec = lecture_list[i][0]
         # Year of the award.
         year = lecture_list[i][1]
-        # Matching semester to year. Award refers to winter semester started last year.
-        semester = lecture_list[i][2]
         # Award placement.
         place = lecture_list[i][3]
 
-        # SQL query result that determines the language for lectures of the winning professors for each semester.
-        result = sql_query_num_of_participants(semester, lec, db)
-
         # Saves the result of the SQL query to a list.
-        number = [x[0] for x in result]
-        df_temp = pd.DataFrame()
+        number = [x[0] for x in result[i]]
         if i == (length - 1):
             if number[0] is not None:
                 count_numbers += number[0]
 
-            df_temp['Teilnehmerzahl'] = [count_numbers]
-            df_temp['Jahr'] = [year]
-            df_temp['Platz'] = [str(place)]
+            participants += [(count_numbers, year, str(place))]
         else:
             if (year == previous_year) & (place == previous_place):
                 if number[0] is not None:
                     count_numbers += number[0]
             else:
-                # Creates and stores all found numbers in a temporary data frame with the matching year and placement.
-                df_temp['Teilnehmerzahl'] = [count_numbers]
-                df_temp['Jahr'] = [previous_year]
-                df_temp['Platz'] = [str(previous_place)]
+                # Stores all found numbers with the matching year and placement.
+                participants += [(count_numbers, previous_year, str(previous_place))]
 
                 if number[0] is not None:
                     count_numbers = number[0]
@@ -484,27 +418,24 @@ def create_num_of_participants(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engin
                 previous_year = year
                 previous_place = place
 
-        # Combines the temporary data frame with the lecture data frame.
-        df_num = pd.concat([df_num, df_temp])
-
     # Creates DataFrames with a continuous index.
-    language = df_num.values.tolist()
-    df_participants = pd.DataFrame(language, columns=['Teilnehmerzahl', 'Jahr', 'Platz'])
+    df_participants = pd.DataFrame(participants, columns=['Teilnehmerzahl', 'Jahr', 'Platz'])
 
     # Prints the data frame and removes missing values.
     return df_participants.dropna()
 
-def sql_query_orgname(semester: str, lecture_name: str, db: sqlalchemy.engine.Engine) -> list:
+def sql_query_orgname(con: sqlalchemy.engine.Connection, length: int) -> list:
     """
-    SQL query that searches out the associated orgname for the modules.
-    :param semester: Semester for the search query in the format '2021w' for winter and '2021s' for summer.
-    :param lecture_name: Name of the lecture for the search query.
-    :param db A SQL database.
-    :return: The associated orgname for the modules
+    SQL query that searches out the associated orgname for the winning lectures.
+    :param con: A connection to a SQL database with the loaded winning lectures (see load_winner_lectures()).
+    :param length: The number of winning lectures.
+    :return: The associated orgname for every winning lecture.
     """
-    result = db.execute("SELECT orgname FROM Lecture "
-                        "WHERE Semester = ? AND Name = ? ", (semester, lecture_name))
-    return result
+    result = con.execute("SELECT W.position, orgname FROM winner_lectures W "
+                         "INNER JOIN Lecture ON Lecture.Semester = W.semester AND Lecture.Name = W.name "
+                         "ORDER BY W.position, Lecture.rowid")
+    return group_by_position(result, length)
+
 def create_orgname(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine) -> pd.DataFrame:
     """
     This function creates a data frame, with the associated orgname for the modules.
@@ -515,35 +446,14 @@ def create_orgname(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine) -> pd.Dat
     # Creates a list from the data frame of all winning lectures.
     lecture_list = df_lec.values.tolist()
 
-    # Data Frame, which stores the orgname with place and year.
-    df_org = pd.DataFrame()
-
-    # Iterates through lecture_list and determines winner's lectures for each semester.
-    for x in lecture_list:
-        # Name of the lecture.
-        lec = x[0]
-        # Year of the award.
-        year = x[1]
-        # Matching semester to year. Award refers to winter semester started last year.
-        semester = x[2]
-        # Award placement.
-        place = x[3]
-
-        # SQL query result that determines the orgname for lectures of the winning professors for each semester.
-        result = sql_query_orgname(semester, lec, db)
+    # SQL query result that determines the orgname for lectures of the winning professors for each semester.
+    with db.connect() as con:
+        load_winner_lectures(df_lec, con)
+        result = sql_query_orgname(con, len(lecture_list))
 
-        # Saves the result of the SQL query to a list.
-        orgname = [x[0] for x in result]
-
-        # Creates and stores all found lectures in a temporary data frame with the matching year and placement.
-        df_temp = pd.DataFrame()
-        for y in orgname:
-            df_temp['Organisation'] = [y]
-            df_temp['Jahr'] = [str(year)]
-            df_temp['Platz'] = [str(place)]
-
-        # Combines the temporary data frame with the lecture data frame.
-        df_org = pd.concat([df_org, df_temp])
+    # Stores the orgname with place and year. Only the last matching lecture counts.
+    orgs = [(rows[-1][0], str(x[1]), str(x[3])) for x, rows in zip(lecture_list, result) if rows]
+    df_org = pd.DataFrame(orgs, columns=['Organisation', 'Jahr', 'Platz'])
 
     # Since 2018 computer engineering means distributed systems
     df_org.loc[df_org.Organisation == "Technische Informatik", 'Organisation'] = 'Verteilte Systeme'
@@ -557,18 +467,18 @@ def create_orgname(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine) -> pd.Dat
     # Prints the data frame and removes missing values.
     return df_org.groupby(['Jahr', 'Platz', 'Organisation'])['Organisation'].count().reset_index(name='Anzahl')
 
-def sql_query_modul_time(semester: str, lecture_name: str, db: sqlalchemy.engine.Engine) -> list:
+def sql_query_modul_time(con: sqlalchemy.engine.Connection, length: int) -> list:
     """
-    SQL query that outputs weekdays, start and end time of a module.
-    :param semester: Semester for the search query in the format '2021w' for winter and '2021s' for summer.
-    :param lecture_name: Name of the lecture for the search query.
-    :param db A SQL database.
-    :return: Weekdays, start and end time of a module.
+    SQL query that outputs weekdays, start and end time of the winning lectures.
+    :param con: A connection to a SQL database with the loaded winning lectures (see load_winner_lectures()).
+    :param length: The number of winning lectures.
+    :return: Weekdays, start and end time for every winning lecture.
     """
-    result = db.execute("SELECT terms.starttime, terms.endtime, terms.repeat "
-                        "FROM Lecture INNER JOIN  terms on Lecture.'@key' = terms.'@key' "
-                        "WHERE lecture.semester =? AND lecture.name= ? AND Lecture.semester = terms.semester", (semester, lecture_name))
-    return result
+    result = con.execute("SELECT W.position, terms.starttime, terms.endtime, terms.repeat "
+                         "FROM winner_lectures W INNER JOIN Lecture ON lecture.semester = W.semester AND lecture.name = W.name "
+                         "INNER JOIN terms on Lecture.'@key' = terms.'@key' AND Lecture.semester = terms.semester "
+                         "ORDER BY W.position, Lecture.rowid, terms.starttime, terms.endtime, terms.repeat, terms.rowid")
+    return group_by_position(result, length)
 
 def create_modul_time(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine) -> pd.DataFrame:
     """
@@ -580,28 +490,22 @@ def create_modul_time(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine) -> pd.
     # Creates a list from the data frame of all winning lectures.
     lecture_list = df_lec.values.tolist()
 
-    # Data Frame, which stores the times with place and year.
-    df_time = pd.DataFrame()
+    # SQL query result that determines the times for lectures of the winning professors for each semester.
+    with db.connect() as con:
+        load_winner_lectures(df_lec, con)
+        result = sql_query_modul_time(con, len(lecture_list))
+
+    # Stores the times with place and year.
+    temp = []
 
     # Iterates through lecture_list and determines winner's lectures for each semester.
-    for x in lecture_list:
-        # Name of the lecture.
-        lec = x[0]
+    for x, modul_time in zip(lecture_list, result):
         # Year of the award.
         year = x[1]
-        # Matching semester to year. Award refers to winter semester started last year.
-        semester = x[2]
         # Award placement.
         place = x[3]
 
-        # SQL query result that determines the times for lectures of the winning professors for each semester.
-        result = sql_query_modul_time(semester, lec, db)
-
-        # Saves the result of the SQL query to a list.
-        modul_time = [x for x in result]
-
         # Converts the database description for days to day names.
-        temp = []
         for y in modul_time:
             time = None
             match y[0]:
@@ -638,31 +542,24 @@ def create_modul_time(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine) -> pd.
                     days = "Samstag"
                     temp += [(year, str(place), time, y[1], days)]
 
-        # Creates and stores all found times in a temporary data frame with the matching year and placement.
-        df_temp = pd.DataFrame(temp, columns=['Jahr', 'Platz', 'Startzeit', 'Endzeit', 'Tag'])
-
-        # Combines the temporary data frame with the time data frame.
-        df_time = pd.concat([df_time, df_temp])
-
     # Creates DataFrames with a continuous index.
-    time_list = df_time.values.tolist()
-    df_modul_time = pd.DataFrame(time_list, columns=['Jahr', 'Platz', 'Startzeit', 'Endzeit', 'Tag'])
+    df_modul_time = pd.DataFrame(temp, columns=['Jahr', 'Platz', 'Startzeit', 'Endzeit', 'Tag'])
 
     # Prints the data frame and removes missing values.
     return df_modul_time.dropna()
 
-def sql_query_exam_date(semester: str, lecture_name: str, db: sqlalchemy.engine.Engine) -> list:
+def sql_query_exam_date(con: sqlalchemy.engine.Connection, length: int) -> list:
     """
-    SQL query that outputs exam dates.
-    :param semester: Semester for the search query in the format '2021w' for winter and '2021s' for summer.
-    :param lecture_name: Name of the lecture for the search query.
-    :param db A SQL database.
-    :return: The exam dates for a module.
+    SQL query that outputs exam dates of the winning lectures.
+    :param con: A connection to a SQL database with the loaded winning lectures (see load_winner_lectures()).
+    :param length: The number of winning lectures.
+    :return: The exam dates for every winning lecture.
     """
-    result = db.execute("SELECT E.startdate "
-                        "FROM Lecture INNER JOIN Event E on Lecture.'@key' = E.dbref "
-                        "WHERE Lecture.semester = ? AND lecture.name = ? AND Lecture.semester = E.semester ", (semester, lecture_name))
-    return result
+    result = con.execute("SELECT W.position, E.startdate "
+                         "FROM winner_lectures W INNER JOIN Lecture ON Lecture.semester = W.semester AND lecture.name = W.name "
+                         "INNER JOIN Event E on Lecture.'@key' = E.dbref AND Lecture.semester = E.semester "
+                         "ORDER BY W.position, Lecture.rowid, E.rowid")
+    return group_by_position(result, length)
 
 def create_exam_date(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine) -> [pd.DataFrame]:
     """
@@ -674,14 +571,19 @@ def create_exam_date(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine) -> [pd.
     # Creates a list from the data frame of all winning lectures.
     lecture_list = df_lec.values.tolist()
 
-    # Data Frame, which stores the dates with place and year.
-    df_exam = pd.DataFrame()
-    df_count = pd.DataFrame()
+    # SQL query result that determines exam dates for lectures of the winning professors for each semester.
+    with db.connect() as con:
+        load_winner_lectures(df_lec, con)
+        result = sql_query_exam_date(con, len(lecture_list))
+
+    # Stores the dates with place and year. Every lecture keeps its own index, starting at 0.
+    exams = []
+    exam_index = []
+    counts = []
+    count_index = []
 
     # Iterates through lecture_list and determines winner's lectures for each semester.
-    for x in lecture_list:
-        # Name of the lecture.
-        lec = x[0]
+    for x, rows in zip(lecture_list, result):
         # Year of the award.
         year = x[1]
         # Matching semester to year. Award refers to winter semester started last year.
@@ -689,11 +591,8 @@ def create_exam_date(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine) -> [pd.
         # Award placement.
         place = x[3]
 
-        # SQL query result that determines exam dates for lectures of the winning professors for each semester.
-        result = sql_query_exam_date(semester, lec, db)
-
         # Saves the result of the SQL query to a list.
-        exam_dates_list = [x[0] for x in result]
+        exam_dates_list = [x[0] for x in rows]
         # Converts a list to a set
         exam_dates_set = set(exam_dates_list)
 
@@ -731,13 +630,14 @@ def create_exam_date(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine) -> [pd.
                         else:
                             count_list += [(year, str(place), 1)]
 
-        # Creates and stores all found times in a temporary data frame with the matching year and placement.
-        df_temp1 = pd.DataFrame(exam_list, columns=['Jahr', 'Platz', 'Anzahl'])
-        df_temp2 = pd.DataFrame(count_list, columns=['Jahr', 'Platz', 'Anzahl außerhalb PZ'])
+        # Stores all found times with the matching year and placement.
+        exams += exam_list
+        exam_index += range(len(exam_list))
+        counts += count_list
+        count_index += range(len(count_list))
 
-        # Combines the temporary data frame with the exam data frame.
-        df_exam = pd.concat([df_exam, df_temp1])
-        df_count = pd.concat([df_count, df_temp2])
+    df_exam = pd.DataFrame(exams, columns=['Jahr', 'Platz', 'Anzahl'], index=exam_index)
+    df_count = pd.DataFrame(counts, columns=['Jahr', 'Platz', 'Anzahl außerhalb PZ'], index=count_index)
 
     # Prints the data frame and removes missing values.
     return [df_exam.dropna(), df_count.dropna()]
@@ -1081,15 +981,22 @@ def sql_prediction_best_prof_2022_lecture(year: list, starttime: list, days: lis
     :param db A SQL database.
     :return: all found lectures.
     """
-    result = db.execute(f''' SELECT L.name FROM Lecture L INNER JOIN dozs d ON L.semester = d.semester AND L.[@key] = d.[@key] 
+    with db.connect() as con:
+        years, year_params = in_values(con, 'year', year)
+        starttimes, starttime_params = in_values(con, 'starttime', starttime)
+        repeats, repeat_params = in_values(con, 'repeat', days)
+        ects_creds, ects_params = in_values(con, 'ects', ects)
+        orgnames, orgname_params = in_values(con, 'orgname', orgname)
+        result = con.execute(f''' SELECT L.name FROM Lecture L INNER JOIN dozs d ON L.semester = d.semester AND L.[@key] = d.[@key] 
                             INNER JOIN Person P ON d.doz = P.[@key] AND d.semester = P.semester 
                             INNER JOIN Event E ON L.[@key] = E.dbref AND L.semester = E.semester 
                             INNER JOIN terms t ON L.[@key] = t.[@key] AND L.semester = t.semester 
-                            WHERE L.semester IN {str(tuple(year))} 
-                            AND t.starttime IN {str(tuple(starttime))} 
-                            AND t.repeat IN {str(tuple(days))} 
-                            AND L.ects_cred IN {str(tuple(ects))} 
-                            AND L.orgname IN {str(tuple(orgname))}; ''')
+                            WHERE L.semester IN {years} 
+                            AND t.starttime IN {starttimes} 
+                            AND t.repeat IN {repeats} 
+                            AND L.ects_cred IN {ects_creds} 
+                            AND L.orgname IN {orgnames}; ''', **year_params, **starttime_params, **repeat_params, **ects_params,
+                             **orgname_params).fetchall()
 
     return result
 
@@ -1101,12 +1008,15 @@ def sql_prediction_best_prof_2022_prof(year: list, lecture: list, db: sqlalchemy
     :param db A SQL database.
     :return: all persons with lastname and firstname.
     """
-    result = db.execute(f''' SELECT person.lastname, person.firstname
+    with db.connect() as con:
+        years, year_params = in_values(con, 'year', year)
+        lectures, lecture_params = in_values(con, 'lecture', lecture)
+        result = con.execute(f''' SELECT person.lastname, person.firstname
                             FROM Dozs INNER JOIN Person INNER JOIN Lecture 
                             ON dozs.doz = person.'@key' AND dozs.semester = lecture.semester AND dozs.semester = person.semester 
                             AND dozs.'@key' = lecture.'@key'
-                            WHERE lecture.semester IN {str(tuple(year))} 
-                            AND lecture.name IN {str(tuple(lecture))}; ''')
+                            WHERE lecture.semester IN {years} 
+                            AND lecture.name IN {lectures}; ''', **year_params, **lecture_params).fetchall()
     return result
 
 def prediction_best_prof_2022(db: sqlalchemy.engine.Engine) -> set:
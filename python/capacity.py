@@ -21,7 +21,6 @@ def capacity(db: sqlalchemy.engine.base.Engine
                 number of uses of a room sorted by semester.
                 Also dictionaries containing the mean of every room size sorted by semester
     """
-    con = db.connect()
     # collect the degree of capacity utilization for every semester, separated by room size
     capacity_room_from_100 = {}
     capacity_room_til_100 = {}
@@ -41,17 +40,17 @@ def capacity(db: sqlalchemy.engine.base.Engine
     # get the average degree of capacity utilization of every room per semester
     query = "SELECT [@key], name, short, AVG(ratio), semester, size, number, teilnehmer " \
             "FROM " \
-            "(SELECT R.[@key], R.name, R.short, OT.semester, ROUND(turnout * 100.0 / size, 2) AS ratio, " \
-            "room, SUM(turnout) AS teilnehmer, size, COUNT(*) AS number " \
-            "FROM (terms NATURAL JOIN orgunits) OT " \
-            "LEFt JOIN Lecture L on OT.[@key] = L.[@key] AND L.semester = OT.semester " \
-            "LEFT JOIN Room R ON OT.room = R.[@key] AND R.semester = OT.semester " \
-            "WHERE turnout NOT NULL " \
-            "AND SUBSTR(orgunit, -8, 8) = 'Fakultät' " \
+            "(SELECT room AS [@key], room_name AS name, room_short AS short, semester, " \
+            "ROUND(turnout * 100.0 / size, 2) AS ratio, room, SUM(turnout) AS teilnehmer, size, COUNT(*) AS number " \
+            "FROM lecture_facts " \
+            "WHERE term NOT NULL " \
+            "AND turnout NOT NULL " \
+            "AND is_faculty " \
             "AND size NOT NULL " \
-            "GROUP BY OT.semester, room) " \
+            "GROUP BY semester, room) " \
             "GROUP BY room, semester"
-    info = con.execute(query)
+    with db.connect() as con:
+        info = con.execute(query).fetchall()
     # save the information in the dictionary
     for key, name, short, average, semester, size, number, teilnehmer in info:
         if int(size) >= 100:
@@ -128,7 +127,6 @@ def capacity_corona(db: sqlalchemy.engine.base.Engine):
     :return: dictionary containing the information about the
     degree of capacity utilization, name, size and number of uses of a room sorted by semester
     """
-    con = db.connect()
     # collect the degree of capacity utilization and ratio for every semester, separated by room size
     capacity_room_from_100 = {}
     capacity_room_til_100 = {}
@@ -140,21 +138,21 @@ def capacity_corona(db: sqlalchemy.engine.base.Engine):
     # get the average degree of capacity utilization of every room per semester while corona
     query = "Select [@key], semester, name, short, size, reducedsize, AVG(ratio), teilnehmer, AVG(capacity), number " \
             "FROM " \
-            "(Select R.[@key], R.name, reducedsize, R.short, OT.semester, " \
+            "(Select room AS [@key], room_name AS name, reducedsize, room_short AS short, semester, " \
             "ROUND(reducedsize * 100.0 / size, 2) AS ratio, room, SUM(turnout) AS teilnehmer, " \
             "size, COUNT(*) AS number, " \
             "ROUND(reducedsize * 100.0 / turnout, 2) AS capacity " \
-            "FROM (terms NATURAL JOIN orgunits) OT " \
-            "LEft JOIN Lecture L on OT.[@key] = L.[@key] " \
-            "AND L.semester = OT.semester LEFT JOIN Room R ON OT.room = R.[@key] " \
-            "AND R.semester = OT.semester WHERE turnout NOT NULL " \
+            "FROM lecture_facts " \
+            "WHERE term NOT NULL " \
+            "AND turnout NOT NULL " \
             "AND reducedsize NOT NULL " \
-            "AND OT.semester IN ('2020s', '2020w', '2021s', '2021w') " \
+            "AND semester IN ('2020s', '2020w', '2021s', '2021w') " \
             "AND size NOT NULL " \
-            "GROUP BY OT.semester, room) " \
+            "GROUP BY semester, room) " \
             "GROUP BY room, semester " \
             "ORDER BY semester;"
-    info = con.execute(query)
+    with db.connect() as con:
+        info = con.execute(query).fetchall()
     # save the information in the dictionary
     for key, semester, name, short, size, reduced_size, ratio, teilnehmer, capacity_utilization, number in info:
         if int(size) >= 100:
@@ -0,0 +1,134 @@
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+import sqlalchemy
+from sqlalchemy.pool import QueuePool
+from python.queryprofile import ProfilingConnection
+
+# The page whose data is currently built (see `track_page`)
+_PAGE: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('page', default=None)
+
+
+def create_engine(url: str,
+                  read_only: bool = False,
+                  wal: bool = False,
+                  pool_size: int = 5,
+                  max_overflow: int = 10,
+                  pool_timeout: float = 30
+                  ) -> sqlalchemy.engine.Engine:
+    """
+    Create the engine of the database. Connections to SQLite files are pooled, so that the threads of the server reuse
+    them instead of opening the file for every query. Processes forked from the server (e.g. the workers of background
+    callbacks) get a new pool. The connections create profiling cursors, so that a `QueryProfiler` can record the rows
+    of the queries.
+
+    :param url:          The URL of the database, e.g. "sqlite:////path/to/univis.db"
+    :param read_only:    If true, the SQLite file is opened in read-only mode. The lecture facts and the views have to
+                         be built beforehand (e.g. by the precompute command).
+    :param wal:          If true, the SQLite file is switched to write-ahead logging, so that readers are not blocked
+                         while the lecture facts are rebuilt (ignored in read-only mode, the journal mode is stored in
+                         the file)
+    :param pool_size:    The number of connections kept open
+    :param max_overflow: The number of additional connections that are opened under load
+    :param pool_timeout: The number of seconds to wait for a free connection
+    :return:             The engine
+    """
+    url = sqlalchemy.engine.make_url(url)
+    if url.get_backend_name() != 'sqlite' or url.database in [None, '', ':memory:']:
+        return sqlalchemy.create_engine(url)
+
+    if read_only:
+        url = url.set(database=f'file:{url.database}', query={**url.query, 'mode': 'ro', 'uri': 'true'})
+    engine = sqlalchemy.create_engine(url, poolclass=QueuePool, pool_size=pool_size, max_overflow=max_overflow,
+                                      pool_timeout=pool_timeout,
+                                      connect_args={'check_same_thread': False, 'factory': ProfilingConnection})
+
+    if wal and not read_only:
+        @sqlalchemy.event.listens_for(engine, 'connect')
+        def set_journal_mode(dbapi_connection: Any, _):
+            cursor = dbapi_connection.cursor()
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.close()
+
+    # The connections of the parent process must not be used (or closed) by a forked process
+    os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
+    return engine
+
+
+@contextlib.contextmanager
+def track_page(name: str) -> Iterator[None]:
+    """
+    Attribute the queries of the current thread to a page while the context is active
+
+    :param name: The name of the page
+    """
+    token = _PAGE.set(name)
+    try:
+        yield
+    finally:
+        _PAGE.reset(token)
+
+
+class DatabaseStats:
+    """
+    Counts the open connections of an engine and the number and duration of the queries per page (see `track_page`).
+    Queries outside a page are attributed to "(none)".
+    """
+    def __init__(self, engine: sqlalchemy.engine.Engine):
+        """
+        Initialize the statistics and listen to the events of the engine
+
+        :param engine: The engine
+        """
+        self.open_connections = 0
+        self.max_open_connections = 0
+        self.pages: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        sqlalchemy.event.listen(engine, 'checkout', self._checkout)
+        sqlalchemy.event.listen(engine, 'checkin', self._checkin)
+        sqlalchemy.event.listen(engine, 'before_cursor_execute', self._before_execute)
+        sqlalchemy.event.listen(engine, 'after_cursor_execute', self._after_execute)
+
+    def _checkout(self, *_):
+        with self._lock:
+            self.open_connections += 1
+            self.max_open_connections = max(self.max_open_connections, self.open_connections)
+
+    def _checkin(self, *_):
+        with self._lock:
+            self.open_connections -= 1
+
+    @staticmethod
+    def _before_execute(con: sqlalchemy.engine.Connection, *_):
+        con.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def _after_execute(self, con: sqlalchemy.engine.Connection, *_):
+        duration = time.perf_counter() - con.info['query_start'].pop()
+        page = _PAGE.get() or '(none)'
+        with self._lock:
+            stats = self.pages.setdefault(page, {'queries': 0, 'seconds': 0.0})
+            stats['queries'] += 1
+            stats['seconds'] += duration
+
+    def reset(self):
+        """
+        Forget the queries (the open connections are still counted)
+        """
+        with self._lock:
+            self.pages = {}
+            self.max_open_connections = self.open_connections
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Get the statistics
+
+        :return: The number of open connections, the maximum number of open connections and the number of queries and
+                 their total duration in seconds per page
+        """
+        with self._lock:
+            return {'open_connections': self.open_connections, 'max_open_connections': self.max_open_connections,
+                    'pages': {page: dict(stats) for page, stats in self.pages.items()}}
@@ -1,5 +1,6 @@
 import sqlalchemy
 from python.faculty import Faculty, FACULTY_COLORS
+from python.sqlparams import in_clause
 import pandas
 import plotly.express
 
@@ -11,18 +12,19 @@ def englishs(db: sqlalchemy.engine.Engine) -> pandas.DataFrame():
     :return: dictionary that contains the ratio of the english lectures for every semester and the absolute numbers,
     sorted by faculty
     """
-    faculties = str(tuple([str(x) for x in Faculty]))
+    faculties, params = in_clause('faculty', [str(x) for x in Faculty])
     # get the ratio of the english lectures for every faculty
     sql = f'''
-    SELECT OT.semester AS Semester, orgunit AS Fakultät, SUM(englisch) AS Englisch, COUNT(*) AS "Anzahl Lectures", 
+    SELECT semester AS Semester, orgunit AS Fakultät, SUM(englisch) AS Englisch, COUNT(*) AS "Anzahl Lectures", 
         ROUND(SUM(englisch) * 100.0 / COUNT(*), 2) AS "Prozentualer Anteil" 
-    FROM Lecture NATURAL JOIN orgunits OT 
-    WHERE type NOT IN ('AG', 'FPUE', 'KL', 'KO', 'UAK', 'KU', 'SPUE', 'P', 'P-SEM', 'PRUE', 'TU', 'broken') 
+    FROM lecture_facts 
+    WHERE first_term AND is_lecture 
+        AND type NOT IN ('AG', 'FPUE', 'KL', 'KO', 'UAK', 'KU', 'SPUE', 'P', 'P-SEM', 'PRUE', 'TU', 'broken') 
         AND orgunit IN {faculties} 
-    GROUP BY OT.semester, orgunit 
+    GROUP BY semester, orgunit 
     '''
     # get the dataframe and sort it by faculty and semester
-    df_eng = pandas.read_sql(sql, db)
+    df_eng = pandas.read_sql(sql, db, params=params)
     df_eng = df_eng.sort_values(by=['Fakultät', 'Semester'])
 
     return df_eng
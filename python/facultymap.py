@@ -4,30 +4,20 @@ import sqlalchemy
 from folium import plugins
 from jinja2 import Template
 from folium.map import Layer
-from python.faculty import Faculty, FACULTY_COLORS
+from python.faculty import FACULTY_COLORS
 from python.geomanager import GeoManager
+from python.lecturefacts import VIEWS
 
 
 def create_faculty_rooms_view(db: sqlalchemy.engine.Engine) -> None:
     """
-    Creates a view that maps each the number of uses per semester for each room to the faculties.
+    Creates a view that maps each the number of uses per semester for each room to the faculties if it is missing (it
+    is created again whenever the lecture facts are rebuilt).
 
     :param db: The database connection
     """
-    faculties = str(tuple([str(x) for x in Faculty]))
-
-    con = db.connect()
-    con.execute(f'''
-    CREATE VIEW IF NOT EXISTS faculty_rooms AS
-    SELECT T.semester, orgunit AS 'faculty', new_address AS 'address', COUNT(*) AS 'count'
-    FROM terms T
-         NATURAL JOIN orgunits O
-         LEFT JOIN Room R ON T.room = R.[@key] AND T.semester = R.semester
-         LEFT JOIN new_addresses A ON R.address = A.old_address
-    WHERE orgunit IN {faculties}
-        GROUP BY T.semester, orgunit, new_address
-        ORDER BY orgunit, T.semester;
-    ''')
+    with db.begin() as con:
+        con.execute(f"CREATE VIEW IF NOT EXISTS faculty_rooms AS {VIEWS['faculty_rooms']}")
 
 
 def create_map(db: sqlalchemy.engine.Engine, gm: GeoManager) -> folium.Map:
@@ -40,8 +30,10 @@ def create_map(db: sqlalchemy.engine.Engine, gm: GeoManager) -> folium.Map:
     """
     create_faculty_rooms_view(db)
 
-    con = db.connect()
-    result = con.execute('SELECT * FROM faculty_rooms;')
+    with db.connect() as con:
+        result = con.execute('SELECT * FROM faculty_rooms;').fetchall()
+    # Look up the coordinates of all addresses at once
+    gm.resolve_many(address for _, _, address, _ in result)
 
     # Create the empty map
     m = folium.Map(location=[54.3384136, 10.1235659], zoom_start=14, tiles=None)
@@ -80,22 +72,24 @@ def create_heatmap(db: sqlalchemy.engine.Engine,
     """
     create_faculty_rooms_view(db)
 
-    con = db.connect()
-    result = con.execute(f'''
-    SELECT semester, faculty, address, count, count * 1.0 / max AS 'ratio'
-    FROM (
-        SELECT semester, faculty, address, count
-        FROM faculty_rooms
-        WHERE address IS NOT NULL
-        GROUP BY semester, faculty, address
-    ) NATURAL JOIN (
-        SELECT semester, faculty, MAX(count) AS 'max'
-        FROM faculty_rooms
-        WHERE address IS NOT NULL
-        GROUP BY semester, faculty
-    )
-    GROUP BY faculty, semester, address;
-    ''')
+    with db.connect() as con:
+        result = con.execute(f'''
+        SELECT semester, faculty, address, count, count * 1.0 / max AS 'ratio'
+        FROM (
+            SELECT semester, faculty, address, count
+            FROM faculty_rooms
+            WHERE address IS NOT NULL
+            GROUP BY semester, faculty, address
+        ) NATURAL JOIN (
+            SELECT semester, faculty, MAX(count) AS 'max'
+            FROM faculty_rooms
+            WHERE address IS NOT NULL
+            GROUP BY semester, faculty
+        )
+        GROUP BY faculty, semester, address;
+        ''').fetchall()
+    # Look up the coordinates of all addresses at once
+    gm.resolve_many(address for _, _, address, _, _ in result)
 
     # Create a dictionary for the maps and a dictionary for the data
     maps = {}
@@ -1,6 +1,105 @@
+from typing import Tuple
+import numpy as np
 import sqlalchemy
 import pandas as pd
 from python.faculty import Faculty
+from python.lecturefacts import VIEWS
+from python.sqlparams import in_clause
+
+
+def create_genderdata_view(db: sqlalchemy.engine.base.Engine) -> None:
+    """
+    Creates the view of the first names and their genders of the persons of the faculties if it is missing (it is
+    created again whenever the lecture facts are rebuilt)
+
+    :param db: The database connection
+    """
+    with db.begin() as con:
+        con.execute(f"CREATE VIEW IF NOT EXISTS genderdata AS {VIEWS['genderdata']}")
+
+
+def get_gender_counts(db: sqlalchemy.engine.base.Engine, ignore_count: int = 0) -> pd.DataFrame:
+    """
+    Gets the number of persons per semester, faculty, gender and probability of the gender from the database
+
+    :param db:           The database to get the data from
+    :param ignore_count: A threshold for the count that got returned by the api for a name.
+    :return:             The columns semester, orgunit, gender, prob and n (the number of persons)
+    """
+    create_genderdata_view(db)
+
+    faculty_list, params = in_clause('faculty', [str(f) for f in Faculty])
+
+    sql = f'''
+    SELECT semester, orgunit, gender, prob, COUNT(*) AS n
+    FROM genderdata
+    WHERE count > {int(ignore_count)}
+        AND orgunit IN {faculty_list}
+    GROUP BY semester, orgunit, gender, prob
+    ORDER BY orgunit, semester;
+    '''
+    return pd.read_sql(sql, db, params=params)
+
+
+def get_gender_cube(counts: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Computes the number of counted persons for every threshold 0..100 from the result of `get_gender_counts`.
+
+    The numbers are cumulative sums over histograms of the (rounded down) probabilities, so a person counts for every
+    threshold up to its probability. Like in SQL, persons without gender or probability are neither counted as female
+    nor as not male (unless the probability is below the threshold).
+
+    :param counts: The number of persons per semester, faculty, gender and probability
+    :return:       The semesters and faculties with their number of persons (columns semester, orgunit and n) and an
+                   array of shape (2, semesters and faculties, 101) with the number of counted persons if only female
+                   names are counted (index 1) or every name that is not male (index 0) for every threshold
+    """
+    grouped = counts.groupby(['orgunit', 'semester'], sort=True)
+    keys = grouped['n'].sum().reset_index()
+    group = grouped.ngroup().to_numpy()
+    n = counts['n'].to_numpy()
+
+    # The probabilities below 0 are never counted (bucket 0), bucket b + 1 counts for the thresholds up to b
+    prob = counts['prob'].astype(float)
+    bucket = np.clip(np.floor(prob.fillna(-1).to_numpy()), -1, 100).astype(int) + 1
+    female = (counts['gender'] == 'f').to_numpy()
+    male_or_none = (counts['gender'].isna() | (counts['gender'] == 'm')).to_numpy()
+
+    def at_least(mask: np.ndarray) -> np.ndarray:
+        histogram = np.zeros((len(keys), 102), dtype=np.int64)
+        np.add.at(histogram, (group[mask], bucket[mask]), n[mask])
+        return histogram[:, ::-1].cumsum(axis=1)[:, ::-1][:, 1:]
+
+    # Persons without probability are never counted as not male
+    unknown = np.zeros(len(keys), dtype=np.int64)
+    np.add.at(unknown, group[male_or_none & prob.isna().to_numpy()], n[male_or_none & prob.isna().to_numpy()])
+
+    not_male = keys['n'].to_numpy()[:, None] - at_least(male_or_none) - unknown[:, None]
+    return keys, np.stack([not_male, at_least(female)])
+
+
+def get_gender_data_from_cube(cube: Tuple[pd.DataFrame, np.ndarray],
+                              only_female: bool = True,
+                              threshold: int = 50
+                              ) -> pd.DataFrame:
+    """
+    Gets the gender data per faculty for a threshold from the result of `get_gender_cube`
+
+    :param cube:        The semesters and faculties and the number of counted persons for every threshold
+    :param only_female: If true, only names that got declared as female are counted.
+                        Otherwise, counts every name that was not strictly declared as male.
+    :param threshold:   A threshold for the probability (0..100).
+    :return:            The gender data for the given parameters as a pandas DataFrame
+    """
+    keys, counted = cube
+    count = counted[int(only_female), :, threshold]
+    return pd.DataFrame({
+        'Semester': keys['semester'],
+        'Fakultät': keys['orgunit'],
+        'Prozentualer Anteil': count * 100.0 / keys['n'],
+        'Anzahl': count,
+        'Gesamt': keys['n'],
+    })
 
 
 def get_gender_data(db: sqlalchemy.engine.base.Engine,
@@ -18,31 +117,4 @@ def get_gender_data(db: sqlalchemy.engine.base.Engine,
     :param ignore_count: A threshold for the count that got returned by the api for a name.
     :return:             The gender data for the given parameters as a pandas DataFrame
     """
-    sql = '''
-    CREATE VIEW IF NOT EXISTS genderdata AS
-    SELECT semester, orgunit, firstname, G.gender, prob, count
-    FROM Person P NATURAL JOIN orgunits
-        LEFT JOIN genders G ON P.firstname = G.query
-    WHERE firstname NOT NULL 
-        AND SUBSTR(orgunit, -8, 8) = 'Fakultät';
-    '''
-    with db.connect() as con:
-        con.execute(sql)
-
-    of_not = '' if only_female else 'NOT '
-    of_gender = '\'f\'' if only_female else '\'m\''
-
-    faculty_list = str(tuple([str(f) for f in Faculty]))
-
-    sql = f'''
-    SELECT semester AS 'Semester', 
-        orgunit AS 'Fakultät', 
-        SUM({of_not}(gender = {of_gender} AND prob >= {threshold})) * 100.0 / COUNT(*) AS 'Prozentualer Anteil',
-        SUM({of_not}(gender = {of_gender} AND prob >= {threshold})) AS 'Anzahl',
-        COUNT(*) AS 'Gesamt'
-    FROM genderdata
-    WHERE count > {ignore_count} 
-        AND orgunit IN {faculty_list}
-    GROUP BY semester, orgunit;
-    '''
-    return pd.read_sql(sql, db)
+    return get_gender_data_from_cube(get_gender_cube(get_gender_counts(db, ignore_count)), only_female, threshold)
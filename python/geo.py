@@ -47,7 +47,8 @@ def inf_coords(dependencies: Dict[str, Dict[str, List[List[str]]]],
     return coor_dep
 
 
-def routes_for_df(coor_dependencies: Dict[str, Dict[str, Dict[str, List[Tuple[float, float]]]]]
+def routes_for_df(coor_dependencies: Dict[str, Dict[str, Dict[str, List[Tuple[float, float]]]]],
+                  service: osmroute.RoutingService
                   ) -> Dict[str, Dict[str, Dict[str, List[Tuple[float, float]]]]]:
     """
     Computes the coordinates of addresses of rooms where lectures were hold which students of the courses of study
@@ -58,13 +59,19 @@ def routes_for_df(coor_dependencies: Dict[str, Dict[str, Dict[str, List[Tuple[fl
                                semester. Example:
                                {"2016w": {"3": {"1": [(10.1236624, 54.3395847), (10.12160307769561, 54.33888365)]}}}
                                {semester: {study programme semester: {day of the week: [(longitude, latitude)]}}}
+    :param service:           The routing service (see `RoutingService.route_many` for routing in parallel)
     :return:                  A dictionary containing the distances between the addresses and the routes to get from one
                                address to the other, sorted by day of the week, study programme semester and semester
                                Example: {'2016w': {'3': {'1': {'distances': [965.8], 'route':
                                [[10.1236624, 54.3395847, 10.123722, 54.339707, 10.12160307769561, 54.33888365]]}}}}
     """
+    # collect the pairs of consecutive coordinates of all days first, so that they are routed in parallel
+    pairs = [((float(coors[i][0]), float(coors[i][1])), (float(coors[i + 1][0]), float(coors[i + 1][1])))
+             for study_sems in coor_dependencies.values() for days in study_sems.values() for coors in days.values()
+             for i in range(len(coors) - 1) if coors[i] is not None and coors[i + 1] is not None]
+    found = service.route_many(pairs)
+
     routes = {}
-    cache = {}
     # iterate through the semesters
     for semester in coor_dependencies:
         routes[semester] = []
@@ -94,18 +101,12 @@ def routes_for_df(coor_dependencies: Dict[str, Dict[str, Dict[str, List[Tuple[fl
                     if coors[i + 1] is None:
                         entry['Points'] += [coors[i]]
                         continue
-                    # if we already computed that route, just get it from the cache and save it to the dictionary
-                    if str(coors[i] + coors[i + 1]) in cache:
-                        entry['Route'] += [cache[str(coors[i] + coors[i+1])]]
-                        entry['Points'] += [coors[i]]
-                        continue
                     # get the route
-                    route = osmroute.pyroutedistance(float(coors[i][1]), float(coors[i][0]), float(coors[i + 1][1]), float(coors[i + 1][0]))
+                    route = found[((float(coors[i][0]), float(coors[i][1])),
+                                   (float(coors[i + 1][0]), float(coors[i + 1][1])))]
                     # save the route and distance in the dictionary
                     entry['Route'] += [route]
                     entry['Points'] += [coors[i]]
-                    # save that route in the cache, so we don't dDoS the API
-                    cache[str(coors[i] + coors[i+1])] = route
 
                 routes[semester] += [entry]
     return routes
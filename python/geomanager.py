@@ -1,24 +1,237 @@
 import json
-from typing import Union, Tuple
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterable, Optional, Union, Tuple
 
-import geopy
 from geopy.geocoders import Nominatim
-import time
+from python.addressindex import AddressIndex
+from python.sqlparams import MAX_IN_PARAMETERS, in_clause
 
+# A geocoder returns the coordinates (lat, lon) of an address or None if the address could not be found
+Geocoder = Callable[[str], Optional[Tuple[float, float]]]
 
-class GeoManager:
+
+class NominatimGeocoder:
     """
-    A class to manage addresses and coordinates
+    Looks up addresses with the public Nominatim service
     """
+    # The usage policy allows at most one request per second
+    min_delay = 1.0
+
     def __init__(self, email: str):
         """
-        Initialize the GeoManager
+        Initialize the geocoder
 
         :param email: The email address to use for the geopy geolocator (required by the Nominatim API)
         """
-        self.addr_to_coords = {}
         self.geolocator = Nominatim(user_agent=email)
 
+    def __call__(self, addr: str) -> Optional[Tuple[float, float]]:
+        location = self.geolocator.geocode(addr)
+        return None if location is None else (location.latitude, location.longitude)
+
+
+class StaticGeocoder:
+    """
+    Looks up addresses in a dictionary (a local stand-in for testing or for addresses with known coordinates)
+    """
+    min_delay = 0.0
+
+    def __init__(self, coords: Dict[str, Tuple[float, float]]):
+        """
+        Initialize the geocoder
+
+        :param coords: The coordinates (lat, lon) of the known addresses
+        """
+        self.coords = coords
+        self.requests = 0
+
+    def __call__(self, addr: str) -> Optional[Tuple[float, float]]:
+        self.requests += 1
+        return self.coords.get(addr)
+
+
+class GeoStore:
+    """
+    Stores the coordinates of addresses in a SQLite file, which is shared by all pages and processes.
+    Addresses that could not be found are stored without coordinates, so that they are not looked up again.
+    """
+    def __init__(self, path: str):
+        """
+        Initialize the store (the file is created on first access)
+
+        :param path: The path of the SQLite file
+        """
+        self.path = path
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        # A forked process must not use the connection (or the lock) of its parent
+        self._con = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._con is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._con = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            with self._con:
+                self._con.execute('CREATE TABLE IF NOT EXISTS geocodes ('
+                                  'address TEXT PRIMARY KEY, '
+                                  'lat REAL, '
+                                  'lon REAL, '
+                                  'updated REAL NOT NULL)')
+        return self._con
+
+    def load_many(self, addresses: Iterable[str]) -> Dict[str, Optional[Tuple[float, float]]]:
+        """
+        Get the stored coordinates of addresses
+
+        :param addresses: The addresses
+        :return:          The coordinates (or None if the address could not be found) of the stored addresses
+        """
+        addresses = list(dict.fromkeys(addresses))
+        result = {}
+        with self._lock:
+            con = self._connection()
+            for start in range(0, len(addresses), MAX_IN_PARAMETERS):
+                clause, params = in_clause('address', addresses[start:start + MAX_IN_PARAMETERS])
+                for addr, lat, lon in con.execute(f'SELECT address, lat, lon FROM geocodes WHERE address IN {clause}',
+                                                  params):
+                    result[addr] = None if lat is None else (lat, lon)
+        return result
+
+    def store_many(self, coords: Dict[str, Optional[Tuple[float, float]]]):
+        """
+        Store the coordinates of addresses in a single transaction
+
+        :param coords: The coordinates (or None if the address could not be found) of the addresses
+        """
+        now = time.time()
+        rows = [(addr, None, None, now) if c is None else (addr, c[0], c[1], now) for addr, c in coords.items()]
+        with self._lock:
+            con = self._connection()
+            with con:
+                con.executemany('INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?)', rows)
+
+
+class GeoManager:
+    """
+    A class to manage addresses and coordinates
+
+    Coordinates are cached in memory and in the (optional) geocode store. Addresses are resolved against the (optional)
+    offline address index first, which needs no network. Addresses that are neither cached, indexed nor stored are
+    looked up by a single worker thread, which waits `min_delay` seconds of the geocoder between its requests.
+    """
+    def __init__(self,
+                 email: str,
+                 store: Optional[GeoStore] = None,
+                 geocoder: Optional[Geocoder] = None,
+                 index: Optional[AddressIndex] = None,
+                 online: bool = True
+                 ):
+        """
+        Initialize the GeoManager
+
+        :param email:    The email address to use for the geopy geolocator (required by the Nominatim API)
+        :param store:    The geocode store shared by all processes (default: only cache the coordinates in memory)
+        :param geocoder: The geocoder to look up addresses with (default: Nominatim)
+        :param index:    The offline address index (see `addressindex.AddressIndex`)
+        :param online:   If false, addresses missing in the index are not looked up with the geocoder (and have no
+                         coordinates)
+        """
+        self.addr_to_coords: Dict[str, Optional[Tuple[float, float]]] = {}
+        self.store = store
+        self.geocoder = NominatimGeocoder(email) if geocoder is None else geocoder
+        self.index = index
+        self.online = online
+        self._reset_worker()
+        os.register_at_fork(after_in_child=self._reset_worker)
+
+    def _reset_worker(self):
+        # The worker thread does not exist in a forked process, it is started again on demand
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._pending: Dict[str, Future] = {}
+        self._worker = None
+        self._last_request = 0.0
+
+    def _submit(self, addr: str) -> Future:
+        with self._lock:
+            if addr not in self._pending:
+                self._pending[addr] = Future()
+                self._queue.put(addr)
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._work, daemon=True)
+                    self._worker.start()
+            return self._pending[addr]
+
+    def _work(self):
+        while True:
+            addr = self._queue.get()
+            with self._lock:
+                future = self._pending[addr]
+            try:
+                # Another process may have looked up the address in the meantime
+                stored = {} if self.store is None else self.store.load_many([addr])
+                if addr in stored:
+                    coords = stored[addr]
+                else:
+                    time.sleep(max(self._last_request + getattr(self.geocoder, 'min_delay', 0) - time.monotonic(), 0))
+                    try:
+                        coords = self.geocoder(addr)
+                    finally:
+                        self._last_request = time.monotonic()
+                    if self.store is not None:
+                        self.store.store_many({addr: coords})
+                self.addr_to_coords[addr] = coords
+                result, error = coords, None
+            except Exception as e:
+                # Failed requests (e.g. timeouts) are not cached, the address is looked up again on the next access
+                result, error = None, e
+            with self._lock:
+                del self._pending[addr]
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def resolve_many(self, addresses: Iterable[str]) -> Dict[str, Optional[Tuple[float, float]]]:
+        """
+        Get the coordinates of many addresses. Cached, indexed and stored addresses are answered at once, only the
+        missing addresses are looked up.
+
+        :param addresses: The addresses
+        :return:          The coordinates as tuple (lat, lon) or None if the address could not be found of every address
+        """
+        addresses = list(dict.fromkeys(addresses))
+        # Rooms without an address have no coordinates
+        result = {addr: self.addr_to_coords.get(addr) for addr in addresses if not addr or addr in self.addr_to_coords}
+        missing = [addr for addr in addresses if addr not in result]
+        if missing and self.index is not None:
+            indexed = {addr: self.index.lookup(addr) for addr in missing}
+            indexed = {addr: coords for addr, coords in indexed.items() if coords is not None}
+            self.addr_to_coords.update(indexed)
+            result.update(indexed)
+            missing = [addr for addr in missing if addr not in indexed]
+        if missing and self.store is not None:
+            stored = self.store.load_many(missing)
+            self.addr_to_coords.update(stored)
+            result.update(stored)
+            missing = [addr for addr in missing if addr not in stored]
+        if not self.online:
+            result.update({addr: None for addr in missing})
+            return result
+
+        futures = {addr: self._submit(addr) for addr in missing}
+        for addr, future in futures.items():
+            result[addr] = future.result()
+        return result
+
     def get_coords(self, addr: str) -> Union[Tuple[float, float], None]:
         """
         Get the coordinates for the given address
@@ -26,17 +239,9 @@ class GeoManager:
         :param addr: An address as string
         :return:     The coordinates as tuple (lat, lon) or None if the address could not be found
         """
-        # Checks if the address is already in the cache
-        if addr not in self.addr_to_coords:
-            # If not, try to get the coordinates from the geolocator (and cache them)
-            time.sleep(1)
-            location = self.geolocator.geocode(addr)
-            self.addr_to_coords[addr] = location
-        # Return the coordinates from the cache
-        loc = self.addr_to_coords[addr]
-        if loc:
-            return loc.latitude, loc.longitude
-        return None
+        if not addr or addr in self.addr_to_coords:
+            return self.addr_to_coords.get(addr)
+        return self.resolve_many([addr])[addr]
 
     def to_json(self) -> str:
         """
@@ -44,18 +249,18 @@ class GeoManager:
 
         :return: A JSON string representing the cache
         """
-        json_dict = {
-            addr: None if loc is None else [loc.address, loc.latitude, loc.longitude, loc.altitude, loc.raw]
-            for addr, loc in self.addr_to_coords.items()}
-        return json.dumps(json_dict)
+        return json.dumps({addr: None if coords is None else list(coords)
+                           for addr, coords in self.addr_to_coords.items()})
 
     def read_json(self, json_str: str):
         """
-        Read a JSON string into the cache
+        Read a JSON string into the cache (and the store). The former format, which contains the geopy locations, is
+        read as well.
 
         :param json_str: A JSON string representing the cache
         """
-        cached = json.loads(json_str)
-        self.addr_to_coords = {
-            addr: None if loc is None else geopy.location.Location(loc[0], (loc[1], loc[2], loc[3]), loc[4])
-            for addr, loc in cached.items()}
\ No newline at end of file
+        cached = {addr: None if loc is None else (loc[1], loc[2]) if len(loc) == 5 else (loc[0], loc[1])
+                  for addr, loc in json.loads(json_str).items()}
+        self.addr_to_coords.update(cached)
+        if self.store is not None:
+            self.store.store_many(cached)
@@ -0,0 +1,107 @@
+import os
+import threading
+from typing import Any, Callable, List
+
+import dash
+from dash import html, dcc
+from dash.dependencies import Input, Output
+
+
+class LazyData:
+    """
+    The data of a page, which is computed (or loaded from the page cache) on first access
+    """
+    def __init__(self, load: Callable[[], Any], cached: Callable[[], bool] = None):
+        """
+        Initialize the lazy data
+
+        :param load:   A function computing the data
+        :param cached: A function checking whether the data can be loaded from the page cache without computing it
+        """
+        self.load = load
+        self.cached = cached
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        LAZY_DATA.append(self)
+
+    def get(self) -> Any:
+        """
+        Get the data (computes it on first access, concurrent accesses wait for the same computation)
+
+        :return: The data
+        """
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._value = self.load()
+                    self._loaded = True
+        return self._value
+
+    def ready(self) -> bool:
+        """
+        Check whether the data can be accessed without computing it
+
+        :return: True if the data is loaded or cached
+        """
+        return self._loaded or self.cached is not None and self.cached()
+
+
+# All lazy data of the pages
+LAZY_DATA: List[LazyData] = []
+
+
+def _reset_locks():
+    # Background callbacks run in forked processes, which would inherit locks held by the warming thread
+    for d in LAZY_DATA:
+        d._lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_locks)
+
+
+def warm(data: List[LazyData] = None) -> threading.Thread:
+    """
+    Compute the data of the pages in a background thread, so that the first requests do not have to wait for it
+
+    :param data: The data to compute (default: the data of all pages)
+    :return:     The thread
+    """
+    def run():
+        for d in LAZY_DATA if data is None else data:
+            # A failing page (e.g. if the geocoder is not reachable) is built again on access
+            try:
+                d.get()
+            except Exception as e:
+                print(f'Warming failed: {e}')
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def lazy_layout(page_id: str, data: LazyData, content: Callable[[], List[Any]]) -> Callable[[], List[Any]]:
+    """
+    Create the layout of a page whose content depends on lazy data.
+
+    If the data is ready, the content is returned directly. Otherwise, a loading state is shown and the content is
+    built in a background callback (run by the background callback manager of the app).
+
+    :param page_id: A unique name of the page (used for the ids of the components)
+    :param data:    The data of the page
+    :param content: A function creating the content of the page from its data
+    :return:        The layout function of the page
+    """
+    @dash.callback(
+        Output(f'{page_id}-lazy', 'children'),
+        Input(f'{page_id}-lazy', 'id'),
+        background=True
+    )
+    def load_content(_):
+        data.get()
+        return content()
+
+    def layout() -> List[Any]:
+        if data.ready():
+            return content()
+        return [dcc.Loading(html.Div(id=f'{page_id}-lazy', className='lazy-page'), type='circle')]
+    return layout
@@ -0,0 +1,186 @@
+from typing import Any, List, Optional
+
+import sqlalchemy
+from python.faculty import Faculty
+
+# The tables the lecture facts are derived from.
+SOURCE_TABLES = ['orgunits', 'terms', 'Lecture', 'Person', 'Room', 'new_addresses']
+
+# The views on the lecture facts (they are created again whenever the table is rebuilt)
+VIEWS = {
+    # The first names and their genders of the persons of the faculties
+    'genderdata': '''
+    SELECT semester, orgunit, firstname, G.gender, prob, count
+    FROM lecture_facts LF
+        LEFT JOIN genders G ON LF.firstname = G.query
+    WHERE first_term
+        AND firstname NOT NULL
+        AND is_faculty;
+    ''',
+    # The number of uses per semester of the addresses of the rooms of the faculties
+    'faculty_rooms': f'''
+    SELECT semester, orgunit AS 'faculty', new_address AS 'address', COUNT(*) AS 'count'
+    FROM lecture_facts
+    WHERE term NOT NULL
+        AND orgunit IN {tuple(str(f) for f in Faculty)}
+        GROUP BY semester, orgunit, new_address
+        ORDER BY orgunit, semester;
+    ''',
+}
+
+
+def has_table(con: Any, table: str) -> bool:
+    """
+    Checks whether a table exists in the database.
+
+    :param con:   The database connection (SQLAlchemy or DB-API)
+    :param table: The name of the table
+    :return:      True if the table exists
+    """
+    result = con.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = ? COLLATE NOCASE", (table,))
+    return result.fetchone() is not None
+
+
+def source_fingerprint(con: Any, tables: Optional[List[str]] = None) -> str:
+    """
+    Computes a fingerprint of the source tables of the lecture facts.
+    Ingesting a semester appends rows to the source tables, so the fingerprint consists of the largest rowid and the
+    number of rows of every table.
+
+    :param con:    The database connection (SQLAlchemy or DB-API)
+    :param tables: The tables to fingerprint (default: the source tables of the lecture facts)
+    :return:       The fingerprint
+    """
+    parts = []
+    for table in SOURCE_TABLES if tables is None else tables:
+        if has_table(con, table):
+            parts += ['{}:{}:{}'.format(table, *con.execute(f'SELECT MAX(rowid), COUNT(*) FROM [{table}]').fetchone())]
+    return ';'.join(parts)
+
+
+def create_views(con: Any, replace: bool = False) -> None:
+    """
+    Creates the views on the lecture facts table
+
+    :param con:     The database connection (SQLAlchemy or DB-API)
+    :param replace: If true, existing views are dropped and created again
+    """
+    for name, sql in VIEWS.items():
+        if replace:
+            con.execute(f'DROP VIEW IF EXISTS {name}')
+        con.execute(f'CREATE VIEW IF NOT EXISTS {name} AS {sql}')
+
+
+def _is_up_to_date(con: Any, fingerprint: str) -> bool:
+    # Whether the lecture facts were built from the current state of the source tables
+    if not has_table(con, 'lecture_facts_source') or not has_table(con, 'lecture_facts'):
+        return False
+    built = con.execute('SELECT fingerprint FROM lecture_facts_source').fetchone()
+    return built is not None and built[0] == fingerprint
+
+
+def create_lecture_facts(db: sqlalchemy.engine.Engine, replace: bool = False) -> bool:
+    """
+    Materializes the lecture facts table, which the dashboard pages query instead of joining the UnivIS tables.
+
+    Every row of `orgunits` (a lecture or person assigned to an organisation in a semester) is joined with its terms,
+    its lecture or person data and the room and address of each term. Rows of lectures and persons without terms have
+    no term data. Exactly one row per row of `orgunits` has `first_term` set, so counting lectures or persons filters
+    on `first_term` and counting terms filters on `term NOT NULL`.
+
+    The table is rebuilt if it is missing, if the source tables changed since it was built or if replace is set. It is
+    built under a new name and replaces the old table (and its views) in a single `BEGIN IMMEDIATE` transaction, so
+    concurrent readers see either the old or the new table and a failed build leaves the old table in place. The pages
+    only read the table, it is built by the precompute command, at the start of the app or after ingestion.
+
+    :param db:      The database connection
+    :param replace: If true, the table is rebuilt even if it is up-to-date
+    :return:        True if the table got (re)built
+    """
+    if not replace:
+        with db.connect() as con:
+            if _is_up_to_date(con, source_fingerprint(con)):
+                return False
+
+    # pysqlite does not run DDL in transactions, so the transaction is controlled explicitly
+    raw = db.raw_connection()
+    isolation_level = raw.dbapi_connection.isolation_level
+    raw.dbapi_connection.isolation_level = None
+    try:
+        con = raw.dbapi_connection.cursor()
+        con.execute('BEGIN IMMEDIATE')
+        try:
+            # Another process may have built the table while waiting for the lock
+            fingerprint = source_fingerprint(con)
+            if not replace and _is_up_to_date(con, fingerprint):
+                con.execute('ROLLBACK')
+                return False
+
+            # The addresses are optional, they get created by the module "sqladdr"
+            new_address = '(SELECT new_address FROM new_addresses WHERE old_address = R.address)' \
+                if has_table(con, 'new_addresses') else 'NULL'
+
+            con.execute('DROP TABLE IF EXISTS lecture_facts_new')
+            con.execute(f'''
+            CREATE TABLE lecture_facts_new AS
+            SELECT O.semester, O.[@key] AS key, O.orgunit, SUBSTR(O.orgunit, -8, 8) = 'Fakultät' AS is_faculty,
+                T.rowid AS term, ROW_NUMBER() OVER (PARTITION BY O.rowid ORDER BY T.rowid) = 1 AS first_term,
+                L.[@key] IS NOT NULL AS is_lecture, L.type, L.englisch, L.turnout, P.firstname,
+                T.room, R.name AS room_name, R.short AS room_short, R.size, R.reducedsize, R.rolli,
+                R.address, {new_address} AS new_address
+            FROM orgunits O
+                LEFT JOIN terms T ON T.[@key] = O.[@key] AND T.semester = O.semester
+                LEFT JOIN Lecture L ON L.[@key] = O.[@key] AND L.semester = O.semester
+                LEFT JOIN Person P ON P.[@key] = O.[@key] AND P.semester = O.semester
+                LEFT JOIN Room R ON T.room = R.[@key] AND T.semester = R.semester;
+            ''')
+
+            # The views refer to the old table, they are created again after renaming the new one
+            for name in VIEWS:
+                con.execute(f'DROP VIEW IF EXISTS {name}')
+            con.execute('DROP TABLE IF EXISTS lecture_facts')
+            con.execute('ALTER TABLE lecture_facts_new RENAME TO lecture_facts')
+            con.execute('CREATE INDEX lecture_facts_orgunit ON lecture_facts (orgunit, semester)')
+            con.execute('CREATE INDEX lecture_facts_key ON lecture_facts (semester, key)')
+            con.execute('CREATE INDEX lecture_facts_room ON lecture_facts (semester, room)')
+            create_views(con)
+
+            con.execute('DROP TABLE IF EXISTS lecture_facts_source')
+            con.execute('CREATE TABLE lecture_facts_source (fingerprint TEXT)')
+            con.execute('INSERT INTO lecture_facts_source VALUES (?)', (fingerprint,))
+            con.execute('COMMIT')
+        except BaseException:
+            con.execute('ROLLBACK')
+            raise
+    finally:
+        raw.dbapi_connection.isolation_level = isolation_level
+        raw.close()
+    return True
+
+
+def drop_lecture_facts(db: sqlalchemy.engine.Engine) -> None:
+    """
+    Deletes the lecture facts table and its views
+
+    :param db: The database connection
+    """
+    with db.begin() as con:
+        for name in VIEWS:
+            con.execute(f'DROP VIEW IF EXISTS {name}')
+        con.execute('DROP TABLE IF EXISTS lecture_facts')
+        con.execute('DROP TABLE IF EXISTS lecture_facts_source')
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Materializes the lecture facts table after ingesting UnivIS data. '
+                                                 'Run it as "python -m python.lecturefacts" from the repository root.')
+    parser.add_argument('db_path', help='the sqlalchemy URL of the database (e.g. sqlite:////path/to/univis.db)')
+    parser.add_argument('--replace', action='store_true', help='rebuild the table even if it is up-to-date')
+    args = parser.parse_args()
+
+    if create_lecture_facts(sqlalchemy.create_engine(args.db_path), replace=args.replace):
+        print('Built the lecture facts table.')
+    else:
+        print('The lecture facts table is up-to-date.')
@@ -1,5 +1,6 @@
 from typing import Dict, List, Tuple, Union
 import sqlalchemy
+from python.sqlparams import in_values
 
 
 # Dictionaries of the compulsory modules sorted by fpos
@@ -150,38 +151,28 @@ def build_schedule(db: sqlalchemy.engine.Engine,
     # choose the dictionaries containing the fpos
     fpo_modules = WINF if winf_modules else INF
     fpos = list(fpo_modules.keys())
-    con = db.connect()
     schedule = {}
     # go through the semesters
     for semester in modules:
         # get the lectures keys of the all the lectures that could be relevant for us
-        modules_to_check = tuple(modules[semester])
+        modules_to_check = modules[semester]
         # is the semester in winter or summer
         season = str(semester[-1])
         # get the year of the semester
         year = int(semester[:-1])
-        info = []
         # get the title, name, key and type of the lectures in modules_to_check
         # that aren't registered as exercises in univis
-        if len(modules_to_check) > 1:
+        with db.connect() as con:
+            modules_in, params = in_values(con, 'modules', modules_to_check)
             query = "SELECT classification, name, [@key], type " \
                     "FROM Lecture " \
                     "WHERE classification NOT NULL " \
                     "AND Lecture.semester = :sem " \
                     "AND type IN ('V', 'UE', 'S', 'V-UE') " \
                     "AND NOT (type = 'UE' AND [parent-lv] IS NOT NULL) " \
-                    "AND [@key] IN " + str(modules_to_check) + \
+                    "AND [@key] IN " + modules_in + \
                     " GROUP BY name, semester"
-            info = con.execute(query, sem=semester)
-        elif len(modules_to_check) == 1:
-            query = "SELECT classification, name, [@key], type " \
-                    "FROM Lecture " \
-                    "WHERE classification NOT NULL " \
-                    "AND Lecture.semester = :sem  " \
-                    "AND type IN ('V', 'UE', 'S', 'V-UE')  AND NOT (type = 'UE' AND [parent-lv] IS NOT NULL) " \
-                    "AND [@key] = :module " \
-                    "GROUP BY name, semester"
-            info = con.execute(query, sem=semester, module=modules_to_check[0])
+            info = con.execute(query, sem=semester, **params).fetchall()
         # go through the modules
         for title, name, key, lec_type in info:
             title_split = title.split(".")
@@ -305,7 +296,6 @@ def add_exercises_inf(schedule: Dict[str, Dict[str, List[str]]], db: sqlalchemy.
     :param schedule: A dictionary containing the lectures, which exercises we are looking for
     :param db: sql connection
     """
-    con = db.connect()
     # go through the semesters
     for sem in schedule:
         # go through the study programme semesters
@@ -314,28 +304,18 @@ def add_exercises_inf(schedule: Dict[str, Dict[str, List[str]]], db: sqlalchemy.
             if i in ["P", "S"]:
                 continue
             # get the lectures
-            modules = tuple(schedule[sem][i])
+            with db.connect() as con:
+                modules, params = in_values(con, 'modules', schedule[sem][i])
 
-            info = []
-            # get the exercises of the current semesters to our list of lectures
-            if len(modules) > 1:
+                # get the exercises of the current semesters to our list of lectures
                 query = "SELECT name, [@key], [parent-lv] " \
                         "FROM Lecture " \
                         "WHERE [parent-lv] NOT NULL " \
                         "AND Lecture.semester = :sem " \
                         "AND type NOT IN ('S', 'V-UE') " \
-                        "AND [parent-lv] IN " + str(modules) + \
+                        "AND [parent-lv] IN " + modules + \
                         " GROUP BY name, [parent-lv]"
-                info = con.execute(query, sem=sem)
-            elif len(modules) == 1:
-                query = "SELECT name, [@key], [parent-lv] " \
-                        "FROM Lecture " \
-                        "WHERE [parent-lv] NOT NULL " \
-                        "AND Lecture.semester = :sem  " \
-                        "AND type NOT IN ('S', 'V-UE') " \
-                        "AND [parent-lv] = :module " \
-                        "GROUP BY name, [parent-lv]"
-                info = con.execute(query, sem=sem, module=modules[0])
+                info = con.execute(query, sem=sem, **params).fetchall()
             # go through the exercises
             for name, key, parent_lv in info:
                 if parent_lv not in schedule[sem][i]:
@@ -353,7 +333,6 @@ def add_exercises_winf(schedule: Dict[str, Dict[str, List[str]]], db: sqlalchemy
     :param schedule: A dictionary containing the lectures, which exercises we are looking for
     :param db: sql connection
     """
-    con = db.connect()
     # go through the semesters
     for sem in schedule:
         # go through the study programme semesters
@@ -362,30 +341,18 @@ def add_exercises_winf(schedule: Dict[str, Dict[str, List[str]]], db: sqlalchemy
             if i in ["P", "S"]:
                 continue
             # get the lectures
-            modules = tuple(schedule[sem][i])
+            with db.connect() as con:
+                modules, params = in_values(con, 'modules', schedule[sem][i])
 
-            info = []
-            # get the exercises of the current semesters to our list of lectures
-            if len(modules) > 1:
+                # get the exercises of the current semesters to our list of lectures
                 query = "SELECT name, [@key], [parent-lv] " \
                         "FROM Lecture " \
                         "WHERE [parent-lv] NOT NULL " \
                         "AND Lecture.semester = :sem " \
                         "AND type NOT IN ('S', 'V', 'V-UE') " \
-                        "AND [parent-lv] IN " + str(modules) + \
+                        "AND [parent-lv] IN " + modules + \
                         " GROUP BY name, [parent-lv]"
-                info = con.execute(query, sem=sem)
-            elif len(modules) == 1:
-                query = '''
-                SELECT name, [@key], [parent-lv]
-                FROM Lecture
-                WHERE [parent-lv] NOT NULL
-                    AND Lecture.semester = :sem 
-                    AND type NOT IN ('S', 'V', 'V-UE')
-                    AND [parent-lv] = :module
-                GROUP BY name, [parent-lv]
-                '''
-                info = con.execute(query, sem=sem, module=modules[0])
+                info = con.execute(query, sem=sem, **params).fetchall()
             # go through the exercises
             for name, key, parent_lv in info:
                 if parent_lv not in schedule[sem][i]:
@@ -421,7 +388,6 @@ def get_dependencies(db: sqlalchemy.engine.Engine,
     :return:               A dictionary containing the location of lectures ordered by the day and time they take place
                             on for every study programme semester and semester
     """
-    con = db.connect()
     dependencies = {}
     # for each semester we have to find out the dependencies
     for sem in schedule:
@@ -430,39 +396,40 @@ def get_dependencies(db: sqlalchemy.engine.Engine,
             # ignore the entries for projects and seminars
             if study_sem in ["P", "S"]:
                 continue
-            lectures = str(tuple(schedule[sem][study_sem]))
-            query = f'''
-            SELECT
-                COALESCE(C.[@key], T.[@key])             AS '@key',
-                CAST(SUBSTR(repeat, 4, 4) AS INT)        AS weekday,
-                CAST(REPLACE(starttime, ':', '') AS INT) AS starttime,
-                CAST(REPLACE(endtime, ':', '') AS INT)   AS endtime,
-                new_address,
-                type,
-                [parent-lv],
-                L.name                                   AS 'name'
-            FROM terms T
-                LEFT JOIN courses C
-                    ON T.[@key] = C.course AND T.semester = C.semester
-                LEFT JOIN Lecture L
-                    ON (T.[@key] = L.[@key] OR C.course = L.[@key]) AND T.semester = L.semester
-                LEFT JOIN Room R
-                    ON T.room = R.[@key] AND T.semester = R.semester
-                LEFT JOIN new_addresses N 
-                    ON R.address = N.old_address
-            WHERE T.semester = :sem
-                AND T.enddate IS NULL
-                AND starttime IS NOT NULL
-                AND endtime IS NOT NULL
-                AND repeat NOT NULL
-                AND repeat != 'd1'
-                AND (T.[@key] IN {lectures} OR C.[@key] IN {lectures})
+            with db.connect() as con:
+                lectures, params = in_values(con, 'lectures', schedule[sem][study_sem])
+                query = f'''
+                SELECT
+                    COALESCE(C.[@key], T.[@key])             AS '@key',
+                    CAST(SUBSTR(repeat, 4, 4) AS INT)        AS weekday,
+                    CAST(REPLACE(starttime, ':', '') AS INT) AS starttime,
+                    CAST(REPLACE(endtime, ':', '') AS INT)   AS endtime,
+                    new_address,
+                    type,
+                    [parent-lv],
+                    L.name                                   AS 'name'
+                FROM terms T
+                    LEFT JOIN courses C
+                        ON T.[@key] = C.course AND T.semester = C.semester
+                    LEFT JOIN Lecture L
+                        ON (T.[@key] = L.[@key] OR C.course = L.[@key]) AND T.semester = L.semester
+                    LEFT JOIN Room R
+                        ON T.room = R.[@key] AND T.semester = R.semester
+                    LEFT JOIN new_addresses N 
+                        ON R.address = N.old_address
+                WHERE T.semester = :sem
+                    AND T.enddate IS NULL
+                    AND starttime IS NOT NULL
+                    AND endtime IS NOT NULL
+                    AND repeat NOT NULL
+                    AND repeat != 'd1'
+                    AND (T.[@key] IN {lectures} OR C.[@key] IN {lectures})
             
-            GROUP BY COALESCE(C.[@key], T.[@key]), weekday, starttime, endtime, address, type, [parent-lv], L.name
-            ORDER BY weekday, starttime;
-            '''
+                GROUP BY COALESCE(C.[@key], T.[@key]), weekday, starttime, endtime, address, type, [parent-lv], L.name
+                ORDER BY weekday, starttime;
+                '''
 
-            terms = list(con.execute(query, sem=sem))
+                terms = list(con.execute(query, sem=sem, **params))
 
             # Create a virtual start term to compare the first real term with it
             empty = {'weekday': -1, 'endtime': float('inf')}
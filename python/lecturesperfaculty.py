@@ -5,6 +5,7 @@ import re
 import python.parse_addr
 from python.faculty import Faculty
 from python.geomanager import GeoManager
+from python.sqlparams import in_clause, select_in_batches
 
 
 def get_lectures(db: sqlalchemy.engine.Engine,
@@ -24,24 +25,24 @@ def get_lectures(db: sqlalchemy.engine.Engine,
     lectures_faculties = {}
     with db.connect() as con:
         # get the different semesters
-        semesters = con.execute('SELECT `semester` FROM `Lecture` GROUP BY semester;')
-        # look at the lectures of every semester
-        for semester in list(semesters):
-            semester = semester[0]
-            # for each lecture look at the assigned organisations
-            for f in Faculty:
-                fac = str(f)
-                lectures = con.execute("SELECT [@key] "
-                                       "FROM orgunits NATURAL JOIN Lecture L "
-                                       "WHERE semester = :sem "
-                                       "AND `orgunit` = :unit AND (:boo = 1 AND type IN ('V', 'S', 'V-UE') OR :boo = 0)",
-                                       sem=semester, unit=fac, boo=int(filter_practical))
-
-                # for every faculty save the lecture's key in a dictionary
-                if fac not in lectures_faculties:
-                    lectures_faculties[fac] = {}
-                if semester not in lectures_faculties[fac]:
-                    lectures_faculties[fac][semester] = [x[0] for x in lectures]
+        semesters = [x[0] for x in con.execute('SELECT `semester` FROM `Lecture` GROUP BY semester;')]
+        # every faculty gets a (possibly empty) list of lectures for every semester
+        for f in Faculty:
+            lectures_faculties[str(f)] = {semester: [] for semester in semesters}
+
+        # get the lectures of all faculties and semesters at once
+        faculties, params = in_clause('faculty', [str(x) for x in Faculty])
+        lectures = con.execute("SELECT semester, orgunit, key "
+                               "FROM lecture_facts "
+                               "WHERE first_term AND is_lecture "
+                               f"AND orgunit IN {faculties} "
+                               "AND (:boo = 1 AND type IN ('V', 'S', 'V-UE') OR :boo = 0) "
+                               "ORDER BY rowid",
+                               boo=int(filter_practical), **params)
+
+        # for every faculty save the lecture's key in a dictionary
+        for semester, fac, key in lectures:
+            lectures_faculties[fac][semester] += [key]
     # return the dict if sem isn't set or None
     if sem is None:
         return lectures_faculties
@@ -64,12 +65,11 @@ def get_rooms_per_faculty(db: sqlalchemy.engine.Engine):
     rooms_faculties = {}
     with db.connect() as con:
         # get the rooms for every faculty
-        query = "SELECT TeOr.semester, orgunit, room, COUNT(*) " \
-               "FROM (terms NATURAL JOIN orgunits) TeOr " \
-               "LEFT JOIN Lecture ON TeOR.[@key] = Lecture.[@key] AND TeOr.semester = Lecture.semester " \
+        query = "SELECT semester, orgunit, room, COUNT(*) " \
+               "FROM lecture_facts " \
                "WHERE room NOT NULL " \
-               "AND SUBSTR(orgunit, -8, 8) = 'Fakultät' " \
-               "GROUP BY TeOr.semester, orgunit, room"
+               "AND is_faculty " \
+               "GROUP BY semester, orgunit, room"
         info = con.execute(query)
         # go through the rooms
         for semester, fac, room, number in info:
@@ -94,32 +94,18 @@ def get_rooms_for_faculty(lectures: Dict[str, Dict[str, List[str]]], db: sqlalch
     :return:         list of room keys
     """
     rooms = []
-    con = db.connect()
-
-    # only look at the lectures of the semesters we need
-    for sem in lectures:
-        rms = []
-        # get the rooms to our lectures of the current semesters
-        if len(lectures[sem]) > 1:
-
-            modules = tuple(lectures[sem])
-            query = "SELECT room " \
-                    "FROM terms " \
-                    "WHERE room NOT NULL " \
-                    "AND semester = :s " \
-                    "AND [@key] IN " + str(modules)
-
-            rms = con.execute(query, s=sem)
-
-        elif len(lectures[sem]) == 1:
+    with db.connect() as con:
+        # only look at the lectures of the semesters we need
+        for sem in lectures:
+            # get the rooms to our lectures of the current semesters
             query = "SELECT room " \
                     "FROM terms " \
                     "WHERE room NOT NULL " \
                     "AND semester = :s " \
-                    "AND [@key] = :lecture_key"
-            rms = con.execute(query, s=sem, lecture_key=lectures[sem][0])
-        # save the rooms in a list
-        rooms += [x[0] for x in rms]
+                    "AND [@key] IN {modules}"
+            rms = select_in_batches(con, query, 'modules', lectures[sem], s=sem)
+            # save the rooms in a list
+            rooms += [x[0] for x in rms]
     return rooms
 
 
@@ -130,15 +116,13 @@ def get_addr_of_rooms(rooms: List[str], db: sqlalchemy.engine.Engine) -> List[st
     :param db: sql database
     :return: list containing the addresses
     """
-    con = db.connect()
-
-    rms = tuple(rooms)
-    # get the address
+    # get the address (the rows are grouped by room, so the rooms can be looked up in batches)
     query = "SELECT address " \
             "FROM Room " \
-            "WHERE address NOT NULL AND [@key] IN " + str(rms) + " GROUP BY [@key]"
+            "WHERE address NOT NULL AND [@key] IN {rms} GROUP BY [@key]"
 
-    addr = con.execute(query)
+    with db.connect() as con:
+        addr = select_in_batches(con, query, 'rms', rooms)
     # return the addresses in a list
     return [x[0] for x in addr]
 
@@ -153,18 +137,15 @@ def addr_per_faculty_now(db, geoman: GeoManager):
     """
     # dict to save the addresses and coordinates
     addr_faculties = {}
-    con = db.connect()
     # get the addresses of the rooms used by the faculties
-    query = "SELECT TeOr.semester, orgunit, room, COUNT(*), new_address, Room.short " \
-            "FROM (terms NATURAL JOIN orgunits) TeOr " \
-            "LEFT JOIN Lecture ON TeOR.[@key] = Lecture.[@key] AND TeOr.semester = Lecture.semester " \
-            "LEFT JOIN Room ON TeOr.room = Room.[@key] AND TeOr.semester = Room.semester " \
-            "LEFT JOIN new_addresses ON Room.address = old_address "\
+    query = "SELECT semester, orgunit, room, COUNT(*), new_address, room_short " \
+            "FROM lecture_facts " \
             "WHERE room NOT NULL " \
-            "AND SUBSTR(orgunit, -8, 8) = 'Fakultät' " \
-            "GROUP BY TeOr.semester, orgunit, room " \
-            "ORDER BY TeOr.semester"
-    info = con.execute(query)
+            "AND is_faculty " \
+            "GROUP BY semester, orgunit, room " \
+            "ORDER BY semester"
+    with db.connect() as con:
+        info = con.execute(query).fetchall()
     # go through the rooms
     for semester, fac, room, number, address, short_name in info:
 
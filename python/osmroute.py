@@ -1,35 +1,353 @@
+import heapq
+import json
+import math
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
 from pyroutelib3 import Router
+from pyroutelib3.osmparsing import getOsmTile, getTileBoundary
+from pyroutelib3.util import TILES_ZOOM, distHaversine
 
+# The bounding box (min. latitude, min. longitude, max. latitude, max. longitude) of the buildings of the university
+KIEL_CAMPUS_BBOX = (54.31, 10.09, 54.36, 10.17)
 
-def pyroutedistance(lon0, lat0, lon3, lat3):
+# A pair of points (lat, lon) to route between
+Pair = Tuple[Tuple[float, float], Tuple[float, float]]
+# The transport mode and the coordinates of both points of a route
+RouteKey = Tuple[str, float, float, float, float]
+
+
+def route_length(route: List[Tuple[float, float]]) -> float:
     """
-    gets the route between to points
-    :param lon0: longitude of the first point
-    :param lat0: latitude of the first point
-    :param lon3: longitude of the second point
-    :param lat3: latitude of the second point
-    :return: route between two points
+    Compute the length of a route
+
+    :param route: The points (lat, lon) of the route
+    :return:      The length in meters
+    """
+    return sum(distHaversine(a, b) for a, b in zip(route[:-1], route[1:])) * 1000
+
+
+def shortest_paths(router: Router, source: int, targets: Set[int]) -> Dict[int, List[int]]:
+    """
+    Find the shortest paths from a node to many nodes with a single run of Dijkstra's algorithm, which stops as soon
+    as all targets are reached. Only the loaded graph of the router is searched (no tiles are downloaded) and turn
+    restrictions are ignored.
+
+    :param router:  The router
+    :param source:  The node to start from
+    :param targets: The nodes to find the paths to
+    :return:        The nodes of the path to every reachable target
+    """
+    costs = {source: 0.0}
+    previous = {}
+    settled = set()
+    remaining = set(targets)
+    queue = [(0.0, source)]
+    while queue and remaining:
+        cost, node = heapq.heappop(queue)
+        if node in settled:
+            continue
+        settled.add(node)
+        remaining.discard(node)
+        for to_node, edge_cost in router.routing.get(node, {}).items():
+            # Ignore non-traversable edges
+            if edge_cost <= 0 or cost + edge_cost >= costs.get(to_node, math.inf):
+                continue
+            costs[to_node] = cost + edge_cost
+            previous[to_node] = node
+            heapq.heappush(queue, (cost + edge_cost, to_node))
+
+    paths = {}
+    for target in targets & settled:
+        path = [target]
+        while path[-1] != source:
+            path.append(previous[path[-1]])
+        paths[target] = path[::-1]
+    return paths
+
+
+class RouteStore:
+    """
+    Stores routes in a SQLite file, which is shared by all processes. Pairs of points without a route are stored
+    without a route, so that they are not routed again.
+    """
+    def __init__(self, path: str):
+        """
+        Initialize the store (the file is created on first access)
+
+        :param path: The path of the SQLite file
+        """
+        self.path = path
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        # A forked process must not use the connection (or the lock) of its parent
+        self._con = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._con is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._con = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            with self._con:
+                self._con.execute('CREATE TABLE IF NOT EXISTS routes ('
+                                  'mode TEXT NOT NULL, '
+                                  'lat0 REAL NOT NULL, '
+                                  'lon0 REAL NOT NULL, '
+                                  'lat1 REAL NOT NULL, '
+                                  'lon1 REAL NOT NULL, '
+                                  'distance REAL, '
+                                  'route TEXT, '
+                                  'updated REAL NOT NULL, '
+                                  'PRIMARY KEY (mode, lat0, lon0, lat1, lon1))')
+        return self._con
+
+    def load_all(self, mode: str) -> Dict[RouteKey, Optional[List[Tuple[float, float]]]]:
+        """
+        Get all stored routes of a transport mode
+
+        :param mode: The transport mode
+        :return:     The route (or None if there is no route) of every stored pair of points
+        """
+        with self._lock:
+            rows = self._connection().execute('SELECT lat0, lon0, lat1, lon1, route FROM routes WHERE mode = ?',
+                                              (mode,)).fetchall()
+        return {(mode, lat0, lon0, lat1, lon1): None if route is None else [tuple(p) for p in json.loads(route)]
+                for lat0, lon0, lat1, lon1, route in rows}
+
+    def store_many(self, routes: Dict[RouteKey, Optional[List[Tuple[float, float]]]]):
+        """
+        Store routes in a single transaction
+
+        :param routes: The route (or None if there is no route) of every pair of points
+        """
+        now = time.time()
+        rows = [(*key, None, None, now) if route is None else (*key, route_length(route), json.dumps(route), now)
+                for key, route in routes.items()]
+        with self._lock:
+            con = self._connection()
+            with con:
+                con.executemany('INSERT OR REPLACE INTO routes VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+
+class RoutingService:
     """
-    # Initialise router and set the transport mode for pedestrians
-    router = Router("foot")
-    # Find start and end nodes
-    start = router.findNode(lat0, lon0)
-    end = router.findNode(lat3, lon3)
+    Computes routes with one pyroutelib3 router per transport mode, which is reused for all routes, so that the graph
+    of the OSM data is only downloaded (or read from the local file) and parsed once. The routes are cached in memory
+    and in the (optional) route store, which is loaded into memory on first use, so that precomputed routes (see
+    `build_matrix`) are looked up in constant time.
+    """
+    def __init__(self,
+                 localfile: Optional[str] = None,
+                 bbox: Optional[Tuple[float, float, float, float]] = None,
+                 store: Optional[RouteStore] = None,
+                 processes: int = 1
+                 ):
+        """
+        Initialize the service (the routers are created on first use)
+
+        :param localfile: The path of a local OSM file (XML or PBF, e.g. an extract of the campus), otherwise the tiles
+                          around the routes are downloaded from the OSM API
+        :param bbox:      The bounding box (min. latitude, min. longitude, max. latitude, max. longitude) whose tiles
+                          are downloaded when a router is created (ignored with a local file)
+        :param store:     The route store shared by all processes (default: only cache the routes in memory)
+        :param processes: The number of processes computing the routes of `route_many` in parallel
+        """
+        self.localfile = localfile
+        self.bbox = bbox
+        self.store = store
+        self.processes = processes
+        self._routers: Dict[str, Router] = {}
+        self._nodes: Dict[Tuple[str, float, float], int] = {}
+        self._loaded: Set[str] = set()
+        self.routes: Dict[RouteKey, Optional[List[Tuple[float, float]]]] = {}
+        self._reset_lock()
+        os.register_at_fork(after_in_child=self._reset_lock)
+
+    def _reset_lock(self):
+        # A forked process must not inherit a lock held by another thread of its parent
+        self._lock = threading.RLock()
+
+    def router(self, mode: str = 'foot') -> Router:
+        """
+        Get the router of a transport mode, which is created and preloaded on first use
+
+        :param mode: The transport mode of pyroutelib3, e.g. "foot" or "cycle"
+        :return:     The router
+        """
+        with self._lock:
+            if mode not in self._routers:
+                if self.localfile is not None:
+                    extension = os.path.splitext(self.localfile)[1].lstrip('.')
+                    router = Router(mode, self.localfile, extension if extension in ['pbf', 'gz', 'bz2'] else 'xml')
+                else:
+                    router = Router(mode)
+                    if self.bbox is not None:
+                        self._preload(router, self.bbox)
+                self._routers[mode] = router
+            return self._routers[mode]
+
+    @staticmethod
+    def _preload(router: Router, bbox: Tuple[float, float, float, float]):
+        # Download (or read from the tile cache of pyroutelib3) every tile in the bounding box
+        min_x, max_y = getOsmTile(bbox[0], bbox[1], TILES_ZOOM)
+        max_x, min_y = getOsmTile(bbox[2], bbox[3], TILES_ZOOM)
+        for x in range(min_x, max_x + 1):
+            for y in range(min_y, max_y + 1):
+                left, bottom, right, top = getTileBoundary(x, y, TILES_ZOOM)
+                router.getArea((bottom + top) / 2, (left + right) / 2)
+
+    def _find_node(self, router: Router, mode: str, lat: float, lon: float) -> int:
+        # The nearest node is searched in all nodes of the graph, so the nodes of the points are cached
+        key = (mode, lat, lon)
+        if key not in self._nodes:
+            self._nodes[key] = router.findNode(lat, lon)
+        return self._nodes[key]
+
+    def _compute(self, key: RouteKey) -> Optional[List[Tuple[float, float]]]:
+        # Route between two points with A* (without the caches of the routes)
+        mode, lat0, lon0, lat1, lon1 = key
+        router = self.router(mode)
+        status, route = router.doRoute(self._find_node(router, mode, lat0, lon0),
+                                       self._find_node(router, mode, lat1, lon1))
+        if status != 'success':
+            return None
+        return [(lat0, lon0)] + [router.nodeLatLon(node) for node in route] + [(lat1, lon1)]
+
+    def _load(self, mode: str):
+        # Load the stored routes of a transport mode once
+        if mode not in self._loaded:
+            if self.store is not None:
+                self.routes.update(self.store.load_all(mode))
+            self._loaded.add(mode)
+
+    def route(self, lat0: float, lon0: float, lat1: float, lon1: float, mode: str = 'foot'
+              ) -> Optional[List[Tuple[float, float]]]:
+        """
+        Get the route between two points
+
+        :param lat0: The latitude of the first point
+        :param lon0: The longitude of the first point
+        :param lat1: The latitude of the second point
+        :param lon1: The longitude of the second point
+        :param mode: The transport mode
+        :return:     The points (lat, lon) of the route from the first to the second point or None if there is no route
+        """
+        key = (mode, lat0, lon0, lat1, lon1)
+        # The routers are not thread-safe (they load tiles while routing)
+        with self._lock:
+            self._load(mode)
+            if key in self.routes:
+                return self.routes[key]
+            self.routes[key] = self._compute(key)
+            if self.store is not None:
+                self.store.store_many({key: self.routes[key]})
+            return self.routes[key]
+
+    def distance(self, lat0: float, lon0: float, lat1: float, lon1: float, mode: str = 'foot') -> Optional[float]:
+        """
+        Get the length of the route between two points
+
+        :param lat0: The latitude of the first point
+        :param lon0: The longitude of the first point
+        :param lat1: The latitude of the second point
+        :param lon1: The longitude of the second point
+        :param mode: The transport mode
+        :return:     The length of the route in meters or None if there is no route
+        """
+        route = self.route(lat0, lon0, lat1, lon1, mode)
+        return None if route is None else route_length(route)
 
-    # Find the route - a list of OSM nodes
-    status, route = router.doRoute(start, end)
+    def route_many(self, pairs: Iterable[Pair], mode: str = 'foot') -> Dict[Pair, Optional[List[Tuple[float, float]]]]:
+        """
+        Get the routes between many pairs of points, every distinct pair is only routed once. The pairs that are
+        neither cached nor stored are routed by `processes` forked processes, which share the graph of the router.
 
-    if status == "success":
-        start_point = (lat0, lon0)
-        # Get actual route coordinates
-        route_lat_lons = list(map(router.nodeLatLon, route))
-        end_point = (lat3, lon3)
-        res = [start_point] + route_lat_lons + [end_point]
-        return res
+        :param pairs: The pairs of points ((lat, lon), (lat, lon))
+        :param mode:  The transport mode
+        :return:      The route (see `route`) of every pair
+        """
+        keys = {(start, end): (mode, *start, *end) for start, end in dict.fromkeys(pairs)}
+        with self._lock:
+            self._load(mode)
+            missing = [key for key in keys.values() if key not in self.routes]
+            if len(missing) > 1 and self.processes > 1:
+                # Load the graph and find the nodes of the points before forking, so that every process inherits them
+                router = self.router(mode)
+                for _, lat0, lon0, lat1, lon1 in missing:
+                    self._find_node(router, mode, lat0, lon0)
+                    self._find_node(router, mode, lat1, lon1)
+                global _pool_service
+                _pool_service = self
+                with ProcessPoolExecutor(max_workers=self.processes,
+                                         mp_context=multiprocessing.get_context('fork')) as executor:
+                    chunksize = max(1, len(missing) // (self.processes * 4))
+                    routes = dict(zip(missing, executor.map(_compute_in_pool, missing, chunksize=chunksize)))
+                self.routes.update(routes)
+                if self.store is not None:
+                    self.store.store_many(routes)
+        return {pair: self.route(*key[1:], mode) for pair, key in keys.items()}
 
-    else:
-        return None
+    def build_matrix(self, points: Iterable[Tuple[float, float]], mode: str = 'foot') -> int:
+        """
+        Compute the routes between all pairs of points that are neither cached nor stored, with a single search
+        through the loaded graph per starting point (see `shortest_paths`), and store them. Targets the search does
+        not reach (e.g. outside the preloaded bounding box) are routed with A* like `route`, which loads the missing
+        tiles. Like in `route` and `route_many`, pairs without a route are stored as None, so that they are not routed
+        again.
 
+        :param points: The points (lat, lon), e.g. of all geocoded addresses
+        :param mode:   The transport mode
+        :return:       The number of computed routes
+        """
+        points = list(dict.fromkeys(points))
+        computed = 0
+        with self._lock:
+            self._load(mode)
+            for start in points:
+                ends = [end for end in points if end != start and (mode, *start, *end) not in self.routes]
+                if not ends:
+                    continue
+                router = self.router(mode)
+                nodes = {point: self._find_node(router, mode, *point) for point in [start] + ends}
+                paths = shortest_paths(router, nodes[start], {nodes[end] for end in ends})
+                routes = {}
+                for end in ends:
+                    path = paths.get(nodes[end])
+                    routes[(mode, *start, *end)] = self._compute((mode, *start, *end)) if path is None else \
+                        [start] + [router.nodeLatLon(node) for node in path] + [end]
+                self.routes.update(routes)
+                if self.store is not None:
+                    self.store.store_many(routes)
+                computed += len(routes)
+        return computed
 
 
+# The service whose routes are computed by the processes of `route_many` (inherited when forking)
+_pool_service: Optional[RoutingService] = None
 
+
+def _compute_in_pool(key: RouteKey) -> Optional[List[Tuple[float, float]]]:
+    return _pool_service._compute(key)
+
+
+# The service of `pyroutedistance`
+_service = RoutingService()
+
+
+def pyroutedistance(lon0, lat0, lon3, lat3):
+    """
+    gets the route between to points
+    :param lon0: longitude of the first point
+    :param lat0: latitude of the first point
+    :param lon3: longitude of the second point
+    :param lat3: latitude of the second point
+    :return: route between two points
+    """
+    return _service.route(lat0, lon0, lat3, lon3)
@@ -0,0 +1,191 @@
+import functools
+import hashlib
+import json
+import os
+import pickle
+import time
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+import sqlalchemy
+from python.database import track_page
+from python.lecturefacts import source_fingerprint
+
+# Parquet needs pyarrow, without it the results are pickled
+try:
+    import pyarrow  # noqa: F401
+    PARQUET = True
+except ImportError:
+    PARQUET = False
+
+# Tables that are derived from the other tables (and get rebuilt while computing page data)
+DERIVED_TABLES = ['lecture_facts', 'lecture_facts_source']
+
+# Returned by `PageCache.load` if no up-to-date result is cached (None is a valid result)
+MISSING = object()
+
+
+def database_fingerprint(db: sqlalchemy.engine.Engine) -> str:
+    """
+    Computes a fingerprint of all tables of the database except the derived tables (the largest rowid and the number
+    of rows of every table).
+
+    :param db: The database connection
+    :return:   The fingerprint
+    """
+    with db.connect() as con:
+        tables = [row[0] for row in con.execute("SELECT name FROM sqlite_master WHERE type = 'table' "
+                                                "AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+        return source_fingerprint(con, [table for table in tables if table not in DERIVED_TABLES])
+
+
+class PageCache:
+    """
+    A cache for the data of the dashboard pages.
+
+    Results are keyed by the function, its arguments and a version and are stored together with the fingerprint of the
+    database they were computed from. If the database changed since, the result gets recomputed.
+    Dataframes (or tuples of dataframes) are stored as Parquet files, other results are pickled.
+    """
+    def __init__(self, path: str, db: sqlalchemy.engine.Engine, ttl: float = 60):
+        """
+        Initialize the page cache
+
+        :param path: The directory to store the results in
+        :param db:   The database the results are computed from
+        :param ttl:  The number of seconds the fingerprint of the database is reused before it gets recomputed
+        """
+        self.path = path
+        self.db = db
+        self.ttl = ttl
+        self._fingerprint = None
+        self._fingerprint_time = 0.0
+
+    def fingerprint(self) -> str:
+        """
+        Get the fingerprint of the database (recomputed at most every ttl seconds)
+
+        :return: The fingerprint
+        """
+        if self._fingerprint is None or time.monotonic() - self._fingerprint_time > self.ttl:
+            self._fingerprint = database_fingerprint(self.db)
+            self._fingerprint_time = time.monotonic()
+        return self._fingerprint
+
+    def refresh(self):
+        """
+        Forget the fingerprint of the database, so that the next lookup recomputes it
+        """
+        self._fingerprint = None
+
+    @staticmethod
+    def key(name: str, args: tuple, kwargs: Dict[str, Any], version: int) -> str:
+        """
+        Get the key of a function call
+
+        :param name:    The qualified name of the function
+        :param args:    The positional arguments
+        :param kwargs:  The keyword arguments
+        :param version: The version of the function
+        :return:        The key
+        """
+        call = json.dumps([list(args), sorted(kwargs.items()), version], default=repr)
+        return hashlib.sha1(call.encode()).hexdigest()[:16]
+
+    def _directory(self, name: str, key: str) -> str:
+        return os.path.join(self.path, name, key)
+
+    def load(self, name: str, key: str) -> Any:
+        """
+        Load a result from the cache
+
+        :param name: The qualified name of the function
+        :param key:  The key of the function call
+        :return:     The result or `MISSING` if it is missing or was computed from another state of the database
+        """
+        directory = self._directory(name, key)
+        try:
+            with open(os.path.join(directory, 'meta.json'), 'r') as f:
+                meta = json.load(f)
+            if meta['fingerprint'] != self.fingerprint():
+                return MISSING
+            if meta['format'] == 'pickle':
+                with open(os.path.join(directory, 'result.pickle'), 'rb') as f:
+                    return pickle.load(f)
+            frames = [pd.read_parquet(os.path.join(directory, f'{i}.parquet')) for i in range(meta['frames'])]
+        except (FileNotFoundError, KeyError, ValueError, ImportError):
+            return MISSING
+        return frames[0] if meta['format'] == 'frame' else tuple(frames)
+
+    def store(self, name: str, key: str, result: Any, fingerprint: Optional[str] = None):
+        """
+        Store a result in the cache
+
+        :param name:        The qualified name of the function
+        :param key:         The key of the function call
+        :param result:      The result
+        :param fingerprint: The fingerprint of the database the result was computed from (default: the current one)
+        """
+        directory = self._directory(name, key)
+        os.makedirs(directory, exist_ok=True)
+
+        meta = None
+        frames = [result] if isinstance(result, pd.DataFrame) else list(result) if isinstance(result, tuple) else []
+        # Parquet needs string column names, other names (e.g. numbers or tuples) are kept by pickling the result
+        if PARQUET and frames and all(isinstance(frame, pd.DataFrame) and all(isinstance(c, str) for c in frame.columns)
+                                      for frame in frames):
+            try:
+                for i, frame in enumerate(frames):
+                    frame.to_parquet(os.path.join(directory, f'{i}.parquet.tmp'))
+                    os.replace(os.path.join(directory, f'{i}.parquet.tmp'), os.path.join(directory, f'{i}.parquet'))
+                meta = {'format': 'frame' if isinstance(result, pd.DataFrame) else 'frames', 'frames': len(frames)}
+            except (pyarrow.ArrowException, TypeError, ValueError):
+                # Columns with mixed objects (e.g. lists of waypoints) cannot be stored as Parquet
+                pass
+        if meta is None:
+            meta = {'format': 'pickle'}
+            with open(os.path.join(directory, 'result.pickle.tmp'), 'wb') as f:
+                pickle.dump(result, f)
+            os.replace(os.path.join(directory, 'result.pickle.tmp'), os.path.join(directory, 'result.pickle'))
+
+        # The metadata is written last, so that readers never see a partially written result
+        meta['fingerprint'] = self.fingerprint() if fingerprint is None else fingerprint
+        with open(os.path.join(directory, 'meta.json.tmp'), 'w') as f:
+            json.dump(meta, f)
+        os.replace(os.path.join(directory, 'meta.json.tmp'), os.path.join(directory, 'meta.json'))
+
+    def memoize(self, version: int = 1) -> Callable[[Callable], Callable]:
+        """
+        Decorate a function, so that its results are cached
+
+        The decorated function has the attribute `recompute`, which computes and stores the result even if it is
+        cached, and the attribute `is_cached`, which checks whether an up-to-date result is cached.
+
+        :param version: The version of the function (increase it if the results of the function change)
+        :return:        The decorator
+        """
+        def decorator(func: Callable) -> Callable:
+            name = f'{func.__module__}.{func.__qualname__}'
+
+            @functools.wraps(func)
+            def recompute(*args: Any, **kwargs: Any) -> Any:
+                fingerprint = self.fingerprint()
+                with track_page(name):
+                    result = func(*args, **kwargs)
+                self.store(name, PageCache.key(name, args, kwargs, version), result, fingerprint)
+                return result
+
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                result = self.load(name, PageCache.key(name, args, kwargs, version))
+                if result is MISSING:
+                    result = recompute(*args, **kwargs)
+                return result
+
+            def is_cached(*args: Any, **kwargs: Any) -> bool:
+                return self.load(name, PageCache.key(name, args, kwargs, version)) is not MISSING
+
+            wrapper.recompute = recompute
+            wrapper.is_cached = is_cached
+            return wrapper
+        return decorator
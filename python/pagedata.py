@@ -0,0 +1,227 @@
+import os
+from distutils.dir_util import copy_tree
+from typing import List, Tuple
+
+import pandas as pd
+from config import DB, GM, ROUTES, CACHE_PATH, PAGE_CACHE, PROFILER
+from python import bestProf as bp, capacity, english, genderdata, rolli, workload
+from python import facultymap as fm, schedulemap as sm, lecturesperfaculty as lpf, lectureinf as li, geo
+from python.faculty import Faculty
+from python.lecturefacts import has_table
+
+# The directory the web server serves the generated maps from
+ASSETS_MAPS_PATH = '/var/www/datascienceproject/assets/maps/'
+
+
+def import_geocodes():
+    """
+    Import the coordinates of the former caches of the pages (geomanager.json) into the geocode store
+    """
+    for name in ['map', 'schedulemap']:
+        if os.path.exists(CACHE_PATH + name + '/geomanager.json'):
+            with open(CACHE_PATH + name + '/geomanager.json', 'r') as f:
+                GM.read_json(f.read())
+
+
+@PAGE_CACHE.memoize()
+@PROFILER.profile
+def capacity_data() -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    The utilization of large, medium and small rooms and the mean utilization per room size
+    """
+    l, m, s, avl, avm, avs = capacity.capacity(DB)
+    return capacity.get_dataframe(l), capacity.get_dataframe(m), capacity.get_dataframe(s), \
+        capacity.get_dataframe_for_mean(avl, avm, avs)
+
+
+@PAGE_CACHE.memoize()
+@PROFILER.profile
+def capacity_corona_data() -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    The utilization of large, medium and small rooms during the corona semesters
+    """
+    cl, cm, cs = capacity.capacity_corona(DB)
+    return capacity.get_dataframe(cl), capacity.get_dataframe(cm), capacity.get_dataframe(cs)
+
+
+@PAGE_CACHE.memoize()
+@PROFILER.profile
+def english_data() -> pd.DataFrame:
+    """
+    The number of english lectures per faculty and semester
+    """
+    df_tmp = english.englishs(DB)
+    df = english.add_missing_semester(df_tmp)
+    return df.reset_index()
+
+
+@PAGE_CACHE.memoize()
+@PROFILER.profile
+def workload_data() -> pd.DataFrame:
+    """
+    The average number of lectures per lecturer per faculty and semester
+    """
+    return workload.workloads(DB)
+
+
+@PAGE_CACHE.memoize()
+@PROFILER.profile
+def rolli_data() -> pd.DataFrame:
+    """
+    The share of wheelchair accessible rooms per faculty and semester
+    """
+    df = pd.DataFrame().from_dict(rolli.rollis(DB))
+    df = df.reset_index(level=0)
+    df = df.applymap(lambda x: x[2] if type(x) is tuple and len(x) >= 3 else x)
+    df = pd.melt(df, id_vars=['index'])
+    return df.rename(columns={'index': 'Fakultät', 'variable': 'Semester', 'value': 'Prozentualer Anteil'})
+
+
+@PAGE_CACHE.memoize()
+@PROFILER.profile
+def gender_counts() -> pd.DataFrame:
+    """
+    The number of lecturers per faculty, semester, gender and probability of the gender (see `get_gender_cube`)
+    """
+    return genderdata.get_gender_counts(DB, 0)
+
+
+@PAGE_CACHE.memoize()
+@PROFILER.profile
+def bestprof_data() -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    The lectures, modules, ECTS, organisations and times of the Best Prof winners
+    """
+    df_lecture = bp.create_lecture_df(DB)
+    df_all_moduls = bp.create_df_all_moduls(DB)
+    df_ects = bp.create_ects_df(df_lecture, DB)
+    df_orgname = bp.create_orgname(df_lecture, DB)
+    df_modul_time = bp.create_modul_time(df_lecture, DB)
+
+    return df_lecture.reset_index(), df_all_moduls.reset_index(), df_ects.reset_index(), df_orgname.reset_index(), \
+        df_modul_time.reset_index()
+
+
+@PAGE_CACHE.memoize()
+@PROFILER.profile
+def geocode_addresses() -> List[str]:
+    """
+    Geocode all addresses of rooms (so that the maps can be created without waiting for the geocoder)
+
+    :return: The geocoded addresses
+    """
+    with DB.connect() as con:
+        if not has_table(con, 'new_addresses'):
+            return []
+        addresses = [row[0] for row in con.execute('SELECT DISTINCT new_address FROM new_addresses '
+                                                   'WHERE new_address IS NOT NULL ORDER BY new_address')]
+    import_geocodes()
+    GM.resolve_many(addresses)
+    return addresses
+
+
+@PAGE_CACHE.memoize()
+@PROFILER.profile
+def route_matrix() -> int:
+    """
+    Compute the walking routes between all geocoded addresses of rooms (so that the schedule maps look them up instead
+    of routing)
+
+    :return: The number of addresses
+    """
+    coords = [c for c in GM.resolve_many(geocode_addresses()).values() if c is not None]
+    ROUTES.build_matrix(coords)
+    return len(coords)
+
+
+@PAGE_CACHE.memoize()
+@PROFILER.profile
+def room_maps() -> List[str]:
+    """
+    Create the maps of the room distribution (requires geocoding the addresses)
+
+    :return: The file names of the maps
+    """
+    os.makedirs(CACHE_PATH + 'map/maps/', exist_ok=True)
+    maps = {'map.html': fm.create_map(DB, GM)}
+    for fac, m in fm.create_heatmap(DB, GM).items():
+        maps[f'heatmap_{fac}.html'] = m
+    for file, m in maps.items():
+        m.save(CACHE_PATH + 'map/maps/' + file)
+    return list(maps)
+
+
+@PAGE_CACHE.memoize()
+@PROFILER.profile
+def schedule_routes() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Compute the routes of the students of computer science and business informatics (requires geocoding and routing)
+
+    :return: The routes of both study programmes
+    """
+    modules = lpf.get_lectures(DB)
+
+    mods_techn = modules[str(Faculty.TECHN)]
+    mods_mathe = modules[str(Faculty.MATHE)]
+    mods_wirtsc = modules[str(Faculty.WIRTSC)]
+    mods_rechts = modules[str(Faculty.RECHTS)]
+
+    mods_inf = {}
+    mods_winf = {}
+    for sem in mods_techn:
+        mods_inf[sem] = mods_techn[sem] + mods_mathe[sem]
+        mods_winf[sem] = mods_techn[sem] + mods_mathe[sem] + mods_wirtsc[sem] + mods_rechts[sem]
+
+    sched_inf = li.get_dependencies(DB, li.add_exercises_inf(li.build_schedule(DB, mods_inf), DB))
+    sched_winf = li.get_dependencies(DB, li.add_exercises_winf(li.build_schedule(DB, mods_winf, True), DB))
+
+    route_inf = geo.get_dataframe(geo.routes_for_df(geo.inf_coords(sched_inf, GM), ROUTES))
+    route_winf = geo.get_dataframe(geo.routes_for_df(geo.inf_coords(sched_winf, GM), ROUTES))
+    return route_inf, route_winf
+
+
+@PAGE_CACHE.memoize()
+@PROFILER.profile
+def schedule_maps() -> List[str]:
+    """
+    Create the maps of the routes per semester and study semester
+
+    :return: The semesters with maps
+    """
+    os.makedirs(CACHE_PATH + 'schedulemap/maps/', exist_ok=True)
+    route_inf, route_winf = schedule_routes()
+    for sem in route_inf['Semester'].unique():
+        sm.inf_map(route_inf, sem).save(CACHE_PATH + 'schedulemap/maps/inf_' + sem + '_0.html')
+        sm.inf_map(route_winf, sem).save(CACHE_PATH + 'schedulemap/maps/winf_' + sem + '_0.html')
+        for i in range(1, 3 + 1):
+            k = str(i * 2) if sem.endswith('s') else str(i * 2 - 1)
+            sm.inf_map(route_inf, sem, k).save(CACHE_PATH + 'schedulemap/maps/inf_' + sem + '_' + k + '.html')
+            sm.inf_map(route_winf, sem, k).save(CACHE_PATH + 'schedulemap/maps/winf_' + sem + '_' + k + '.html')
+    sm.inf_map(pd.DataFrame(), '').save(CACHE_PATH + 'schedulemap/maps/empty.html')
+    return list(route_inf['Semester'].unique())
+
+
+def publish_room_maps() -> List[str]:
+    """
+    Create the maps of the room distribution if they are missing or outdated and copy them to the web server
+
+    :return: The file names of the maps
+    """
+    files = room_maps()
+    if not all(os.path.exists(CACHE_PATH + 'map/maps/' + file) for file in files):
+        files = room_maps.recompute()
+    copy_tree(CACHE_PATH + 'map/maps/', ASSETS_MAPS_PATH)
+    return files
+
+
+def publish_schedule_maps() -> List[str]:
+    """
+    Create the maps of the routes if they are missing or outdated and copy them to the web server
+
+    :return: The semesters with maps
+    """
+    semesters = schedule_maps()
+    if not os.path.exists(CACHE_PATH + 'schedulemap/maps/empty.html'):
+        semesters = schedule_maps.recompute()
+    copy_tree(CACHE_PATH + 'schedulemap/maps/', ASSETS_MAPS_PATH)
+    return semesters
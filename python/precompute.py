@@ -0,0 +1,164 @@
+import json
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import DB, DB_STATS, PROFILER
+from python import pagedata
+from python.lecturefacts import create_lecture_facts
+from python.queryprofile import merge_reports
+
+# The memoized calls of every task
+CALLS: Dict[str, List[Tuple[Callable, tuple]]] = {
+    'capacity': [(pagedata.capacity_data, ())],
+    'capacity_corona': [(pagedata.capacity_corona_data, ())],
+    'english': [(pagedata.english_data, ())],
+    'workload': [(pagedata.workload_data, ())],
+    'rolli': [(pagedata.rolli_data, ())],
+    'gender': [(pagedata.gender_counts, ())],
+    'bestprof': [(pagedata.bestprof_data, ())],
+    'geocoding': [(pagedata.geocode_addresses, ())],
+    'room_maps': [(pagedata.room_maps, ())],
+    'route_matrix': [(pagedata.route_matrix, ())],
+    'schedule_routes': [(pagedata.schedule_routes, ())],
+    'schedule_maps': [(pagedata.schedule_maps, ())],
+}
+
+# The tasks each task depends on (all of them query the lecture facts)
+DEPENDENCIES: Dict[str, List[str]] = {
+    'lecture_facts': [],
+    **{task: ['lecture_facts'] for task in CALLS},
+    'room_maps': ['lecture_facts', 'geocoding'],
+    'route_matrix': ['geocoding'],
+    'schedule_routes': ['lecture_facts', 'geocoding', 'route_matrix'],
+    'schedule_maps': ['schedule_routes'],
+}
+
+
+def run_task(task: str,
+             incremental: bool = False,
+             profile: bool = False
+             ) -> Tuple[int, int, float, float, Optional[Dict[str, Any]]]:
+    """
+    Build the data of a task
+
+    :param task:        The name of the task
+    :param incremental: If true, only data that is missing or outdated is built
+    :param profile:     If true, the queries of the task are profiled
+    :return:            The number of built and of up-to-date results, the duration and the duration of the queries in
+                        seconds and the profile of the queries (or None)
+    """
+    DB_STATS.reset()
+    if profile:
+        PROFILER.enabled = True
+        PROFILER.reset()
+    start = time.perf_counter()
+    if task == 'lecture_facts':
+        built = int(create_lecture_facts(DB, replace=not incremental))
+        total = 1
+    else:
+        built = 0
+        total = len(CALLS[task])
+        for func, args in CALLS[task]:
+            if incremental and func.is_cached(*args):
+                continue
+            func.recompute(*args)
+            built += 1
+    query_duration = sum(stats['seconds'] for stats in DB_STATS.report()['pages'].values())
+    return built, total - built, time.perf_counter() - start, query_duration, PROFILER.report() if profile else None
+
+
+def with_dependencies(tasks: List[str]) -> List[str]:
+    """
+    Add the (transitive) dependencies to a list of tasks
+
+    :param tasks: The names of the tasks
+    :return:      The tasks and their dependencies
+    """
+    result = []
+    stack = list(tasks)
+    while stack:
+        task = stack.pop()
+        if task not in result:
+            result.append(task)
+            stack += DEPENDENCIES[task]
+    return result
+
+
+def precompute(tasks: Optional[List[str]] = None,
+               incremental: bool = False,
+               workers: Optional[int] = None,
+               verbose: bool = True,
+               profile: bool = False
+               ) -> Dict[str, Any]:
+    """
+    Build the data of the pages in a process pool. A task is started as soon as its dependencies are built.
+
+    :param tasks:       The names of the tasks to run (default: all tasks), their dependencies are run as well
+    :param incremental: If true, only data that is missing or outdated is built
+    :param workers:     The number of processes (default: the number of CPUs)
+    :param verbose:     If true, the duration of every task is printed
+    :param profile:     If true, the queries are profiled
+    :return:            The result (built, up-to-date, duration, query duration, profile) or the exception of every task
+    """
+    pending = with_dependencies(list(DEPENDENCIES) if tasks is None else tasks)
+    results = {}
+    running: Dict[Future, str] = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            # Skip the tasks whose dependencies failed
+            for task in [t for t in pending if any(isinstance(results.get(d), Exception) for d in DEPENDENCIES[t])]:
+                pending.remove(task)
+                results[task] = Exception('a dependency failed')
+                if verbose:
+                    print(f'{task:16s} skipped (a dependency failed)')
+            # Start the tasks whose dependencies are built
+            for task in [t for t in pending if all(d in results for d in DEPENDENCIES[t])]:
+                pending.remove(task)
+                running[executor.submit(run_task, task, incremental, profile)] = task
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                try:
+                    results[task] = future.result()
+                    if verbose:
+                        built, cached, duration, query_duration, _ = results[task]
+                        print(f'{task:16s} {duration:8.2f}s ({built} built, {cached} up-to-date, '
+                              f'{query_duration:.2f}s in queries)')
+                except Exception as e:
+                    results[task] = e
+                    if verbose:
+                        print(f'{task:16s} failed: {e!r}')
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Builds the data of the dashboard pages ahead of time. '
+                                                 'Run it as "python -m python.precompute" next to config.py.')
+    parser.add_argument('tasks', nargs='*', metavar='task',
+                        help=f'the tasks to run (default: all), their dependencies are run as well '
+                             f'({", ".join(DEPENDENCIES)})')
+    parser.add_argument('--incremental', action='store_true', help='only build missing or outdated data')
+    parser.add_argument('--workers', type=int, default=None, help='the number of processes (default: the CPUs)')
+    parser.add_argument('--profile', metavar='FILE', default=None, help='write a JSON profile of the queries to FILE')
+    args = parser.parse_args()
+    if any(task not in DEPENDENCIES for task in args.tasks):
+        parser.error(f'unknown task: {", ".join(task for task in args.tasks if task not in DEPENDENCIES)}')
+
+    start = time.perf_counter()
+    task_results = precompute(args.tasks or None, args.incremental, args.workers, profile=args.profile is not None)
+    failed = [task for task, result in task_results.items() if isinstance(result, Exception)]
+    if args.profile is not None:
+        with open(args.profile, 'w') as f:
+            json.dump(merge_reports([result[4] for task, result in task_results.items() if task not in failed]), f,
+                      indent=2)
+    print(f'Finished {len(task_results) - len(failed)} of {len(task_results)} tasks '
+          f'in {time.perf_counter() - start:.2f}s.')
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,223 @@
+import copy
+import functools
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import sqlalchemy
+
+# Modules whose frames are skipped when looking for the function that issued a query
+INTERNAL_MODULES = ['python.queryprofile', 'python.database', 'python.sqlparams', 'python.pagecache']
+
+# String and number literals, parameters and lists of parameters of a statement
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAMETER = re.compile(r':\w+|\?')
+_PARAMETER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+
+
+def normalize(statement: str) -> str:
+    """
+    Normalize a statement, so that statements which only differ in their literals or parameters are equal, e.g.
+    "SELECT * FROM Lecture WHERE semester = '2022s' AND [@key] IN (:key_0, :key_1)" becomes
+    "SELECT * FROM Lecture WHERE semester = ? AND [@key] IN (...)".
+
+    :param statement: The statement
+    :return:          The normalized statement
+    """
+    statement = ' '.join(statement.split())
+    statement = _PARAMETER.sub('?', _LITERAL.sub('?', statement))
+    return _PARAMETER_LIST.sub('(...)', statement)
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Compute the fingerprint of a statement (the hash of the normalized statement)
+
+    :param statement: The statement
+    :return:          The fingerprint
+    """
+    return hashlib.sha1(normalize(statement).encode()).hexdigest()[:12]
+
+
+def _caller() -> str:
+    # The innermost function of the dashboard (or the pages) that issued the query
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module.split('.')[0] in ['python', 'pages'] and module not in INTERNAL_MODULES:
+            return f'{module}.{frame.f_code.co_name}'
+        frame = frame.f_back
+    return '(unknown)'
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    """
+    A SQLite cursor that reports the fetched rows and the time spent fetching them to the query profiler.
+    SQLite executes a query step by step while its rows are fetched, so the time of `execute` alone is not the
+    duration of a query.
+    """
+    profile: Optional[Callable[[int, float], None]] = None
+
+    def _fetch(self, fetch: Callable[[], Any], count: Callable[[Any], int]) -> Any:
+        if self.profile is None:
+            return fetch()
+        start = time.perf_counter()
+        rows = fetch()
+        self.profile(count(rows), time.perf_counter() - start)
+        return rows
+
+    def fetchone(self) -> Any:
+        return self._fetch(super().fetchone, lambda row: int(row is not None))
+
+    def fetchmany(self, size: Optional[int] = None) -> List[Any]:
+        return self._fetch(lambda: super(ProfilingCursor, self).fetchmany(self.arraysize if size is None else size),
+                           len)
+
+    def fetchall(self) -> List[Any]:
+        return self._fetch(super().fetchall, len)
+
+
+class ProfilingConnection(sqlite3.Connection):
+    """
+    A SQLite connection creating profiling cursors (pass it as the factory to `sqlite3.connect`)
+    """
+    def cursor(self, factory: type = ProfilingCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+
+class QueryProfiler:
+    """
+    Records the number of calls, rows and the duration of every query of an engine by its fingerprint, together with
+    the functions that issued it, and the duration of the functions decorated with `profile`.
+
+    The rows and the time of fetching them are only recorded for connections with profiling cursors (see
+    `database.create_engine`), otherwise the duration is the time SQLite needs for the first row. Queries of forked
+    processes (e.g. background callbacks) are recorded in these processes.
+    """
+    def __init__(self, engine: sqlalchemy.engine.Engine, enabled: bool = True):
+        """
+        Initialize the profiler and listen to the events of the engine
+
+        :param engine:  The engine
+        :param enabled: If false, nothing is recorded until the profiler is enabled
+        """
+        self.enabled = enabled
+        self.queries: Dict[str, Dict[str, Any]] = {}
+        self.functions: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        sqlalchemy.event.listen(engine, 'before_cursor_execute', self._before_execute)
+        sqlalchemy.event.listen(engine, 'after_cursor_execute', self._after_execute)
+
+    def _before_execute(self, con: sqlalchemy.engine.Connection, *_):
+        if self.enabled:
+            con.info.setdefault('profile_start', []).append(time.perf_counter())
+
+    def _after_execute(self, con: sqlalchemy.engine.Connection, cursor: Any, statement: str, *_):
+        if not self.enabled or not con.info.get('profile_start'):
+            return
+        duration = time.perf_counter() - con.info['profile_start'].pop()
+        key = fingerprint(statement)
+        caller = _caller()
+        with self._lock:
+            query = self.queries.setdefault(key, {'statement': normalize(statement), 'calls': 0, 'rows': 0,
+                                                  'seconds': 0.0, 'max_seconds': 0.0, 'callers': {}})
+            query['calls'] += 1
+            query['seconds'] += duration
+            query['max_seconds'] = max(query['max_seconds'], duration)
+            query['callers'][caller] = query['callers'].get(caller, 0) + 1
+            if cursor.description is None:
+                query['rows'] += max(cursor.rowcount, 0)
+
+        if isinstance(cursor, ProfilingCursor) and cursor.description is not None:
+            def add_fetch(rows: int, fetch_duration: float):
+                with self._lock:
+                    query['rows'] += rows
+                    query['seconds'] += fetch_duration
+            cursor.profile = add_fetch
+
+    def profile(self, func: Callable) -> Callable:
+        """
+        Decorate a function, so that its calls are recorded
+
+        :param func: The function
+        :return:     The decorated function
+        """
+        name = f'{func.__module__}.{func.__qualname__}'
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not self.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                duration = time.perf_counter() - start
+                with self._lock:
+                    function = self.functions.setdefault(name, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+                    function['calls'] += 1
+                    function['seconds'] += duration
+                    function['max_seconds'] = max(function['max_seconds'], duration)
+        return wrapper
+
+    def reset(self):
+        """
+        Forget the recorded queries and functions
+        """
+        with self._lock:
+            self.queries = {}
+            self.functions = {}
+
+    def report(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get the recorded queries and functions, the slowest first
+
+        :return: The queries (fingerprint, normalized statement, calls, rows, total duration and maximum duration of
+                 an execution without fetching in seconds, calls per calling function) and the functions (name, calls,
+                 total and maximum duration)
+        """
+        with self._lock:
+            queries = [{'fingerprint': key, **query, 'callers': dict(query['callers'])}
+                       for key, query in self.queries.items()]
+            functions = [{'name': name, **function} for name, function in self.functions.items()]
+        return {'queries': sorted(queries, key=lambda q: q['seconds'], reverse=True),
+                'functions': sorted(functions, key=lambda f: f['seconds'], reverse=True)}
+
+    def write_report(self, path: str):
+        """
+        Write the report as JSON
+
+        :param path: The path of the file
+        """
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+
+def merge_reports(reports: List[Dict[str, List[Dict[str, Any]]]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Merge the reports of several profilers (e.g. of the processes of the precompute command)
+
+    :param reports: The reports
+    :return:        The merged report
+    """
+    merged = {'queries': {}, 'functions': {}}
+    for report in reports:
+        for kind, key in [('queries', 'fingerprint'), ('functions', 'name')]:
+            for entry in report[kind]:
+                if entry[key] not in merged[kind]:
+                    merged[kind][entry[key]] = copy.deepcopy(entry)
+                    continue
+                total = merged[kind][entry[key]]
+                for field in ['calls', 'rows', 'seconds']:
+                    if field in entry:
+                        total[field] += entry[field]
+                total['max_seconds'] = max(total['max_seconds'], entry['max_seconds'])
+                for caller, calls in entry.get('callers', {}).items():
+                    total['callers'][caller] = total['callers'].get(caller, 0) + calls
+    return {kind: sorted(entries.values(), key=lambda e: e['seconds'], reverse=True)
+            for kind, entries in merged.items()}
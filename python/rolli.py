@@ -1,6 +1,7 @@
 from typing import Dict, Tuple
 import sqlalchemy
 from python.faculty import Faculty
+from python.sqlparams import in_clause
 
 
 def rollis(db: sqlalchemy.engine.base.Engine) -> Dict[str, Dict[str, Tuple[int, int, float]]]:
@@ -12,21 +13,20 @@ def rollis(db: sqlalchemy.engine.base.Engine) -> Dict[str, Dict[str, Tuple[int,
                total number of wheelchair friendly rooms, the total number of rooms and the relative number of
                wheelchair friendly rooms as values.
     """
-    con = db.connect()
     rolli_lectures = {}
-    faculties = str(tuple([str(x) for x in Faculty]))
+    faculties, params = in_clause('faculty', [str(x) for x in Faculty])
     # get the number of wheelchair friendy rooms, semester, orgunit and compute the relative number
     query = f'''
-    SELECT OT.semester, orgunit, SUM(rolli), COUNT(*), ROUND(SUM(rolli) * 100.0 / COUNT(*), 2)
-    FROM (terms NATURAL JOIN orgunits) OT
-        LEFT JOIN Lecture ON OT.semester = Lecture.semester AND OT.[@key] = Lecture.[@key]
-        LEFT JOIN Room ON OT.room = Room.[@key] AND OT.semester = Room.semester
-    WHERE orgunit IN {faculties}
-        AND SUBSTR(OT.[@key], 0, INSTR(OT.[@key], '.')) = 'Lecture'
-    GROUP BY OT.semester, orgunit;
+    SELECT semester, orgunit, SUM(rolli), COUNT(*), ROUND(SUM(rolli) * 100.0 / COUNT(*), 2)
+    FROM lecture_facts
+    WHERE term NOT NULL
+        AND orgunit IN {faculties}
+        AND SUBSTR(key, 0, INSTR(key, '.')) = 'Lecture'
+    GROUP BY semester, orgunit;
     '''
 
-    info = con.execute(query)
+    with db.connect() as con:
+        info = con.execute(query, **params).fetchall()
     # add the information in the dictionary
     for sem, fac, rolli_sum, total, ratio in info:
         if sem not in rolli_lectures:
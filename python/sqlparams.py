@@ -0,0 +1,75 @@
+from typing import Any, Dict, Iterable, List, Tuple
+
+import sqlalchemy
+
+# The largest IN-list that is bound as parameters (SQLite before 3.32 allows 999 parameters per statement)
+MAX_IN_PARAMETERS = 512
+
+
+def in_clause(name: str, values: Iterable[Any]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Builds an IN-list of named parameters, e.g. "(:name_0, :name_1)" and {'name_0': 'a', 'name_1': 'b'}.
+
+    The number of parameters is rounded up to a power of two by repeating the last value, so that lists of similar
+    lengths result in the same statement and SQLite can reuse the prepared statement from its cache.
+    An empty list results in "(NULL)", which matches nothing.
+
+    :param name:   The name of the parameters (must be a valid identifier)
+    :param values: The values of the list
+    :return:       The IN-list and its parameters
+    """
+    values = list(values)
+    if not values:
+        return '(NULL)', {}
+    size = 1 << (len(values) - 1).bit_length()
+    values += values[-1:] * (size - len(values))
+    return '(' + ', '.join(f':{name}_{i}' for i in range(size)) + ')', {f'{name}_{i}': v for i, v in enumerate(values)}
+
+
+def in_values(con: sqlalchemy.engine.Connection, name: str, values: Iterable[Any]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Builds an IN-list like `in_clause`, but lists with more than `MAX_IN_PARAMETERS` values are stored in a temporary
+    table of the connection, e.g. "(SELECT value FROM temp.in_name)" (the table is reused by later calls).
+
+    :param con:    The database connection the query is executed with
+    :param name:   The name of the parameters or the temporary table (must be a valid identifier)
+    :param values: The values of the list
+    :return:       The IN-list and its parameters
+    """
+    values = list(values)
+    if len(values) <= MAX_IN_PARAMETERS:
+        return in_clause(name, values)
+    con.execute(f'CREATE TEMP TABLE IF NOT EXISTS in_{name} (value)')
+    con.execute(f'DELETE FROM temp.in_{name}')
+    con.execute(f'INSERT INTO temp.in_{name} VALUES (?)', [(v,) for v in values])
+    return f'(SELECT value FROM temp.in_{name})', {}
+
+
+def select_in_batches(con: sqlalchemy.engine.Connection,
+                      query: str,
+                      name: str,
+                      values: Iterable[Any],
+                      batch_size: int = MAX_IN_PARAMETERS,
+                      **params: Any
+                      ) -> List[Any]:
+    """
+    Runs a query for batches of values, e.g. to look up many keys. The query contains the placeholder "{name}" for the
+    IN-list of a batch. All batches have the same size, so the statement is prepared once.
+    Only queries whose rows depend on a single value of the list (no grouping or ordering across values) can be
+    batched.
+
+    :param con:        The database connection
+    :param query:      The query with the placeholder for the IN-list
+    :param name:       The name of the placeholder and the parameters
+    :param values:     The values of the list
+    :param batch_size: The number of values per batch (a power of two)
+    :param params:     Further parameters of the query
+    :return:           The rows of all batches
+    """
+    values = list(dict.fromkeys(values))
+    rows = []
+    for start in range(0, len(values), batch_size):
+        batch = values[start:start + batch_size]
+        clause, batch_params = in_clause(name, batch + batch[-1:] * (batch_size - len(batch)))
+        rows += con.execute(query.replace('{' + name + '}', clause), **params, **batch_params).fetchall()
+    return rows
@@ -0,0 +1,126 @@
+import csv
+import os
+import sys
+import tempfile
+import unittest
+
+# The modules are imported from the repository root like in the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from python.addressindex import AddressIndex, expand_housenumbers, normalize_street, split_address  # noqa: E402
+from python.parse_addr import new_addr  # noqa: E402
+
+
+class TestNormalize(unittest.TestCase):
+    def test_street_spellings(self):
+        for street in ['Ludewig-Meyn-Straße', 'Ludewig-Meyn-Str.', 'Ludewig-Meyn-Str', 'Ludewig-Meyn-Strasse',
+                       'ludewig meyn straße', 'LUDEWIG MEYN STRASSE']:
+            with self.subTest(street=street):
+                self.assertEqual('ludewigmeynstraße', normalize_street(street))
+        # "Str." is only replaced at the end or before a dot
+        self.assertEqual('straßedes17juni', normalize_street('Str. des 17. Juni'))
+        self.assertEqual('stresemannplatz', normalize_street('Stresemannplatz'))
+
+    def test_expand_housenumbers(self):
+        self.assertListEqual(['3a'], expand_housenumbers('3a'))
+        self.assertListEqual(['12a'], expand_housenumbers('12 A'))
+        self.assertListEqual(['2', '3', '4'], expand_housenumbers('2-4'))
+        self.assertListEqual(['2', '3', '4'], expand_housenumbers(' 2 - 4 '))
+        self.assertListEqual(['10', '12', '14b'], expand_housenumbers('10;12, 14 B'))
+        # Descending and too long ranges are kept as they are
+        self.assertListEqual(['4-2'], expand_housenumbers('4-2'))
+        self.assertListEqual(['1-40'], expand_housenumbers('1-40'))
+        self.assertListEqual([], expand_housenumbers(''))
+
+
+class TestSplitAddress(unittest.TestCase):
+    def test_new_addr(self):
+        # The addresses of the UnivIS as they are corrected by `parse_addr.new_addr` before geocoding
+        cases = {
+            'Olshausenstr. 40': ('olshausenstraße', '40'),
+            'OS40': ('olshausenstraße', '40'),
+            'LMS 4': ('ludewigmeynstraße', '4'),
+            'Ludewig-Meyn-Str. 2': ('ludewigmeynstraße', '2'),
+            'CAP2': ('christianalbrechtsplatz', '2'),
+            'Leibnizstraße 4, Raum 12': ('leibnizstraße', '4'),
+            'Westring 383 24118 Kiel': ('westring', '383'),
+            'Kiellinie': ('kiellinie', None),
+        }
+        for addr, expected in cases.items():
+            with self.subTest(addr=addr):
+                self.assertEqual(expected, split_address(new_addr(addr)))
+
+    def test_housenumber_with_letter(self):
+        self.assertEqual(('hermannrodewaldstraße', '3a'), split_address('Hermann-Rodewald-Straße 3a Kiel Germany'))
+        self.assertEqual(('olshausenstraße', '12a'), split_address('Olshausenstraße 12 A Kiel Germany'))
+        # The letter of "Kiel" is not taken as part of the house number
+        self.assertEqual(('olshausenstraße', '12'), split_address('Olshausenstraße 12 Kiel Germany'))
+        self.assertEqual(('olshausenstraße', '12'), split_address('Olshausenstraße 12Kiel'))
+
+    def test_without_housenumber(self):
+        self.assertEqual(('kiellinie', None), split_address('Kiellinie Kiel Germany'))
+        self.assertEqual(('kiellinie', None), split_address('Kiellinie, 24118 Kiel'))
+        self.assertEqual(('kiellinie', None), split_address('Kiellinie (Geomar)'))
+
+    def test_only_postal_code(self):
+        self.assertIsNone(split_address(new_addr('24118 Kiel')))
+        self.assertIsNone(split_address('24118 Kiel'))
+        self.assertIsNone(split_address('Kiel Germany'))
+        self.assertIsNone(split_address(''))
+
+
+class TestAddressIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmp.name, 'addresses.csv')
+        with open(self.csv_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Strasse', 'Hausnummer', 'Latitude', 'Longitude'])
+            writer.writerow(['Ludewig-Meyn-Str.', '2-4', '54.347', '10.118'])
+            writer.writerow(['Olshausenstraße', '40', '54.339', '10.122'])
+            writer.writerow(['Olshausenstraße', '40', '0', '0'])
+            writer.writerow(['Olshausenstraße', '42', '54.341', '10.124'])
+            writer.writerow(['Hermann-Rodewald-Strasse', '3a', '54.346', '10.114'])
+            writer.writerow(['', '7', '0', '0'])
+            writer.writerow(['Kiellinie', '', '0', '0'])
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def assert_lookups(self, index: AddressIndex):
+        self.assertEqual(6, len(index))
+        self.assertEqual((54.347, 10.118), index.lookup(new_addr('LMS 3')))
+        self.assertEqual((54.347, 10.118), index(new_addr('Ludewig-Meyn-Straße 4')))
+        # The first of duplicate addresses is kept
+        self.assertEqual((54.339, 10.122), index.lookup(new_addr('Olshausenstr. 40')))
+        self.assertEqual((54.346, 10.114), index.lookup('Hermann-Rodewald-Straße 3a Kiel Germany'))
+        self.assertIsNone(index.lookup('Hermann-Rodewald-Straße 3 Kiel Germany'))
+        # An address without a house number is resolved to the center of its street
+        lat, lon = index.lookup('Olshausenstraße Kiel Germany')
+        self.assertAlmostEqual(54.34, lat)
+        self.assertAlmostEqual(10.123, lon)
+        self.assertIsNone(index.lookup(new_addr('Kiellinie')))
+        self.assertIsNone(index.lookup('24118 Kiel'))
+
+    def test_from_csv(self):
+        self.assert_lookups(AddressIndex.from_csv(self.csv_path))
+
+    def test_save_load(self):
+        index_path = os.path.join(self.tmp.name, 'index.sqlite')
+        index = AddressIndex.from_csv(self.csv_path)
+        index.save(index_path)
+        # An existing index is replaced
+        index.save(index_path)
+        loaded = AddressIndex.load(index_path)
+        self.assertDictEqual(index.entries, loaded.entries)
+        self.assertDictEqual(index.streets, loaded.streets)
+        self.assert_lookups(loaded)
+
+    def test_missing_column(self):
+        with open(self.csv_path, 'w', encoding='utf-8', newline='') as f:
+            f.write('street,lat,lon\nKiellinie,54.3,10.1\n')
+        with self.assertRaises(ValueError):
+            AddressIndex.from_csv(self.csv_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
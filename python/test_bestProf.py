@@ -0,0 +1,280 @@
+import os
+import sys
+import tempfile
+import unittest
+import pandas as pd
+import sqlalchemy
+
+# The modules are imported from the repository root like in the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import python.bestProf as bestProf  # noqa: E402
+
+
+def reference_create_lecture_df(db: sqlalchemy.engine.Engine) -> pd.DataFrame:
+    """
+    The former implementation of `bestProf.create_lecture_df` that sent two queries per winner.
+
+    :param db: A SQL database.
+    :return:   A Data Frame with the lectures given by the winners in their winning year.
+    """
+    df_lec = pd.DataFrame()
+    for lastname, firstname, year, place in bestProf.winner:
+        df_temp = pd.DataFrame()
+        for semester in [str(year) + "s", str(year - 1) + "w"]:
+            result = db.execute("SELECT Lecture.name "
+                                "FROM Dozs INNER JOIN Person INNER JOIN Lecture "
+                                "ON dozs.doz = person.'@key' AND dozs.semester = lecture.semester "
+                                "AND dozs.semester = person.semester AND dozs.'@key' = lecture.'@key'"
+                                "WHERE lecture.semester =? AND person.lastname =? AND person.firstname =?",
+                                (semester, lastname, firstname))
+            df_sem = pd.DataFrame()
+            df_sem['Vorlesungen'] = [row[0] for row in result if not bestProf.is_exercise(row[0])]
+            df_sem['Jahr'] = year
+            df_sem['Semester'] = semester
+            df_sem['Platz'] = place
+            df_temp = pd.concat([df_temp, df_sem])
+        df_lec = pd.concat([df_lec, df_temp])
+    return df_lec.dropna()
+
+
+def reference_query(db: sqlalchemy.engine.Engine, columns: str, semester: str, lecture_name: str) -> list:
+    """
+    The former query of a single winning lecture.
+
+    :param db:           A SQL database.
+    :param columns:      The columns of the Lecture table to select.
+    :param semester:     The semester of the lecture.
+    :param lecture_name: The name of the lecture.
+    :return:             The rows of all lectures with the name in the semester.
+    """
+    return list(db.execute(f"SELECT {columns} FROM Lecture WHERE Semester = ? AND Name = ? ", (semester, lecture_name)))
+
+
+def reference_create_ects_df(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine) -> pd.DataFrame:
+    """
+    The former implementation of `bestProf.create_ects_df` that sent one query per lecture.
+
+    :param df_lec: The winning lectures (see `bestProf.create_lecture_df`).
+    :param db:     A SQL database.
+    :return:       A data frame from all ects of lectures.
+    """
+    df_ects = pd.DataFrame()
+    for lec, year, semester, place in df_lec.values.tolist():
+        df_temp = pd.DataFrame()
+        df_temp['ECTS'] = [row[0] for row in reference_query(db, 'Ects_cred', semester, lec)]
+        df_temp['Jahr'] = year
+        df_temp['Semester'] = semester
+        df_temp['Platz'] = str(place)
+        df_ects = pd.concat([df_ects, df_temp])
+    return pd.DataFrame(df_ects.values.tolist(), columns=['ECTS', 'Jahr', 'Semester', 'Platz']).dropna()
+
+
+def reference_create_lecture_language(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine) -> pd.DataFrame:
+    """
+    The former implementation of `bestProf.create_lecture_language` that sent one query per lecture. The last
+    matching lecture overwrites the others.
+
+    :param df_lec: The winning lectures (see `bestProf.create_lecture_df`).
+    :param db:     A SQL database.
+    :return:       A data frame that stores to lectures 1 for English speaking, 0 otherwise.
+    """
+    df_lan = pd.DataFrame()
+    for lec, year, semester, place in df_lec.values.tolist():
+        df_temp = pd.DataFrame()
+        for (english,) in reference_query(db, 'englisch', semester, lec):
+            df_temp['Englisch'] = [1 if english == 1 else 0]
+            df_temp['Deutsch'] = [0 if english == 1 else 1]
+            df_temp['Jahr'] = [year]
+            df_temp['Semester'] = [semester]
+            df_temp['Platz'] = [place]
+        df_lan = pd.concat([df_lan, df_temp])
+    return pd.DataFrame(df_lan.values.tolist(), columns=['Englisch', 'Deutsch', 'Jahr', 'Semester', 'Platz']).dropna()
+
+
+def reference_create_num_of_participants(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine) -> pd.DataFrame:
+    """
+    The former implementation of `bestProf.create_num_of_participants` that sent one query per lecture.
+
+    :param df_lec: The winning lectures (see `bestProf.create_lecture_df`).
+    :param db:     A SQL database.
+    :return:       A data frame that stores the expected number of participants for the modules.
+    """
+    lecture_list = df_lec.values.tolist()
+    df_num = pd.DataFrame()
+    previous_year = 2019
+    previous_place = 1
+    count_numbers = 0
+    for i, (lec, year, semester, place) in enumerate(lecture_list):
+        number = [row[0] for row in reference_query(db, 'turnout', semester, lec)]
+        df_temp = pd.DataFrame()
+        if i == len(lecture_list) - 1:
+            if number[0] is not None:
+                count_numbers += number[0]
+            df_temp['Teilnehmerzahl'] = [count_numbers]
+            df_temp['Jahr'] = [year]
+            df_temp['Platz'] = [str(place)]
+        elif year == previous_year and place == previous_place:
+            if number[0] is not None:
+                count_numbers += number[0]
+        else:
+            df_temp['Teilnehmerzahl'] = [count_numbers]
+            df_temp['Jahr'] = [previous_year]
+            df_temp['Platz'] = [str(previous_place)]
+            if number[0] is not None:
+                count_numbers = number[0]
+            previous_year = year
+            previous_place = place
+        df_num = pd.concat([df_num, df_temp])
+    return pd.DataFrame(df_num.values.tolist(), columns=['Teilnehmerzahl', 'Jahr', 'Platz']).dropna()
+
+
+def reference_create_orgname(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine) -> pd.DataFrame:
+    """
+    The former implementation of `bestProf.create_orgname` that sent one query per lecture. The last matching
+    lecture overwrites the others.
+
+    :param df_lec: The winning lectures (see `bestProf.create_lecture_df`).
+    :param db:     A SQL database.
+    :return:       A data frame that stores the number of lectures per organisation.
+    """
+    df_org = pd.DataFrame()
+    for lec, year, semester, place in df_lec.values.tolist():
+        df_temp = pd.DataFrame()
+        for (orgname,) in reference_query(db, 'orgname', semester, lec):
+            df_temp['Organisation'] = [orgname]
+            df_temp['Jahr'] = [str(year)]
+            df_temp['Platz'] = [str(place)]
+        df_org = pd.concat([df_org, df_temp])
+    renamed = {"Technische Informatik": 'Verteilte Systeme',
+               "Technische Informatik [ab dem 1.10.2018: Verteilte Systeme]": 'Verteilte Systeme',
+               "Fachdidaktik Informatik": 'Didaktik der Informatik',
+               "Institut für Experimentelle und Angewandte Physik (Sektion Physik)":
+                   'Institut für Experimentelle & Angewandte Physik',
+               "Algorithmische Optimale Steuerung - CO2-Aufnahme des Meeres": 'Algorithmische Optimale Steuerung',
+               "Programmiersprachen und Übersetzerkonstruktion": 'Programmiersprachen & Übersetzerkonstruktion',
+               "Integrated School of Ocean Sciences (ISOS)": 'Integrated School of Ocean Sciences'}
+    for name, short in renamed.items():
+        df_org.loc[df_org.Organisation == name, 'Organisation'] = short
+    return df_org.groupby(['Jahr', 'Platz', 'Organisation'])['Organisation'].count().reset_index(name='Anzahl')
+
+
+def reference_create_modul_time(df_lec: pd.DataFrame, db: sqlalchemy.engine.Engine) -> pd.DataFrame:
+    """
+    The former implementation of `bestProf.create_modul_time` that sent one query per lecture.
+
+    :param df_lec: The winning lectures (see `bestProf.create_lecture_df`).
+    :param db:     A SQL database.
+    :return:       A data frame that stores times for the modules.
+    """
+    times = {"8:00": "8:00", "8:15": "8:00", "8:30": "8:00", "9:00": "8:00", "10:00": "10:00", "10:05": "10:00",
+             "10:15": "10:00", "10:30": "10:00", "12:00": "12:00", "12:05": "12:00", "12:15": "12:00", "12:30": "12:00",
+             "13:00": "12:00", "14:00": "14:00", "14:14": "14:00", "15:00": "14:00", "16:00": "16:00", "16:05": "16:00",
+             "16:15": "16:00", "18:00": "18:00", "18:15": "18:00"}
+    days = {"1": "Montag", "2": "Dienstag", "3": "Mittwoch", "4": "Donnerstag", "5": "Freitag", "6": "Samstag"}
+    df_time = pd.DataFrame()
+    for lec, year, semester, place in df_lec.values.tolist():
+        result = db.execute("SELECT terms.starttime, terms.endtime, terms.repeat "
+                            "FROM Lecture INNER JOIN  terms on Lecture.'@key' = terms.'@key' "
+                            "WHERE lecture.semester =? AND lecture.name= ? AND Lecture.semester = terms.semester",
+                            (semester, lec))
+        temp = [(year, str(place), times.get(start), end, days[repeat[3:]]) for start, end, repeat in result
+                if repeat is not None and repeat[:3] in ("w1 ", "w2 ") and repeat[3:] in days]
+        df_time = pd.concat([df_time, pd.DataFrame(temp, columns=['Jahr', 'Platz', 'Startzeit', 'Endzeit', 'Tag'])])
+    return pd.DataFrame(df_time.values.tolist(), columns=['Jahr', 'Platz', 'Startzeit', 'Endzeit', 'Tag']).dropna()
+
+
+def synthetic_db(path: str) -> sqlalchemy.engine.Engine:
+    """
+    Create a database with lectures of some winners, including exercises, lectures of two winners and lectures whose
+    name occurs twice in a semester.
+
+    :param path: The directory to create the database in.
+    :return:     The database.
+    """
+    db = sqlalchemy.create_engine(f'sqlite:///{path}/univis.db')
+    persons = [('2019s', 'P.1', 'Landsiedel', 'Olaf'), ('2018w', 'P.1', 'Landsiedel', 'Olaf'),
+               ('2019s', 'P.2', 'Langfeld', 'Barbara'), ('2018w', 'P.3', 'Mühling', 'Andreas'),
+               ('2017s', 'P.4', 'Huch', 'Frank'), ('2017s', 'P.5', 'Huch', 'Frank'), ('2016w', 'P.6', 'Huch', 'Frank'),
+               ('2017s', 'P.7', 'Mühling', 'Andreas'), ('2011s', 'P.8', 'Wilke', 'Thomas')]
+    lectures = [
+        # semester, key, name, ects, englisch, turnout, orgname
+        ('2019s', 'L.1', 'Betriebssysteme', 8, 0, 120, 'Technische Informatik'),
+        ('2019s', 'L.2', 'Übung zu Betriebssysteme', 0, 0, None, 'Technische Informatik'),
+        ('2019s', 'L.3', 'Rechnernetze', 6, 1, None, 'Verteilte Systeme'),
+        ('2019s', 'L.4', 'Rechnernetze', 5, 0, 40, 'Fachdidaktik Informatik'),
+        ('2019s', 'L.5', 'Didaktik', 4, 1, 30, 'Fachdidaktik Informatik'),
+        ('2018w', 'L.1', 'Eingebettete Systeme', 8, 1, 60, 'Technische Informatik'),
+        ('2018w', 'L.2', 'Programmierung', 8, 0, 300, 'Fachdidaktik Informatik'),
+        ('2018w', 'L.3', 'Seminar Exercise', 2, 0, 10, 'Technische Informatik'),
+        ('2017s', 'L.1', 'Informatik für Ingenieure', 8, 0, 200, 'Technische Informatik'),
+        ('2017s', 'L.2', 'Algorithmen', 8, 1, 150, 'Theoretische Informatik'),
+        ('2017s', 'L.3', 'Algorithmen', 6, None, 20, 'Theoretische Informatik'),
+        ('2016w', 'L.1', 'Rechnerarchitektur', 8, 0, None, 'Technische Informatik'),
+        ('2011s', 'L.1', 'Logik', 6, 0, 90, 'Theoretische Informatik'),
+    ]
+    dozs = [('2019s', 'L.1', 'P.1'), ('2019s', 'L.2', 'P.1'), ('2019s', 'L.3', 'P.1'), ('2019s', 'L.5', 'P.2'),
+            ('2019s', 'L.3', 'P.2'), ('2018w', 'L.1', 'P.1'), ('2018w', 'L.2', 'P.3'), ('2018w', 'L.3', 'P.3'),
+            ('2017s', 'L.2', 'P.5'), ('2017s', 'L.1', 'P.4'), ('2017s', 'L.2', 'P.7'), ('2016w', 'L.1', 'P.6'),
+            ('2011s', 'L.1', 'P.8')]
+    terms = [('2019s', 'L.1', '10:15', '11:45', 'w1 1'), ('2019s', 'L.1', '8:15', '9:45', 'w1 3'),
+             ('2019s', 'L.3', '14:00', '15:30', 'w2 2'), ('2019s', 'L.4', '12:15', '13:45', 'w1 5'),
+             ('2019s', 'L.5', '9:30', '11:00', 'w1 4'), ('2019s', 'L.5', '16:15', '17:45', 'w1 7'),
+             ('2018w', 'L.1', '18:00', '19:30', 'w1 6'), ('2018w', 'L.2', '8:00', '10:00', None),
+             ('2017s', 'L.2', '10:00', '12:00', 'w1 2'), ('2017s', 'L.3', '16:15', '18:00', 'w1 2'),
+             ('2016w', 'L.1', '12:15', '14:00', 's1')]
+    with db.begin() as con:
+        con.execute("CREATE TABLE Person (semester TEXT, '@key' TEXT, lastname TEXT, firstname TEXT)")
+        con.execute("CREATE TABLE Lecture (semester TEXT, '@key' TEXT, name TEXT, Ects_cred INTEGER, englisch BOOLEAN, "
+                    "turnout INTEGER, orgname TEXT)")
+        con.execute("CREATE TABLE dozs (semester TEXT, '@key' TEXT, doz TEXT)")
+        con.execute("CREATE TABLE terms (semester TEXT, '@key' TEXT, starttime TEXT, endtime TEXT, repeat TEXT)")
+        con.execute("INSERT INTO Person VALUES (?, ?, ?, ?)", persons)
+        con.execute("INSERT INTO Lecture VALUES (?, ?, ?, ?, ?, ?, ?)", lectures)
+        con.execute("INSERT INTO dozs VALUES (?, ?, ?)", dozs)
+        con.execute("INSERT INTO terms VALUES (?, ?, ?, ?, ?)", terms)
+    return db
+
+
+class TestBestProf(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = synthetic_db(self.tmp.name)
+        self.df_lec = bestProf.create_lecture_df(self.db)
+
+    def tearDown(self):
+        self.db.dispose()
+        self.tmp.cleanup()
+
+    def test_create_lecture_df(self):
+        pd.testing.assert_frame_equal(reference_create_lecture_df(self.db), self.df_lec)
+        self.assertNotIn('Übung zu Betriebssysteme', self.df_lec['Vorlesungen'].tolist())
+        self.assertEqual(2, self.df_lec['Vorlesungen'].tolist().count('Rechnernetze'))
+
+    def test_create_ects_df(self):
+        pd.testing.assert_frame_equal(reference_create_ects_df(self.df_lec, self.db),
+                                      bestProf.create_ects_df(self.df_lec, self.db))
+
+    def test_create_lecture_language(self):
+        result = bestProf.create_lecture_language(self.df_lec, self.db)
+        pd.testing.assert_frame_equal(reference_create_lecture_language(self.df_lec, self.db), result)
+        # Only the last 'Algorithmen' (without a language) counts
+        self.assertEqual(0, result.loc[result.Jahr == 2017, 'Englisch'].sum())
+
+    def test_create_num_of_participants(self):
+        pd.testing.assert_frame_equal(reference_create_num_of_participants(self.df_lec, self.db),
+                                      bestProf.create_num_of_participants(self.df_lec, self.db))
+
+    def test_create_orgname(self):
+        result = bestProf.create_orgname(self.df_lec, self.db)
+        pd.testing.assert_frame_equal(reference_create_orgname(self.df_lec, self.db), result)
+        # Only the last 'Rechnernetze' (of the didactics) counts
+        winner = result[(result.Jahr == '2019') & (result.Platz == '1')].set_index('Organisation')['Anzahl']
+        self.assertEqual({'Verteilte Systeme': 2, 'Didaktik der Informatik': 1}, winner.to_dict())
+
+    def test_create_modul_time(self):
+        pd.testing.assert_frame_equal(reference_create_modul_time(self.df_lec, self.db),
+                                      bestProf.create_modul_time(self.df_lec, self.db))
+
+
+if __name__ == '__main__':
+    unittest.main()
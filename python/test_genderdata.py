@@ -0,0 +1,125 @@
+import os
+import sys
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import sqlalchemy
+
+# The modules are imported from the repository root like in the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import python.genderdata as genderdata  # noqa: E402
+from python.faculty import Faculty  # noqa: E402
+
+
+def reference_get_gender_data(db: sqlalchemy.engine.Engine,
+                              only_female: bool,
+                              threshold: int,
+                              ignore_count: int = 0) -> pd.DataFrame:
+    """
+    The former implementation of `genderdata.get_gender_data` that sent one aggregating query per threshold.
+
+    :param db:           A SQL database with a table or view genderdata.
+    :param only_female:  If true, only names that got declared as female are counted.
+    :param threshold:    A threshold for the probability.
+    :param ignore_count: A threshold for the count that got returned by the api for a name.
+    :return:             The gender data for the given parameters as a pandas DataFrame
+    """
+    of_not = '' if only_female else 'NOT '
+    of_gender = '\'f\'' if only_female else '\'m\''
+    faculty_list = str(tuple([str(f) for f in Faculty]))
+    sql = f'''
+    SELECT semester AS 'Semester',
+        orgunit AS 'Fakultät',
+        SUM({of_not}(gender = {of_gender} AND prob >= {threshold})) * 100.0 / COUNT(*) AS 'Prozentualer Anteil',
+        SUM({of_not}(gender = {of_gender} AND prob >= {threshold})) AS 'Anzahl',
+        COUNT(*) AS 'Gesamt'
+    FROM genderdata
+    WHERE count > {ignore_count}
+        AND orgunit IN {faculty_list}
+    GROUP BY semester, orgunit;
+    '''
+    return pd.read_sql(sql, db)
+
+
+def synthetic_db(path: str) -> sqlalchemy.engine.Engine:
+    """
+    Creates a database with a table genderdata in place of the view, which contains every kind of gender and
+    probability: missing genders and probabilities, other genders, fractional probabilities and probabilities outside
+    of 0..100.
+
+    :param path: The path of the SQLite file
+    :return:     The database
+    """
+    db = sqlalchemy.create_engine(f'sqlite:///{path}')
+    genders = ['f', 'm', 'n', None]
+    probs = [None, -5, 0, 0.5, 1, 49.5, 50, 50.0001, 99, 99.9, 100, 120]
+    faculties = [str(Faculty.MATHE), str(Faculty.PHILOS), 'Keine Fakultät']
+    rows = []
+    for i in range(600):
+        # Spread the combinations unevenly over the groups, so that every group has different numbers
+        rows.append({
+            'semester': ['2019w', '2020s', '2020w'][i % 3],
+            'orgunit': faculties[(i // 3) % len(faculties)],
+            'gender': genders[(i * 7) % len(genders)],
+            'prob': probs[(i * 5 + i // 11) % len(probs)],
+            'count': i % 4,
+        })
+    pd.DataFrame(rows).to_sql('genderdata', db, index=False)
+    return db
+
+
+class TestGenderData(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = synthetic_db(os.path.join(self.tmp.name, 'gender.db'))
+
+    def tearDown(self) -> None:
+        self.db.dispose()
+        self.tmp.cleanup()
+
+    def assert_same(self, expected: pd.DataFrame, actual: pd.DataFrame) -> None:
+        key = ['Semester', 'Fakultät']
+        expected = expected.sort_values(key).reset_index(drop=True)
+        actual = actual.sort_values(key).reset_index(drop=True)
+        self.assertListEqual(list(expected.columns), list(actual.columns))
+        pd.testing.assert_frame_equal(expected[key], actual[key])
+        for column in ['Anzahl', 'Gesamt']:
+            np.testing.assert_array_equal(expected[column].to_numpy(), actual[column].to_numpy())
+        np.testing.assert_allclose(expected['Prozentualer Anteil'].to_numpy(dtype=float),
+                                   actual['Prozentualer Anteil'].to_numpy(dtype=float))
+
+    def test_cube_matches_the_query_for_every_threshold(self):
+        # The view is not created again because the table genderdata already exists
+        cube = genderdata.get_gender_cube(genderdata.get_gender_counts(self.db))
+        for only_female in [True, False]:
+            for threshold in range(101):
+                with self.subTest(only_female=only_female, threshold=threshold):
+                    self.assert_same(reference_get_gender_data(self.db, only_female, threshold),
+                                     genderdata.get_gender_data_from_cube(cube, only_female, threshold))
+
+    def test_ignore_count(self):
+        for only_female in [True, False]:
+            with self.subTest(only_female=only_female):
+                self.assert_same(reference_get_gender_data(self.db, only_female, 50, ignore_count=2),
+                                 genderdata.get_gender_data(self.db, only_female, 50, ignore_count=2))
+
+    def test_missing_gender_and_probability(self):
+        counts = pd.DataFrame({
+            'semester': ['2020s'] * 5,
+            'orgunit': [str(Faculty.MATHE)] * 5,
+            'gender': ['m', None, 'f', 'n', None],
+            'prob': [None, 70, None, 30.5, None],
+            'n': [1, 2, 4, 8, 16],
+        })
+        keys, counted = genderdata.get_gender_cube(counts)
+        self.assertListEqual(keys['n'].tolist(), [31])
+        # Not male: 'f' and 'n' for every threshold, the missing gender only above its probability (like in SQL,
+        # where NULL AND FALSE is FALSE), 'm' and the missing gender without probability never
+        self.assertListEqual(counted[0, 0, [0, 70, 71, 100]].tolist(), [12, 12, 14, 14])
+        # Female: nobody, because the only female name has no probability
+        self.assertListEqual(counted[1, 0, [0, 100]].tolist(), [0, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import sys
+import tempfile
+import unittest
+from typing import Dict, Optional, Tuple
+
+# The modules are imported from the repository root like in the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from python.geomanager import GeoManager, GeoStore, StaticGeocoder  # noqa: E402
+
+
+class FailingGeocoder(StaticGeocoder):
+    """
+    A static geocoder whose first requests fail (like a timeout of the geocoding service)
+    """
+    def __init__(self, coords: Dict[str, Tuple[float, float]], failures: int):
+        """
+        Initialize the geocoder
+
+        :param coords:   The coordinates (lat, lon) of the known addresses
+        :param failures: The number of requests that fail
+        """
+        super().__init__(coords)
+        self.failures = failures
+
+    def __call__(self, addr: str) -> Optional[Tuple[float, float]]:
+        if self.requests < self.failures:
+            self.requests += 1
+            raise TimeoutError(addr)
+        return super().__call__(addr)
+
+
+class TestGeoManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = GeoStore(f'{self.tmp.name}/geocodes.sqlite')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_resolve_many_dedupe(self):
+        geocoder = StaticGeocoder({'Olshausenstraße 40': (54.34, 10.12)})
+        manager = GeoManager('', geocoder=geocoder)
+        self.assertEqual({'Olshausenstraße 40': (54.34, 10.12), 'Nowhere 1': None, '': None},
+                         manager.resolve_many(['Olshausenstraße 40', 'Nowhere 1', 'Olshausenstraße 40', '']))
+        self.assertEqual(2, geocoder.requests, 'every address should be looked up once')
+        manager.resolve_many(['Olshausenstraße 40', 'Nowhere 1'])
+        self.assertEqual(2, geocoder.requests, 'resolved addresses should be cached')
+
+    def test_resolve_many_store(self):
+        self.store.store_many({'Olshausenstraße 40': (54.34, 10.12), 'Nowhere 1': None})
+        geocoder = StaticGeocoder({})
+        manager = GeoManager('', store=self.store, geocoder=geocoder)
+        self.assertEqual({'Olshausenstraße 40': (54.34, 10.12), 'Nowhere 1': None},
+                         manager.resolve_many(['Olshausenstraße 40', 'Nowhere 1']))
+        self.assertEqual(0, geocoder.requests, 'stored addresses should not be looked up')
+
+    def test_resolve_many_not_found(self):
+        geocoder = StaticGeocoder({})
+        self.assertEqual({'Nowhere 1': None},
+                         GeoManager('', store=self.store, geocoder=geocoder).resolve_many(['Nowhere 1']))
+        self.assertEqual({'Nowhere 1': None}, self.store.load_many(['Nowhere 1']),
+                         'an address that could not be found should be stored')
+        self.assertEqual({'Nowhere 1': None},
+                         GeoManager('', store=self.store, geocoder=geocoder).resolve_many(['Nowhere 1']))
+        self.assertEqual(1, geocoder.requests, 'an address that could not be found should not be looked up again')
+
+    def test_resolve_many_failed_request(self):
+        geocoder = FailingGeocoder({'Olshausenstraße 40': (54.34, 10.12)}, failures=1)
+        manager = GeoManager('', store=self.store, geocoder=geocoder)
+        with self.assertRaises(TimeoutError):
+            manager.resolve_many(['Olshausenstraße 40'])
+        self.assertNotIn('Olshausenstraße 40', manager.addr_to_coords)
+        self.assertEqual({}, self.store.load_many(['Olshausenstraße 40']), 'a failed request should not be stored')
+        self.assertEqual({'Olshausenstraße 40': (54.34, 10.12)}, manager.resolve_many(['Olshausenstraße 40']))
+        self.assertEqual(2, geocoder.requests)
+
+    def test_resolve_many_offline(self):
+        self.store.store_many({'Olshausenstraße 40': (54.34, 10.12)})
+        geocoder = StaticGeocoder({'Nowhere 1': (54.0, 10.0)})
+        manager = GeoManager('', store=self.store, geocoder=geocoder, online=False)
+        self.assertEqual({'Olshausenstraße 40': (54.34, 10.12), 'Nowhere 1': None},
+                         manager.resolve_many(['Olshausenstraße 40', 'Nowhere 1']))
+        self.assertEqual(0, geocoder.requests, 'no address should be looked up offline')
+        self.assertEqual({}, self.store.load_many(['Nowhere 1']), 'an address missing offline should not be stored')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import os
+import sys
+import tempfile
+import unittest
+from typing import Dict, List, Optional, Tuple
+
+from pyroutelib3 import Router
+from pyroutelib3.util import distHaversine
+
+# The modules are imported from the repository root like in the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from python.osmroute import RouteStore, RoutingService, shortest_paths  # noqa: E402
+
+
+def hand_built_router(positions: Dict[int, Tuple[float, float]],
+                      edges: List[Tuple[int, int, float, bool]]
+                      ) -> Router:
+    """
+    Creates a router with a hand-built graph instead of OSM data.
+
+    :param positions: The position (lat, lon) of every node
+    :param edges:     The edges (from node, to node, factor of the distance, both directions) of the graph, an edge
+                      with the factor 0 is not traversable
+    :return:          The router, which does not download any tiles
+    """
+    router = Router('foot')
+    router.localFile = True
+    router.rnodes.update(positions)
+    for a, b, factor, both in edges:
+        cost = distHaversine(positions[a], positions[b]) * factor
+        router.routing.setdefault(a, {})[b] = cost
+        if both:
+            router.routing.setdefault(b, {})[a] = cost
+    return router
+
+
+def path_cost(router: Router, path: List[int]) -> float:
+    """
+    Computes the cost of a path and checks that every edge of it is traversable.
+
+    :param router: The router
+    :param path:   The nodes of the path
+    :return:       The sum of the costs of the edges
+    """
+    costs = [router.routing[a][b] for a, b in zip(path[:-1], path[1:])]
+    assert all(cost > 0 for cost in costs)
+    return sum(costs)
+
+
+# A street 1-2-3-4 with a side street 2-5, one-way streets 4->6 and 5->6, a non-traversable edge 6->1 and the
+# unconnected node 7
+STREETS = {1: (54.32, 10.12), 2: (54.321, 10.12), 3: (54.322, 10.12), 4: (54.323, 10.12), 5: (54.321, 10.121),
+           6: (54.323, 10.121), 7: (54.33, 10.13)}
+STREET_EDGES = [(1, 2, 1.0, True), (2, 3, 1.0, True), (3, 4, 1.0, True), (2, 5, 1.0, True), (4, 6, 1.0, False),
+                (5, 6, 1.0, False), (6, 1, 0.0, False)]
+
+
+def weighted_grid(n: int) -> Router:
+    """
+    Creates a router with a grid of n x n nodes, whose edges cost up to twice their distance.
+
+    :param n: The number of nodes per row and column
+    :return:  The router
+    """
+    positions = {i * n + j + 1: (54.32 + i * 0.001, 10.12 + j * 0.001) for i in range(n) for j in range(n)}
+    edges = []
+    for i in range(n):
+        for j in range(n):
+            node, factor = i * n + j + 1, 1 + ((i * 7 + j * 3) % 5) / 4
+            if j + 1 < n:
+                edges.append((node, node + 1, factor, True))
+            if i + 1 < n:
+                edges.append((node, node + n, factor + 0.1, True))
+    return hand_built_router(positions, edges)
+
+
+class TestShortestPaths(unittest.TestCase):
+    def test_same_paths_as_do_route(self):
+        router = hand_built_router(STREETS, STREET_EDGES)
+        for source in STREETS:
+            paths = shortest_paths(router, source, set(STREETS))
+            for target in STREETS:
+                with self.subTest(source=source, target=target):
+                    status, route = router.doRoute(source, target)
+                    self.assertEqual(route if status == 'success' else None, paths.get(target))
+
+    def test_not_longer_than_do_route(self):
+        # The A* search of pyroutelib3 does not always find the shortest path if the costs are not proportional to
+        # the distances, so the paths are only compared by their costs
+        router = weighted_grid(5)
+        for source in router.rnodes:
+            paths = shortest_paths(router, source, set(router.rnodes))
+            self.assertSetEqual(set(router.rnodes), set(paths))
+            for target, path in paths.items():
+                with self.subTest(source=source, target=target):
+                    status, route = router.doRoute(source, target)
+                    self.assertEqual('success', status)
+                    self.assertEqual((source, target), (path[0], path[-1]))
+                    self.assertLessEqual(path_cost(router, path), path_cost(router, route) + 1e-9)
+
+    def test_stops_at_the_targets(self):
+        router = weighted_grid(5)
+        paths = shortest_paths(router, 1, {2})
+        self.assertDictEqual({2: [1, 2]}, paths)
+
+
+class TestBuildMatrix(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = RouteStore(os.path.join(self.tmp.name, 'routes.sqlite'))
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    @staticmethod
+    def service(store: Optional[RouteStore] = None) -> RoutingService:
+        service = RoutingService(store=store)
+        service._routers['foot'] = hand_built_router(STREETS, STREET_EDGES)
+        return service
+
+    def test_same_routes_as_route(self):
+        points = list(STREETS.values())
+        matrix = self.service(self.store)
+        self.assertEqual(len(points) * (len(points) - 1), matrix.build_matrix(points))
+        expected = self.service()
+        for start in points:
+            for end in points:
+                if start != end:
+                    with self.subTest(start=start, end=end):
+                        self.assertEqual(expected.route(*start, *end), matrix.route(*start, *end))
+
+    def test_missing_routes_are_stored(self):
+        points = list(STREETS.values())
+        self.service(self.store).build_matrix(points)
+        stored = self.store.load_all('foot')
+        self.assertEqual(len(points) * (len(points) - 1), len(stored))
+        self.assertIsNone(stored[('foot', *STREETS[6], *STREETS[1])])
+        self.assertIsNone(stored[('foot', *STREETS[1], *STREETS[7])])
+        self.assertIsNotNone(stored[('foot', *STREETS[1], *STREETS[6])])
+        # Nothing is routed again by another process
+        self.assertEqual(0, self.service(self.store).build_matrix(points))
+
+
+if __name__ == '__main__':
+    unittest.main()
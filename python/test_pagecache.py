@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+import sqlalchemy
+
+# The modules are imported from the repository root like in the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from python.pagecache import PageCache  # noqa: E402
+
+
+class TestPageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = sqlalchemy.create_engine(f'sqlite:///{self.tmp.name}/univis.db')
+        self.cache = PageCache(f'{self.tmp.name}/cache', self.db)
+
+    def tearDown(self):
+        self.db.dispose()
+        self.tmp.cleanup()
+
+    def test_memoize_none(self):
+        func = mock.Mock(return_value=None, __module__='test', __qualname__='func')
+        cached = self.cache.memoize()(func)
+        self.assertFalse(cached.is_cached())
+        self.assertIsNone(cached())
+        self.assertTrue(cached.is_cached())
+        self.assertIsNone(cached())
+        self.assertEqual(1, func.call_count, 'a None result should be cached as well')
+
+    def test_memoize_column_labels(self):
+        frame = pd.DataFrame({2022: [1, 2], ('a', 'b'): [3, 4], 'name': ['x', 'y']})
+        func = mock.Mock(return_value=frame, __module__='test', __qualname__='func')
+        cached = self.cache.memoize()(func)
+        pd.testing.assert_frame_equal(frame, cached())
+        # The second call loads the result from the cache
+        pd.testing.assert_frame_equal(frame, cached())
+        self.assertEqual(1, func.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,243 @@
+import copy
+import functools
+import os
+import re
+import tempfile
+import threading
 import unittest
+from typing import Dict, List, Union
 from unittest import mock
+import numpy as np
+import pandas as pd
+import requests
+import sqlalchemy
 import univis
 from urllib.parse import urlparse, parse_qs
 
 
+MOCKED_DTD = '<?xml version="1.0" encoding="UTF-8"?>\n' \
+             '<!-- UnivIS DTD -->\n' \
+             '<!ELEMENT UnivIS (Lecture*)>\n' \
+             '<!ELEMENT Lecture (name,ects?,dozs?)>\n' \
+             '<!ELEMENT name (#PCDATA)>\n' \
+             '<!ELEMENT ects (#PCDATA)>\n' \
+             '<!ELEMENT dozs (doz)+>\n' \
+             '<!ELEMENT doz (Person|UnivISRef)>\n'
+
+
+def mocked_lecture_response(*args, **kwargs):
+    """
+    Return a mocked response from the UnivIS API that contains overlapping lectures for every search term.
+
+    :param args:   The args to pass to the requests.get function.
+    :param kwargs: The kwargs to pass to the requests.get function.
+    """
+    client_req = urlparse(args[0])
+    query = parse_qs(client_req.query)
+    if client_req.path.endswith('univis.dtd') or 'name' not in query:
+        return mocked_univis_response(*args, **kwargs)
+
+    sem, name = query['sem'][0], query['name'][0]
+    lectures = ''.join(
+        f'<Lecture key="Lecture.{sem}.{i}"><name>{name} {i}</name><ects>{i}</ects>'
+        f'<dozs><doz><UnivISRef type="Person" key="Person.{i % 3}"/></doz></dozs></Lecture>'
+        for i in range(ord(name[-1]) % 5, ord(name[-1]) % 5 + 4)
+    )
+    text = f'<?xml version="1.0"?>\n<UnivIS version="1.6" semester="{sem}">{lectures}</UnivIS>\n'
+    return type('MockResponse', (), {'text': text, 'status_code': 200, 'url': args[0], 'headers': {}})
+
+
+def reference_sqlize_dfs(dfs: Dict[str, pd.DataFrame],
+                         semester: str,
+                         scheme: Dict[str, Dict[str, Union[bool, str, List[str]]]]
+                         ) -> Dict[str, pd.DataFrame]:
+    """
+    The former implementation of `univis.sqlize_dfs` that converted every cell on its own.
+
+    :param dfs:      The dataframes to convert.
+    :param semester: The semester to use.
+    :param scheme:   The scheme of the univis.
+    :return:         The SQL-friendly dataframes.
+    """
+    dfs_sql = {}
+    new_tables = []
+    for table_name, df in dfs.items():
+        # Clones the dataframe to avoid changing the original one.
+        df = df.copy()
+        for col in df:
+            # Add undocumented columns to the scheme
+            if col not in scheme:
+                scheme[col] = {
+                    'is_list': False,
+                    'is_ref': False,
+                    'type': 'TEXT',
+                    'attr': ['#PCDATA']
+                }
+                scheme[table_name]['attr'].append(col)
+
+            # Update the type of the scheme:
+            # If every element in the column is a number, the type must be a real number.
+            # If none of those numbers includes a decimal point, the type must be an integer.
+            if df[col].apply(lambda x: pd.isnull(x) or type(x) is str and bool(univis._is_number.match(x))).all():
+                scheme[col]['type'] = 'REAL'
+                if pd.to_numeric(df[col].fillna(0), errors='coerce').notnull().all():
+                    scheme[col]['type'] = 'INTEGER'
+
+            #  If every element in the column is a boolean, the type must be bool.
+            elif df[col].isin(['ja', 'nein', 'anon', np.nan]).all():
+                scheme[col]['type'] = 'BOOLEAN'
+
+            elif scheme[col]['is_list']:
+                for i in df.index:
+                    cell = df.at[i, col]
+
+                    # Skip nan values
+                    if type(cell) is not dict:
+                        continue
+
+                    attr = scheme[col]['attr'][0]
+                    tmp_cell = cell[attr]
+                    # Convert the cell to a list if it is not one already.
+                    if type(tmp_cell) is list:
+                        new_cell = tmp_cell
+                    else:
+                        new_cell = [tmp_cell]
+
+                    # Create new tables for the list if it does not exist.
+                    if col not in dfs_sql:
+                        dfs_sql[col] = pd.DataFrame()
+                        new_tables += [col]
+
+                    # Add the list items to the new table.
+                    for elem in new_cell:
+                        tmp = pd.DataFrame({'semester': [semester], '@key': [i]})
+                        if not scheme[attr]['is_ref'] and type(elem) is dict:
+                            for k, v in elem.items():
+                                tmp[k] = [v]
+                                if k not in scheme[attr]['attr']:
+                                    scheme[attr]['attr'].append(k)
+                        else:
+                            tmp[attr] = [elem]
+                        dfs_sql[col] = pd.concat([dfs_sql[col], tmp])
+                df = df.drop(col, axis=1)  # Remove the list column from the table.
+            else:
+                is_ref = True
+                for i in df.index:
+                    cell = df.at[i, col]
+                    if not (pd.isnull(cell) or type(cell) is dict and 'UnivISRef' in cell):
+                        is_ref = False
+                        break
+                scheme[col]['is_ref'] = is_ref
+            # Handle references.
+            if scheme[col]['is_ref']:
+                for i in df.index:
+                    cell = df.at[i, col]
+                    if type(cell) is dict:
+                        df.at[i, col] = cell['UnivISRef']['@key']
+                        scheme[col]['attr'] = [cell['UnivISRef']['@type']]
+            # Convert the columns values to their type.
+            match scheme[col]['type']:
+                case 'BOOLEAN':
+                    df[col] = df[col].map({'ja': True, 'nein': False, 'anon': None, np.nan: None})
+                case 'REAL':
+                    df[col] = pd.to_numeric(df[col].str.replace(',', '.'), downcast='float')
+                case 'INTEGER':
+                    df[col] = pd.to_numeric(df[col].str.split(',', 1).str[0], downcast='integer')
+
+        df['semester'] = semester
+        # Reset index and only keep it if the index was set to '@key'.
+        dfs_sql[table_name] = df.reset_index(level=0, drop=df.index.name != '@key')
+
+    # Handle the newly created dataframes.
+    if len(new_tables) > 0:
+        tmp_dfs = {}
+        for table_name in new_tables:
+            tmp_dfs[table_name] = dfs_sql[table_name].reset_index(drop=True)
+        tmp_dfs = reference_sqlize_dfs(tmp_dfs, semester, scheme)
+        for table_name in tmp_dfs:
+            dfs_sql[table_name] = tmp_dfs[table_name]
+    return dfs_sql
+
+
+def synthetic_lectures(n: int) -> Dict[str, pd.DataFrame]:
+    """
+    Return dataframes like `UnivIS.find_all` collects them, including numbers, booleans, references and lists.
+
+    :param n: The number of lectures.
+    :return:  The dataframes of the Lecture and the Person table.
+    """
+    lectures = []
+    for i in range(n):
+        lecture = {'@key': f'Lecture.{i}', 'name': f'Lecture {i}', 'ects': [None, '5', '2,5'][i % 3],
+                   'sws': str(i % 4), 'benefit': ['ja', 'nein', None, 'anon'][i % 4], 'short': None}
+        if i % 5:
+            lecture['orgunit'] = {'UnivISRef': {'@type': 'Org', '@key': f'Org.{i % 7}'}}
+        terms = [{'starttime': f'{8 + j}:00', 'room': {'UnivISRef': {'@type': 'Room', '@key': f'Room.{j}'}}}
+                 for j in range(i % 3)]
+        if i % 6 == 1:
+            terms[0]['exclude'] = f'{i}.1.2022'
+        if terms:
+            lecture['terms'] = {'term': terms if len(terms) > 1 else terms[0]}
+        if i % 4:
+            dozs = [{'UnivISRef': {'@type': 'Person', '@key': f'Person.{j}'}} for j in range(i % 4)]
+            lecture['dozs'] = {'doz': dozs if len(dozs) > 1 else dozs[0]}
+        lectures.append(lecture)
+    persons = [{'@key': f'Person.{i}', 'lastname': f'Name {i}', 'title': None if i % 2 else 'Prof.'}
+               for i in range(n // 2 + 1)]
+    return {
+        'Lecture': pd.DataFrame().from_records(lectures).set_index(['@key']),
+        'Person': pd.DataFrame().from_records(persons).set_index(['@key']),
+    }
+
+
+def synthetic_scheme() -> Dict[str, Dict[str, Union[bool, str, List[str]]]]:
+    """
+    Return the UnivIS scheme of the synthetic lectures.
+
+    :return: The scheme.
+    """
+    def entry(attr: List[str], is_list: bool = False, is_ref: bool = False):
+        return {'is_list': is_list, 'is_ref': is_ref, 'type': 'TEXT', 'attr': attr}
+
+    return {
+        'Lecture': entry(['name', 'ects', 'sws', 'benefit', 'short', 'orgunit', 'terms', 'dozs']),
+        'Person': entry(['lastname', 'title']),
+        'name': entry(['#PCDATA']), 'ects': entry(['#PCDATA']), 'sws': entry(['#PCDATA']),
+        'benefit': entry(['#PCDATA']), 'short': entry(['#PCDATA']), 'lastname': entry(['#PCDATA']),
+        'title': entry(['#PCDATA']), 'starttime': entry(['#PCDATA']),
+        'orgunit': entry(['Org'], is_ref=True), 'room': entry(['Room'], is_ref=True),
+        'terms': entry(['term'], is_list=True), 'term': entry(['starttime', 'room']),
+        'dozs': entry(['doz'], is_list=True), 'doz': entry(['Person'], is_ref=True),
+    }
+
+
+def mocked_prefix_response(*args, names: List[str] = None, **kwargs):
+    """
+    Return a mocked response from the UnivIS API that finds lectures by a regex of the start of their name (or by a
+    substring) and asks to narrow the search if there are more than three results.
+
+    :param args:   The args to pass to the requests.get function.
+    :param names:  The names of the lectures.
+    :param kwargs: The kwargs to pass to the requests.get function.
+    """
+    client_req = urlparse(args[0])
+    query = parse_qs(client_req.query)
+    if client_req.path.endswith('univis.dtd') or 'name' not in query:
+        return mocked_univis_response(*args, **kwargs)
+
+    if names is None:
+        names = ['algebra', 'analysis', 'analysis 2', 'anatomie', 'biologie', 'chemie', 'chemie 2', 'zoologie']
+    term = query['name'][0]
+    found = [(i, n) for i, n in enumerate(names) if (re.match(term, n) if term.startswith('^') else term in n)]
+    if len(found) > 3:
+        text = f'<html><body>{"<td></td>"*40}<td><b>UnivIS error, command \'search\':</b><br>please narrow your ' \
+               f'search!</td></body></html>'
+    else:
+        lectures = ''.join(f'<Lecture key="Lecture.{i}"><name>{n}</name></Lecture>' for i, n in found)
+        text = f'<?xml version="1.0"?>\n<UnivIS version="1.6" semester="2022s">{lectures}</UnivIS>\n'
+    return type('MockResponse', (), {'text': text, 'status_code': 200, 'url': args[0], 'headers': {}})
+
+
 def mocked_univis_response(*args, **kwargs):
     """
     Return a mocked response from the UnivIS API.
@@ -16,9 +250,12 @@ def mocked_univis_response(*args, **kwargs):
             self.text = text
             self.status_code = status_code
             self.url = url
+            self.headers = {}
 
     client_req = urlparse(args[0])
 
+    if client_req.path.endswith('univis.dtd'):
+        return MockResponse(args[0], MOCKED_DTD, 200)
     if client_req.path == '/':
         options = ''.join([f'<option value="{s}">{s}s</option>' for s in ['2023s', '2022w', '2022s']])
         return MockResponse(args[0], f'<html><body><select name="semto">{options}</select></body></html>', 200)
@@ -91,6 +328,25 @@ class TestUnivIS(unittest.TestCase):
         with self.assertRaises(univis.UnivISException):
             univis.UnivIS().search(search_type=univis.SearchType.LECTURES, sem='2022w')
 
+    @mock.patch('requests.get', side_effect=mocked_univis_response)
+    def test_scheme(self, mock_get):
+        with tempfile.TemporaryDirectory() as cache_path:
+            cache_path += '/'
+            instance = univis.UnivIS(cache_path=cache_path, cache_ttl=0)
+            self.assertEqual(0, mock_get.call_count, 'the scheme should be fetched on first use')
+            self.assertTrue(instance.scheme['dozs']['is_list'])
+            self.assertEqual(1, mock_get.call_count)
+            instance.scheme['ects']['type'] = 'INTEGER'
+            instance.save_scheme(f'{cache_path}scheme.json')
+
+            # The expired DTD is used, if UnivIS can not be reached
+            mock_get.side_effect = requests.ConnectionError()
+            offline = univis.UnivIS(cache_path=cache_path, cache_ttl=0)
+            self.assertEqual('TEXT', offline.scheme['ects']['type'])
+            self.assertEqual(instance.scheme_version, offline.scheme_version)
+            offline.load_scheme(f'{cache_path}scheme.json')
+            self.assertEqual(instance.scheme, offline.scheme)
+
     @mock.patch('requests.get', side_effect=mocked_univis_response)
     def test_get_all_semesters(self, mock_get):
         self.assertEqual(set(univis.UnivIS().get_all_semesters()), {'2022s', '2022w', '2023s'})
@@ -110,6 +366,398 @@ class TestUnivIS(unittest.TestCase):
         self.assertIn(mock.call(42), mock_sleep.call_args_list, 'sleep should be called with 42')
         self.assertEqual(8, mock_sleep.call_count, 'sleep should be called before every search)')
 
+    @mock.patch('requests.get', side_effect=mocked_lecture_response)
+    @mock.patch('time.sleep')
+    def test_find_all_concurrent(self, mock_sleep, mock_get):
+        kwargs = {
+            'search_types': [univis.SearchType.LECTURES, univis.SearchType.THESIS],
+            'semesters': ['2022s', 'test', '2023s'],
+            'search_terms': ['^a', '^b', '^c', '^d', '^e', '^f'],
+            'sleep_freq': (0, 10)
+        }
+        sequential = univis.UnivIS().find_all(**kwargs)
+        concurrent = univis.UnivIS().find_all(workers=4, **kwargs)
+        self.assertEqual(sequential.keys(), concurrent.keys())
+        for semester in sequential:
+            self.assertEqual(sequential[semester].keys(), concurrent[semester].keys())
+            for table in sequential[semester]:
+                pd.testing.assert_frame_equal(sequential[semester][table], concurrent[semester][table])
+        self.assertEqual(0, mock_sleep.call_count, 'sleep should not be called without a rate limit')
+
+    @mock.patch('requests.get', side_effect=mocked_lecture_response)
+    def test_find_all_concurrent_cache_stats(self, mock_get):
+        kwargs = {
+            'search_types': [univis.SearchType.LECTURES],
+            'semesters': ['2022s', '2023s'],
+            'search_terms': [f'^{c}' for c in 'abcdefghijklmnopqrstuvwxyz'],
+            'sleep_freq': (0, 10)
+        }
+        with tempfile.TemporaryDirectory() as cache_path:
+            instance = univis.UnivIS(cache_path=cache_path + '/')
+            instance.find_all(workers=8, **kwargs)
+            instance.find_all(workers=8, **kwargs)
+        # Every response of the worker threads is counted exactly once (and the database scheme is downloaded once)
+        self.assertEqual({'hits': 52, 'not_modified': 0, 'unchanged': 0, 'downloads': 53}, instance.cache_stats)
+        self.assertEqual(53, mock_get.call_count)
+
+    @mock.patch('time.sleep')
+    def test_find_all_concurrent_cancel(self, mock_sleep):
+        search_terms = [f'^{c}' for c in 'abcdefghijklmnopqrst']
+        kwargs = {
+            'semesters': ['test', '2023s'],
+            'search_terms': search_terms,
+            'sleep_freq': (0, 10)
+        }
+
+        def slow_error_response(*args, **kwargs):
+            # Delay the errors, so that the queued requests are not finished before they are cancelled
+            query = parse_qs(urlparse(args[0]).query)
+            if 'name' in query and (query['search'][0] == 'thesis' or not query['sem'][0][0].isdigit()):
+                threading.Event().wait(0.05)
+                return mocked_univis_response(*args, **kwargs)
+            return mocked_lecture_response(*args, **kwargs)
+
+        with mock.patch('requests.get', side_effect=slow_error_response):
+            expected = univis.UnivIS().find_all(search_types=[univis.SearchType.LECTURES], **kwargs)
+        with mock.patch('requests.get', side_effect=slow_error_response) as mock_get:
+            result = univis.UnivIS().find_all(search_types=[univis.SearchType.THESIS, univis.SearchType.LECTURES],
+                                              workers=2, **kwargs)
+        urls = [c.args[0] for c in mock_get.call_args_list]
+        invalid_db = [url for url in urls if 'search=thesis' in url]
+        invalid_semester = [url for url in urls if 'search=lectures' in url and 'sem=test' in url]
+        self.assertLess(len(invalid_db), len(search_terms), 'the requests after an invalid database are cancelled')
+        self.assertLess(len(invalid_semester), len(search_terms),
+                        'the requests of an invalid semester are cancelled')
+        self.assertEqual(expected.keys(), result.keys())
+        for table in expected['2023s']:
+            pd.testing.assert_frame_equal(expected['2023s'][table], result['2023s'][table])
+
+    @mock.patch('time.sleep')
+    def test_find_all_checkpoint(self, mock_sleep):
+        kwargs = {
+            'search_types': [univis.SearchType.LECTURES],
+            'semesters': ['2022s', '2023s'],
+            'search_terms': ['^a', '^b', '^c'],
+        }
+
+        def interrupted_response(*args, **kwargs):
+            if 'sem=2023s' in args[0] and 'name=%5Eb' in args[0]:
+                raise requests.ConnectionError()
+            return mocked_lecture_response(*args, **kwargs)
+
+        with mock.patch('requests.get', side_effect=mocked_lecture_response):
+            expected = univis.UnivIS().find_all(**kwargs)
+
+        with tempfile.TemporaryDirectory() as cache_path:
+            cache_path += '/'
+            with mock.patch('requests.get', side_effect=interrupted_response):
+                with self.assertRaises(requests.ConnectionError):
+                    univis.UnivIS(cache_path=cache_path).find_all(checkpoint=True, **kwargs)
+            self.assertTrue(os.path.exists(f'{cache_path}checkpoint.sqlite'))
+
+            # Remove the response cache, so only the checkpoint can prevent repeated requests.
+            for fn in os.listdir(cache_path):
+                if fn.endswith('.json.gz'):
+                    os.remove(f'{cache_path}{fn}')
+            with mock.patch('requests.get', side_effect=mocked_lecture_response) as mock_get:
+                resumed = univis.UnivIS(cache_path=cache_path).find_all(checkpoint=True, **kwargs)
+                searches = [c for c in mock_get.call_args_list if 'search=' in c.args[0]]
+                self.assertEqual(2, len(searches), 'only the unfinished requests should be sent again')
+            self.assertFalse(os.path.exists(f'{cache_path}checkpoint.sqlite'))
+
+        for semester in expected:
+            for table in expected[semester]:
+                pd.testing.assert_frame_equal(expected[semester][table], resumed[semester][table])
+
+    @mock.patch('requests.get', side_effect=mocked_lecture_response)
+    @mock.patch('time.sleep')
+    def test_stream_univis_to_sql(self, mock_sleep, mock_get):
+        kwargs = {
+            'search_types': [univis.SearchType.LECTURES, univis.SearchType.THESIS],
+            'semesters': ['2022s', 'test', '2023s'],
+            'search_terms': ['^a', '^b', '^c', '^d'],
+        }
+        with tempfile.TemporaryDirectory() as path:
+            db = sqlalchemy.create_engine(f'sqlite:///{path}/univis.db')
+            instance = univis.UnivIS()
+            dfs = instance.find_all(**kwargs)
+            # Use the types that were inferred by `find_all`
+            univis.stream_univis_to_sql(instance, db, **kwargs)
+            with db.connect() as con:
+                for table in ['Lecture', 'dozs']:
+                    result = pd.read_sql(f'SELECT * FROM `{table}`', con)
+                    expected = dfs['all'][table]
+                    pd.testing.assert_frame_equal(expected[result.columns].reset_index(drop=True), result,
+                                                  check_dtype=False)
+            db.dispose()
+
+    @mock.patch('requests.get', side_effect=mocked_lecture_response)
+    @mock.patch('time.sleep')
+    def test_stream_univis_to_sql_types(self, mock_sleep, mock_get):
+        kwargs = {
+            'search_types': [univis.SearchType.LECTURES],
+            'semesters': ['2022s', '2023s'],
+            'search_terms': ['^a', '^b', '^c', '^d'],
+        }
+        with tempfile.TemporaryDirectory() as path:
+            batch_db = sqlalchemy.create_engine(f'sqlite:///{path}/batch.db')
+            stream_db = sqlalchemy.create_engine(f'sqlite:///{path}/stream.db')
+            with self.assertRaises(ValueError, msg='the DTD alone has no types'):
+                univis.stream_univis_to_sql(univis.UnivIS(), stream_db, **kwargs)
+
+            instance = univis.UnivIS()
+            dfs = instance.find_all(**kwargs)
+            with batch_db.connect() as con:
+                univis.create_tables(con, instance.scheme)
+            for table, df in dfs['all'].items():
+                df.to_sql(name=table, con=batch_db, if_exists='append', index=False)
+            instance.save_scheme(f'{path}/scheme.json')
+
+            fresh = univis.UnivIS()
+            fresh.load_scheme(f'{path}/scheme.json')
+            univis.stream_univis_to_sql(fresh, stream_db, **kwargs)
+            for table in ['Lecture', 'dozs']:
+                query = f'SELECT * FROM `{table}` ORDER BY semester, `@key`, rowid'
+                with batch_db.connect() as con:
+                    expected = pd.read_sql(query, con)
+                with stream_db.connect() as con:
+                    result = pd.read_sql(query, con)
+                pd.testing.assert_frame_equal(expected, result)
+                if table == 'Lecture':
+                    self.assertTrue(pd.api.types.is_integer_dtype(result['ects']), 'ects should be stored as integer')
+            batch_db.dispose()
+            stream_db.dispose()
+
+    @mock.patch('requests.get', side_effect=mocked_prefix_response)
+    @mock.patch('time.sleep')
+    def test_find_all_adaptive(self, mock_sleep, mock_get):
+        instance = univis.UnivIS()
+        dfs = instance.find_all(search_types=[univis.SearchType.LECTURES], semesters=['2022s'], sqlize=False,
+                                adaptive=True)
+        self.assertEqual(8, len(dfs['2022s']['Lecture']))
+        self.assertEqual({'requests': 1, 'records': 0, 'duplicates': 0, 'narrowed': 1, 'errors': 0},
+                         instance.term_stats['^'])
+        self.assertEqual(1, instance.term_stats['^a']['narrowed'])
+        self.assertEqual(3, instance.term_stats['^an']['records'])
+        searches = [c for c in mock_get.call_args_list if 'search=' in c.args[0]]
+        # '^' and '^a' are narrowed, every other search is sent once
+        self.assertEqual(1 + len(univis._fallback_terms) + 2 * len(univis._prefix_alphabet), len(searches))
+
+    @mock.patch('time.sleep')
+    def test_find_all_adaptive_space(self, mock_sleep):
+        names = ['it sicherheit', 'it recht', 'it management', 'itil', 'informatik', '(c) recht', '[1] seminar']
+        with mock.patch('requests.get', side_effect=functools.partial(mocked_prefix_response, names=names)):
+            instance = univis.UnivIS()
+            dfs = instance.find_all(search_types=[univis.SearchType.LECTURES], semesters=['2022s'], sqlize=False,
+                                    adaptive=True)
+        # '[1] seminar' is only found by the unanchored fallback term '1'
+        self.assertEqual(sorted(names), sorted(dfs['2022s']['Lecture']['name']))
+        self.assertEqual(3, instance.term_stats['^it ']['records'])
+        self.assertEqual(1, instance.term_stats['^[(]']['records'])
+
+    @mock.patch('requests.get', side_effect=mocked_prefix_response)
+    @mock.patch('time.sleep')
+    def test_find_all_adaptive_max_prefix_length(self, mock_sleep, mock_get):
+        instance = univis.UnivIS()
+        with mock.patch.object(univis, '_max_prefix_length', 2), self.assertWarns(UserWarning):
+            dfs = instance.find_all(search_types=[univis.SearchType.LECTURES], semesters=['2022s'], sqlize=False,
+                                    adaptive=True)
+        # The lectures starting with 'a' are missing, because '^a' cannot be narrowed ('analysis 2' is found by '2')
+        self.assertEqual(5, len(dfs['2022s']['Lecture']))
+        self.assertEqual({'requests': 1, 'records': 0, 'duplicates': 0, 'narrowed': 1, 'errors': 1},
+                         instance.term_stats['^a'])
+
+    @mock.patch('time.sleep')
+    def test_search_cache(self, mock_sleep):
+        for backend in ['directory', 'sqlite']:
+            with self.subTest(backend=backend):
+                self._test_search_cache(backend)
+
+    def _test_search_cache(self, backend):
+        def etag_response(*args, **kwargs):
+            resp = mocked_lecture_response(*args, **kwargs)
+            resp.headers = {'ETag': '"v1"'}
+            if kwargs.get('headers', {}).get('If-None-Match') == '"v1"':
+                resp.status_code, resp.text = 304, ''
+            return resp
+
+        current = univis.current_semester()
+        with tempfile.TemporaryDirectory() as cache_path, \
+                mock.patch('requests.get', side_effect=etag_response) as mock_get:
+            instance = univis.UnivIS(cache_path=cache_path + '/', cache_ttl=0, cache_backend=backend)
+            for semester in ['2022s', current, '2022s', current]:
+                res = instance.search(univis.SearchType.LECTURES, sem=semester, name='^a')
+                self.assertEqual(4, len(res['UnivIS']['Lecture']))
+            self.assertEqual({'hits': 1, 'not_modified': 1, 'unchanged': 0, 'downloads': 2}, instance.cache_stats)
+            self.assertEqual({'If-None-Match': '"v1"'}, mock_get.call_args.kwargs['headers'])
+
+            self.assertEqual(1, instance.response_cache.invalidate('2022s'))
+            instance.search(univis.SearchType.LECTURES, sem='2022s', name='^a')
+            self.assertEqual(2, instance.cache_stats['not_modified'])
+
+    def test_migrate_cache(self):
+        with tempfile.TemporaryDirectory() as cache_path:
+            cache_path += '/'
+            directory = univis.DirectoryCacheBackend(cache_path)
+            urls = [f'https://univis.uni-kiel.de/prg?show=xml&search=lectures&sem=2022s&name={c}' for c in 'abc']
+            for url in urls[:2]:
+                directory.store(url, univis.ResponseCache.entry(url, f'<?xml version="1.0"?>{url}'))
+            # A file of the former cache format
+            with open(f'{directory._file(urls[2])}.json', 'w') as f:
+                univis.json.dump('<?xml version="1.0"?>legacy', f)
+
+            self.assertEqual(3, univis.migrate_cache(cache_path))
+            packed = univis.SQLiteCacheBackend(f'{cache_path}responses.sqlite')
+            self.assertEqual(set(urls), set(packed.urls()))
+            for url in urls:
+                self.assertEqual(directory.load(url), packed.load(url))
+            self.assertEqual(3, packed.invalidate('2022s'))
+            self.assertTrue(packed.load(urls[0])['expired'])
+
+    def test_is_past_semester(self):
+        today = univis.datetime.date(2023, 1, 15)
+        self.assertEqual('2022w', univis.current_semester(today))
+        self.assertEqual('2023s', univis.current_semester(univis.datetime.date(2023, 4, 1)))
+        self.assertTrue(univis.is_past_semester('2022s', today))
+        self.assertFalse(univis.is_past_semester('2022w', today))
+        self.assertFalse(univis.is_past_semester('2023s', today))
+        self.assertFalse(univis.is_past_semester('test', today))
+
+    @mock.patch('requests.get', side_effect=mocked_lecture_response)
+    @mock.patch('time.sleep')
+    def test_sync_univis_to_sql(self, mock_sleep, mock_get):
+        current = univis.current_semester()
+        kwargs = {'search_types': [univis.SearchType.LECTURES], 'search_terms': ['^a', '^b']}
+        with tempfile.TemporaryDirectory() as path:
+            db = sqlalchemy.create_engine(f'sqlite:///{path}/univis.db')
+            instance = univis.UnivIS()
+            self.assertEqual(['2022s', current], univis.sync_univis_to_sql(instance, db, ['2022s', current], **kwargs))
+            with db.connect() as con:
+                expected = pd.read_sql('SELECT * FROM Lecture ORDER BY semester, `@key`', con)
+
+            mock_get.reset_mock()
+            self.assertEqual([current], univis.sync_univis_to_sql(instance, db, ['2022s', current], **kwargs))
+            self.assertFalse([c for c in mock_get.call_args_list if 'sem=2022s' in c.args[0]])
+            with db.connect() as con:
+                result = pd.read_sql('SELECT * FROM Lecture ORDER BY semester, `@key`', con)
+            pd.testing.assert_frame_equal(expected, result)
+            db.dispose()
+
+    @mock.patch('requests.get', side_effect=mocked_lecture_response)
+    @mock.patch('time.sleep')
+    def test_sync_univis_to_sql_keeps_other_tables(self, mock_sleep, mock_get):
+        current = univis.current_semester()
+        kwargs = {'search_types': [univis.SearchType.LECTURES], 'search_terms': ['^a', '^b']}
+        with tempfile.TemporaryDirectory() as path:
+            db = sqlalchemy.create_engine(f'sqlite:///{path}/univis.db')
+            with db.begin() as con:
+                con.execute('CREATE TABLE lecture_facts (semester TEXT, key TEXT)')
+                con.execute('INSERT INTO lecture_facts VALUES (?, ?)', (current, 'derived'))
+            self.assertEqual([current], univis.sync_univis_to_sql(univis.UnivIS(), db, [current], **kwargs))
+            with db.connect() as con:
+                self.assertEqual([(current, 'derived')], con.execute('SELECT * FROM lecture_facts').fetchall())
+            db.dispose()
+
+    @mock.patch('time.sleep')
+    def test_sync_univis_to_sql_failed_searches(self, mock_sleep):
+        current = univis.current_semester()
+        kwargs = {'search_types': [univis.SearchType.LECTURES], 'search_terms': ['^a', '^b']}
+
+        def failing_response(*args, **kwargs):
+            if 'name=' not in args[0]:
+                return mocked_lecture_response(*args, **kwargs)
+            text = f'<html><body>{"<td></td>" * 40}<td><b>UnivIS error, command \'search\':</b><br>internal ' \
+                   f'error</td></body></html>'
+            return type('MockResponse', (), {'text': text, 'status_code': 200, 'url': args[0], 'headers': {}})
+
+        with tempfile.TemporaryDirectory() as path:
+            db = sqlalchemy.create_engine(f'sqlite:///{path}/univis.db')
+            with mock.patch('requests.get', side_effect=mocked_lecture_response):
+                self.assertEqual([current], univis.sync_univis_to_sql(univis.UnivIS(), db, [current], **kwargs))
+            with db.connect() as con:
+                expected = pd.read_sql('SELECT * FROM Lecture ORDER BY semester, `@key`', con)
+
+            instance = univis.UnivIS()
+            with mock.patch('requests.get', side_effect=failing_response):
+                self.assertEqual([], univis.sync_univis_to_sql(instance, db, [current], **kwargs))
+            self.assertEqual(1, instance.term_stats['^a']['errors'])
+            with db.connect() as con:
+                result = pd.read_sql('SELECT * FROM Lecture ORDER BY semester, `@key`', con)
+            pd.testing.assert_frame_equal(expected, result)
+            db.dispose()
+
+    def test_create_indexes(self):
+        scheme = synthetic_scheme()
+        self.assertEqual({
+            'Lecture': {'ix_Lecture_key': (True, ['semester', '@key']),
+                        'ix_Lecture_orgunit': (False, ['orgunit', 'semester'])},
+            'Person': {'ix_Person_key': (True, ['semester', '@key'])},
+            'terms': {'ix_terms_key': (False, ['semester', '@key']), 'ix_terms_room': (False, ['room', 'semester'])},
+            'dozs': {'ix_dozs_key': (False, ['semester', '@key']), 'ix_dozs_doz': (False, ['doz', 'semester'])},
+        }, univis.generate_sql_indexes(scheme))
+
+        with tempfile.TemporaryDirectory() as path:
+            db = sqlalchemy.create_engine(f'sqlite:///{path}/univis.db')
+            with db.connect() as con:
+                univis.create_tables(con, scheme, indexes=False)
+                con.execute("INSERT INTO Lecture (semester, `@key`) "
+                            "VALUES ('2022s', 'Lecture.1'), ('2022s', 'Lecture.1')")
+            self.assertEqual(7, univis.add_indexes(db, scheme))
+            self.assertEqual(0, univis.add_indexes(db, scheme))
+            with db.connect() as con:
+                indexes = {row[1]: row[2] for row in con.execute('PRAGMA index_list(`Person`)')}
+                self.assertEqual({'ix_Person_key': 1}, indexes)
+                # The duplicate record prevents a unique index
+                indexes = {row[1]: row[2] for row in con.execute('PRAGMA index_list(`Lecture`)')}
+                self.assertEqual({'ix_Lecture_key': 0, 'ix_Lecture_orgunit': 0}, indexes)
+                plan = ' '.join(row[3] for row in con.execute(
+                    "EXPLAIN QUERY PLAN SELECT * FROM dozs d "
+                    "JOIN Person P ON d.doz = P.`@key` AND d.semester = P.semester "
+                    "WHERE d.semester = '2022s' AND d.`@key` = 'Lecture.1'"))
+                self.assertIn('ix_dozs_key', plan)
+                self.assertIn('ix_Person_key', plan)
+            db.dispose()
+
+    def test_record_buffer(self):
+        responses = [
+            [{'@key': 'a', 'name': 'A', 'ects': '5'}, {'@key': 'b', 'name': 'B'}],
+            [{'@key': 'c', 'ects': '4', 'dozs': {'doz': 'x'}}, {'@key': 'a', 'name': 'A2', 'short': 'a'}],
+            [{'@key': 'b', 'name': 'B2'}, {'@key': 'd', 'name': None}],
+        ]
+        expected = pd.DataFrame()
+        buffer = univis.RecordBuffer()
+        for records in responses:
+            new_df = pd.concat([expected, pd.DataFrame().from_records(records).set_index(['@key'])])
+            expected = new_df[~new_df.index.duplicated(keep='first')]
+            buffer.add(records)
+        pd.testing.assert_frame_equal(expected, buffer.to_df())
+
+    def test_sqlize_dfs(self):
+        dfs = synthetic_lectures(60)
+        scheme, expected_scheme = synthetic_scheme(), synthetic_scheme()
+        expected = reference_sqlize_dfs(copy.deepcopy(dfs), '2022s', expected_scheme)
+        result = univis.sqlize_dfs(dfs, '2022s', scheme)
+        self.assertEqual(list(expected), list(result))
+        for table in expected:
+            pd.testing.assert_frame_equal(expected[table], result[table])
+        self.assertEqual(expected_scheme, scheme)
+        pd.testing.assert_frame_equal(synthetic_lectures(60)['Lecture'], dfs['Lecture'])
+
+    @mock.patch('time.sleep')
+    @mock.patch('time.monotonic', return_value=0)
+    def test_token_bucket(self, mock_monotonic, mock_sleep):
+        bucket = univis.TokenBucket(2, 4)
+        for _ in range(4):
+            bucket.acquire()
+        self.assertEqual(0, mock_sleep.call_count, 'the first requests should not wait')
+        bucket.acquire()
+        bucket.acquire()
+        self.assertEqual([mock.call(0.5), mock.call(1.0)], mock_sleep.call_args_list)
+        # After one second two tokens are refilled, but both of them were already reserved.
+        mock_monotonic.return_value = 1
+        bucket.acquire()
+        self.assertEqual(mock.call(0.5), mock_sleep.call_args)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,4 +1,7 @@
 import base64
+import datetime
+import gzip
+import hashlib
 import json
 import os
 import numpy as np
@@ -11,9 +14,16 @@ from bs4 import BeautifulSoup
 from enum import Enum
 import re
 import string
-from typing import List, Dict, Any, Union, Tuple, Optional
+from typing import List, Dict, Any, Union, Tuple, Optional, Iterable, Deque
 import sqlalchemy
+import sqlite3
 import textwrap
+import threading
+import warnings
+import xml.etree.ElementTree as ET
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 
 # A regex to check if a string is a real number
 _is_number = re.compile(r"^\d*[.,]?\d*$")
@@ -21,6 +31,25 @@ _is_number = re.compile(r"^\d*[.,]?\d*$")
 # A regex to check if a string is an univis reference and to extract the reference type
 _is_univisref = re.compile(r"\((.*)\|UnivISRef\)")
 
+# The characters that are appended to a search term, if UnivIS asks to narrow the search. Names that continue with
+# other characters are only found by the fallback terms.
+_prefix_alphabet = string.ascii_lowercase + string.digits + 'äöüßé' + ' .,:;!?&+-_*/()\'"'
+
+# The characters that have a meaning in a regex, an anchored term matches them in brackets (e.g. '^[(]')
+_regex_chars = '.?+*()'
+
+# The search terms that are not anchored, they find names that contain these characters anywhere
+_fallback_terms = list(string.digits) + list('()*/\'"!-,:')
+
+# The maximum length of a search term that is narrowed by appending characters (a bracket counts as one character)
+_max_prefix_length = 4
+
+# A regex to split a search term into its characters
+_term_chars = re.compile(r'\[.\]|.')
+
+# Columns that are no references but are used to join tables, they are indexed like references
+_lookup_columns = {'Room': ['address'], 'orgunits': ['orgunit'], 'Event': ['dbref']}
+
 
 class UnivISException(Exception):
     """
@@ -35,6 +64,8 @@ class UnivISException(Exception):
         :param url:     The URL that was requested.
         """
         self.message = f'{message} ({url})'
+        self.univis_message = message
+        self.url = url
         super().__init__(self.message)
 
     @classmethod
@@ -58,6 +89,9 @@ class UnivISException(Exception):
         if univis_msg.startswith('semester'):
             return UnivISInvalidSemesterException(univis_msg, response_url)
 
+        if univis_msg.startswith('please narrow'):
+            return UnivISNarrowSearchException(univis_msg, response_url)
+
         return cls(univis_msg, response_url)
 
 
@@ -75,6 +109,455 @@ class UnivISInvalidSemesterException(UnivISException):
     pass
 
 
+class UnivISNarrowSearchException(UnivISException):
+    """
+    A custom exception to handle errors from the UnivIS API when a search has too many results.
+    """
+    pass
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket to limit the rate of requests to UnivIS.
+    """
+
+    def __init__(self, seconds: float, requests: int):
+        """
+        Initialize the token bucket.
+
+        :param seconds:  The length of the refill period in seconds. If it is not positive, requests are not limited.
+        :param requests: The number of requests that may be sent per period without waiting (the capacity).
+        """
+        self.seconds = seconds
+        self.capacity = requests
+        # At least one token is refilled per period, so a capacity of 0 means one request per period.
+        self.rate = max(requests, 1) / seconds if seconds > 0 else None
+        self.tokens = float(requests)
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take a token from the bucket and sleep until it is available.
+        """
+        if self.rate is None:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            # The token is reserved even if it is not available yet, so waiting threads are served in order.
+            self.tokens -= 1
+            wait = -self.tokens / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+
+class CrawlCheckpoint:
+    """
+    A journal of finished UnivIS requests, so an interrupted crawl can be resumed without sending them again.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the journal.
+
+        :param path: The path of the SQLite file to store the journal in.
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.con = sqlite3.connect(path, check_same_thread=False)
+        with self.con:
+            self.con.execute('CREATE TABLE IF NOT EXISTS requests ('
+                             'search_type TEXT NOT NULL, '
+                             'semester TEXT NOT NULL, '
+                             'term TEXT NOT NULL, '
+                             'response TEXT, '
+                             'error TEXT, '
+                             'message TEXT, '
+                             'url TEXT, '
+                             'PRIMARY KEY (search_type, semester, term))')
+
+    def load(self, search_type: 'SearchType', semester: str, term: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the recorded response of a finished request.
+
+        :param search_type:      The search type of the request.
+        :param semester:         The semester of the request.
+        :param term:             The search term of the request.
+        :return:                 The parsed response or None, if the request is not finished yet.
+        :raises UnivISException: If the request failed with an UnivIS error.
+        """
+        with self.lock:
+            row = self.con.execute('SELECT response, error, message, url FROM requests '
+                                   'WHERE search_type = ? AND semester = ? AND term = ?',
+                                   (str(search_type), semester, term)).fetchone()
+        if row is None:
+            return None
+        response, error, message, url = row
+        if error is not None:
+            errors = {cls.__name__: cls for cls in [UnivISException,
+                                                    UnivISInvalidDatabaseException,
+                                                    UnivISInvalidSemesterException,
+                                                    UnivISNarrowSearchException]}
+            raise errors[error](message, url)
+        return json.loads(response)
+
+    def save(self,
+             search_type: 'SearchType',
+             semester: str,
+             term: str,
+             response: Optional[Dict[str, Any]] = None,
+             error: Optional[UnivISException] = None):
+        """
+        Record a finished request.
+
+        :param search_type: The search type of the request.
+        :param semester:    The semester of the request.
+        :param term:        The search term of the request.
+        :param response:    The parsed response of the request.
+        :param error:       The UnivIS error of the request, if it failed.
+        """
+        row = (str(search_type), semester, term, None if response is None else json.dumps(response),
+               None if error is None else type(error).__name__,
+               None if error is None else error.univis_message,
+               None if error is None else error.url)
+        with self.lock, self.con:
+            self.con.execute('INSERT OR REPLACE INTO requests VALUES (?, ?, ?, ?, ?, ?, ?)', row)
+
+    def close(self):
+        """
+        Close the journal.
+        """
+        self.con.close()
+
+
+class RecordBuffer:
+    """
+    Collects the records of an UnivIS table. Only the first record of every key is kept.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty buffer.
+        """
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.columns: Dict[str, None] = {}
+
+    def add(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Add the records of a response to the buffer.
+
+        :param records: The records to add.
+        :return:        The number of records that were not in the buffer yet.
+        """
+        new = 0
+        for record in records:
+            # The columns of duplicates are kept as well, like `pd.concat` would do.
+            self.columns.update(dict.fromkeys(record))
+            if record['@key'] not in self.records:
+                self.records[record['@key']] = record
+                new += 1
+        return new
+
+    def to_df(self) -> pd.DataFrame:
+        """
+        Build a dataframe of the collected records.
+
+        :return: The dataframe indexed by '@key'.
+        """
+        df = pd.DataFrame().from_records(list(self.records.values()), columns=list(self.columns))
+        return df.astype(object).set_index(['@key'])
+
+
+def current_semester(date: Optional[datetime.date] = None) -> str:
+    """
+    Get the UnivIS semester of a date. Summer semesters last from April to September.
+
+    :param date: The date or None, if today should be used.
+    :return:     The semester string (e.g. '2022w').
+    """
+    if date is None:
+        date = datetime.date.today()
+    if 4 <= date.month <= 9:
+        return f'{date.year}s'
+    return f'{date.year if date.month >= 10 else date.year - 1}w'
+
+
+def is_past_semester(semester: Optional[str], date: Optional[datetime.date] = None) -> bool:
+    """
+    Check if a semester is over, so its data does not change anymore.
+
+    :param semester: The semester string (e.g. '2022w').
+    :param date:     The date to compare with or None, if today should be used.
+    :return:         True, if the semester is a valid semester before the current one.
+    """
+    if not semester or not re.fullmatch(r'\d{4}[sw]', semester):
+        return False
+    current = current_semester(date)
+    return (semester[:4], semester[4]) < (current[:4], current[4])
+
+
+class DirectoryCacheBackend:
+    """
+    Stores every cached response in its own gzip-compressed JSON file, named by the base64 encoded URL.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the backend.
+
+        :param path: The path to the cache directory (should end with '/').
+        """
+        self.path = path
+
+    def _file(self, url: str) -> str:
+        """
+        Get the path of the cache file of an URL.
+
+        :param url: The requested URL.
+        :return:    The path of the file (without extension).
+        """
+        fn = base64.b64encode(url.encode('utf-8'), altchars=b'-_').decode()
+        return f'{self.path}{fn}'
+
+    def load(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cache entry of an URL.
+
+        :param url: The requested URL.
+        :return:    The cache entry or None, if the URL is not cached.
+        """
+        fp = self._file(url)
+        if os.path.exists(f'{fp}.json.gz'):
+            with gzip.open(f'{fp}.json.gz', 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        # Entries of the former cache format only contain the response
+        if os.path.exists(f'{fp}.json'):
+            with open(f'{fp}.json') as f:
+                return ResponseCache.entry(url, json.load(f), fetched=0)
+        return None
+
+    def store(self, url: str, entry: Dict[str, Any]):
+        """
+        Store the cache entry of an URL.
+
+        :param url:   The requested URL.
+        :param entry: The cache entry.
+        """
+        with gzip.open(f'{self._file(url)}.json.gz', 'wt', encoding='utf-8') as f:
+            json.dump(entry, f)
+
+    def urls(self) -> List[str]:
+        """
+        Get all cached URLs.
+
+        :return: The URLs.
+        """
+        return [base64.b64decode(fn.split('.')[0], altchars=b'-_').decode('utf-8')
+                for fn in os.listdir(self.path) if fn.endswith(('.json.gz', '.json'))]
+
+    def invalidate(self, semester: str) -> int:
+        """
+        Mark all responses of a semester as expired.
+
+        :param semester: The semester string (e.g. '2022w').
+        :return:         The number of invalidated responses.
+        """
+        count = 0
+        for url in self.urls():
+            entry = self.load(url)
+            if entry['semester'] != semester:
+                continue
+            entry['expired'] = True
+            self.store(url, entry)
+            count += 1
+        return count
+
+
+class SQLiteCacheBackend:
+    """
+    Stores all cached responses zlib-compressed in a single SQLite file.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the store.
+
+        :param path: The path of the SQLite file.
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.con = sqlite3.connect(path, check_same_thread=False)
+        with self.con:
+            self.con.execute('CREATE TABLE IF NOT EXISTS responses ('
+                             'url TEXT PRIMARY KEY, '
+                             'semester TEXT, '
+                             'body BLOB NOT NULL, '
+                             'hash TEXT NOT NULL, '
+                             'etag TEXT, '
+                             'last_modified TEXT, '
+                             'fetched REAL NOT NULL, '
+                             'expired BOOLEAN NOT NULL)')
+            self.con.execute('CREATE INDEX IF NOT EXISTS responses_semester ON responses (semester)')
+
+    def load(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cache entry of an URL.
+
+        :param url: The requested URL.
+        :return:    The cache entry or None, if the URL is not cached.
+        """
+        with self.lock:
+            row = self.con.execute('SELECT semester, body, hash, etag, last_modified, fetched, expired '
+                                   'FROM responses WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+        semester, body, content_hash, etag, last_modified, fetched, expired = row
+        return {'semester': semester, 'body': zlib.decompress(body).decode('utf-8'), 'hash': content_hash,
+                'etag': etag, 'last_modified': last_modified, 'fetched': fetched, 'expired': bool(expired)}
+
+    def store(self, url: str, entry: Dict[str, Any]):
+        """
+        Store the cache entry of an URL.
+
+        :param url:   The requested URL.
+        :param entry: The cache entry.
+        """
+        self.store_many([(url, entry)])
+
+    def store_many(self, entries: Iterable[Tuple[str, Dict[str, Any]]]):
+        """
+        Store many cache entries in a single transaction.
+
+        :param entries: The URLs and their cache entries.
+        """
+        rows = ((url, entry['semester'], zlib.compress(entry['body'].encode('utf-8')), entry['hash'], entry['etag'],
+                 entry['last_modified'], entry['fetched'], entry['expired']) for url, entry in entries)
+        with self.lock, self.con:
+            self.con.executemany('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def urls(self) -> List[str]:
+        """
+        Get all cached URLs.
+
+        :return: The URLs.
+        """
+        with self.lock:
+            return [url for (url,) in self.con.execute('SELECT url FROM responses')]
+
+    def invalidate(self, semester: str) -> int:
+        """
+        Mark all responses of a semester as expired.
+
+        :param semester: The semester string (e.g. '2022w').
+        :return:         The number of invalidated responses.
+        """
+        with self.lock, self.con:
+            return self.con.execute('UPDATE responses SET expired = 1 WHERE semester = ?', (semester,)).rowcount
+
+
+class ResponseCache:
+    """
+    A cache of compressed UnivIS responses and their validators (ETag, Last-Modified and a content hash).
+    Responses of past semesters never expire, all other responses have to be revalidated after a TTL.
+    """
+
+    def __init__(self, backend: Union[DirectoryCacheBackend, SQLiteCacheBackend], ttl: float = 24 * 60 * 60):
+        """
+        Initialize the cache.
+
+        :param backend: The backend that stores the cache entries.
+        :param ttl:     The number of seconds after which responses of current and future semesters expire.
+        """
+        self.backend = backend
+        self.ttl = ttl
+
+    def load(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cache entry of an URL.
+
+        :param url: The requested URL.
+        :return:    The cache entry or None, if the URL is not cached.
+        """
+        return self.backend.load(url)
+
+    def store(self, url: str, entry: Dict[str, Any]):
+        """
+        Store the cache entry of an URL.
+
+        :param url:   The requested URL.
+        :param entry: The cache entry.
+        """
+        self.backend.store(url, entry)
+
+    def invalidate(self, semester: str) -> int:
+        """
+        Mark all responses of a semester as expired, so they are revalidated on the next request.
+
+        :param semester: The semester string (e.g. '2022w').
+        :return:         The number of invalidated responses.
+        """
+        return self.backend.invalidate(semester)
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        """
+        Check if a cache entry can be used without revalidating it.
+
+        :param entry: The cache entry.
+        :return:      True, if the entry was not invalidated and belongs to a past semester or is younger than the TTL.
+        """
+        if entry['expired']:
+            return False
+        return is_past_semester(entry['semester']) or time.time() - entry['fetched'] < self.ttl
+
+    @staticmethod
+    def entry(url: str,
+              body: str,
+              etag: Optional[str] = None,
+              last_modified: Optional[str] = None,
+              fetched: Optional[float] = None
+              ) -> Dict[str, Any]:
+        """
+        Create a cache entry.
+
+        :param url:           The requested URL.
+        :param body:          The response.
+        :param etag:          The ETag header of the response.
+        :param last_modified: The Last-Modified header of the response.
+        :param fetched:       The time the response was fetched or None, if it was fetched right now.
+        :return:              The cache entry.
+        """
+        semester = urllib.parse.parse_qs(urllib.parse.urlparse(url).query).get('sem', [None])[0]
+        return {
+            'semester': semester,
+            'body': body,
+            'hash': hashlib.sha256(body.encode('utf-8')).hexdigest(),
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched': time.time() if fetched is None else fetched,
+            'expired': False,
+        }
+
+
+def migrate_cache(cache_path: str, verbose: bool = False) -> int:
+    """
+    Copy the responses of a cache directory (with one file per URL) into the packed SQLite store of the directory.
+
+    :param cache_path: The path to the cache directory (should end with '/').
+    :param verbose:    If True, print the progress
+    :return:           The number of migrated responses.
+    """
+    source = DirectoryCacheBackend(cache_path)
+    target = SQLiteCacheBackend(f'{cache_path}responses.sqlite')
+    urls = source.urls()
+    for i in range(0, len(urls), 1000):
+        target.store_many((url, source.load(url)) for url in urls[i:i + 1000])
+        if verbose:
+            print(f'Migrated {min(i + 1000, len(urls))}/{len(urls)} responses.')
+    return len(urls)
+
+
 class SearchType(Enum):
     """
     Valid UnivIS search values.
@@ -98,30 +581,401 @@ class SearchType(Enum):
         return f'{self.value}'
 
 
-def univis_to_sql(univis_instance: 'UnivIS', db: sqlalchemy.engine.Engine, verbose: bool = False):
+def narrow_term(term: str) -> List[str]:
+    """
+    Get the narrower search terms of a search term by appending the characters of `_prefix_alphabet`. Anchored terms
+    are regexes in UnivIS, so the characters with a meaning in a regex are put in brackets. Other terms are plain
+    substrings.
+
+    :param term: The search term.
+    :return:     The narrower search terms.
+    """
+    if not term.startswith('^'):
+        return [term + a for a in _prefix_alphabet]
+    return [term + (f'[{a}]' if a in _regex_chars else a) for a in _prefix_alphabet]
+
+
+def univis_to_sql(univis_instance: 'UnivIS',
+                  db: sqlalchemy.engine.Engine,
+                  verbose: bool = False,
+                  stream: bool = False):
     """
     Fetches all the data from the univis_instance and stores it in the database
 
     :param univis_instance: The univis instance to fetch the data from
     :param db:              An sqlalchemy engine
     :param verbose:         If True, print the progress
+    :param stream:          If True, write every response to the database directly (see `stream_univis_to_sql`, the
+                            scheme of the instance needs inferred types)
     """
+    if stream:
+        stream_univis_to_sql(univis_instance, db, verbose=verbose)
+        return
+
     # Collects all data from the UnivIS instance and stores it in the database
     dfs = univis_instance.find_all(verbose=verbose)
 
     # Create all tables
     with db.connect() as con:
-        for k, v in generate_sql_scheme(univis_instance.scheme).items():
-            sql = f'CREATE TABLE IF NOT EXISTS `{k}` ( \n{textwrap.indent(v, " " * 4)} \n); \n'
-            con.execute(sql)
-            if verbose:
-                print(f'Created empty table {k}')
+        create_tables(con, univis_instance.scheme, verbose=verbose, indexes=False)
 
-    for table, df in dfs['all'].items():
+    for table, df in dfs.get('all', {}).items():
         df.to_sql(name=table, con=db, if_exists='append', index=False)
         if verbose:
             print(f'Converted {table} to SQL')
 
+    # Indexing the filled tables is faster than updating the indexes for every row
+    with db.connect() as con:
+        create_indexes(con, univis_instance.scheme, verbose=verbose)
+
+
+def create_tables(con: sqlalchemy.engine.Connection,
+                  scheme: Dict[str, Dict[str, Union[bool, str, List[str]]]],
+                  verbose: bool = False,
+                  indexes: bool = True):
+    """
+    Creates the tables of the scheme, if they do not exist yet.
+
+    :param con:     An sqlalchemy connection
+    :param scheme:  The scheme of the univis.
+    :param verbose: If True, print the progress
+    :param indexes: If True, create the indexes of the tables as well (see `create_indexes`). Bulk loads should
+                    create them after inserting the rows instead.
+    """
+    for k, v in generate_sql_scheme(scheme).items():
+        sql = f'CREATE TABLE IF NOT EXISTS `{k}` ( \n{textwrap.indent(v, " " * 4)} \n); \n'
+        con.execute(sql)
+        if verbose:
+            print(f'Created empty table {k}')
+    if indexes:
+        create_indexes(con, scheme, verbose=verbose)
+
+
+def create_indexes(con: Any,
+                   scheme: Dict[str, Dict[str, Union[bool, str, List[str]]]],
+                   verbose: bool = False) -> int:
+    """
+    Creates the indexes of `generate_sql_indexes` that do not exist yet. Tables and columns that are missing in the
+    database are skipped. If a table contains duplicate records, its key index is created as a non-unique index.
+
+    :param con:     An sqlalchemy connection or a DBAPI connection to a SQLite database.
+    :param scheme:  The scheme of the univis.
+    :param verbose: If True, print the progress
+    :return:        The number of created indexes
+    """
+    created = 0
+    for table, indexes in generate_sql_indexes(scheme).items():
+        columns = [row[1] for row in con.execute(f'PRAGMA table_info(`{table}`)').fetchall()]
+        existing = [row[1] for row in con.execute(f'PRAGMA index_list(`{table}`)').fetchall()]
+        for name, (unique, index_columns) in indexes.items():
+            if name in existing or not all(col in columns for col in index_columns):
+                continue
+            quoted = ', '.join(f'`{col}`' for col in index_columns)
+            if unique and con.execute(f'SELECT 1 FROM `{table}` GROUP BY {quoted} HAVING COUNT(*) > 1 LIMIT 1'
+                                      ).fetchone() is not None:
+                unique = False
+                if verbose:
+                    print(f'{table} contains duplicate records, {name} is not unique')
+            con.execute(f'CREATE {"UNIQUE " if unique else ""}INDEX IF NOT EXISTS `{name}` ON `{table}` ({quoted})')
+            created += 1
+            if verbose:
+                print(f'Created index {name}')
+    return created
+
+
+def add_indexes(db: sqlalchemy.engine.Engine,
+                scheme: Dict[str, Dict[str, Union[bool, str, List[str]]]],
+                verbose: bool = False) -> int:
+    """
+    Adds the indexes of the scheme to an existing database and updates the statistics of the query planner.
+
+    :param db:      An sqlalchemy engine of a SQLite database
+    :param scheme:  The scheme of the univis.
+    :param verbose: If True, print the progress
+    :return:        The number of created indexes
+    """
+    with db.begin() as con:
+        created = create_indexes(con, scheme, verbose=verbose)
+        con.execute('ANALYZE')
+    return created
+
+
+def sync_univis_to_sql(univis_instance: 'UnivIS',
+                       db: sqlalchemy.engine.Engine,
+                       semesters: List[str] = None,
+                       verbose: bool = False,
+                       **kwargs: Any
+                       ) -> List[str]:
+    """
+    Updates the database with the semesters that are missing or may still change (the current and upcoming ones).
+    The rows of every updated semester in the tables of the scheme are replaced in a single transaction, all other
+    semesters and tables are left alone. A semester is not replaced if its crawl found nothing or if any search
+    failed (e.g. while UnivIS is unavailable), so the stored rows are kept until the next sync.
+
+    :param univis_instance: The univis instance to fetch the data from
+    :param db:              An sqlalchemy engine
+    :param semesters:       The semesters to consider. If None, all semesters of the univis instance are considered.
+    :param verbose:         If True, print the progress
+    :param kwargs:          Any additional arguments for `UnivIS.find_all` (like `workers`)
+    :return:                The updated semesters
+    """
+    if not semesters:
+        semesters = univis_instance.get_all_semesters()
+
+    # Find the semesters that are already stored in the database
+    existing = set()
+    with db.connect() as con:
+        inspector = sqlalchemy.inspect(con)
+        for table in inspector.get_table_names():
+            if 'semester' in [col['name'] for col in inspector.get_columns(table)]:
+                existing.update(row[0] for row in con.execute(f'SELECT DISTINCT semester FROM `{table}`'))
+
+    updated = []
+    for semester in semesters:
+        if semester in existing and is_past_semester(semester):
+            continue
+        errors = sum(stats['errors'] for stats in univis_instance.term_stats.values())
+        dfs = univis_instance.find_all(semesters=[semester], verbose=verbose, **kwargs)
+        # The term statistics of the instance are collected over all crawls, only the new errors count
+        errors = sum(stats['errors'] for stats in univis_instance.term_stats.values()) - errors
+        if not dfs.get(semester) or errors:
+            if verbose:
+                print(f'Kept {semester}, the crawl was empty or {errors} searches failed')
+            continue
+
+        with db.begin() as con:
+            create_tables(con, univis_instance.scheme)
+            inspector = sqlalchemy.inspect(con)
+            columns = {table: [col['name'] for col in inspector.get_columns(table)]
+                       for table in inspector.get_table_names()}
+            # Only the tables of the scheme are replaced, derived tables (e.g. lecture_facts) are rebuilt separately
+            for table in set(generate_sql_scheme(univis_instance.scheme)) | set(dfs[semester]):
+                if 'semester' in columns.get(table, []):
+                    con.execute(f'DELETE FROM `{table}` WHERE semester = ?', (semester,))
+            for table, df in dfs[semester].items():
+                # Add columns that were not part of the scheme when the table was created
+                for col in df.columns:
+                    if table in columns and col not in columns[table]:
+                        con.execute(f'ALTER TABLE `{table}` ADD COLUMN `{col}` TEXT')
+                df.to_sql(name=table, con=con, if_exists='append', index=False)
+        updated.append(semester)
+        if verbose:
+            print(f'Synchronized {semester}')
+    return updated
+
+
+def stream_univis_to_sql(univis_instance: 'UnivIS',
+                         db: sqlalchemy.engine.Engine,
+                         search_types: List[SearchType] = None,
+                         semesters: List[str] = None,
+                         search_terms: List[str] = None,
+                         sleep_freq: Tuple[int, int] = (1, 10),
+                         verbose: bool = False):
+    """
+    Fetches all the data from the univis_instance and writes every response to the SQLite database right away.
+    Only one response is held in memory at a time. The column types are taken from the scheme of the instance,
+    they are not inferred from the data like in `sqlize_dfs`. So the scheme needs the inferred types of a former
+    crawl (see `UnivIS.save_scheme` and `UnivIS.load_scheme`), the plain DTD would store every value as text.
+
+    :param univis_instance: The univis instance to fetch the data from
+    :param db:              An sqlalchemy engine of a SQLite database
+    :param search_types:    The search types to use. If None, all search types are used.
+    :param semesters:       The semesters to use. If None, all semesters are used.
+    :param search_terms:    The search terms to use. If None, the search terms of `UnivIS.find_all` are used.
+    :param sleep_freq:      The rate limit of the requests (see `UnivIS.find_all`).
+    :param verbose:         If True, print the progress
+    """
+    # The DTD has no types, the types of the columns are only known after `sqlize_dfs` inferred them
+    if all(entry['type'] == 'TEXT' for entry in univis_instance.scheme.values()):
+        raise ValueError('The scheme has no inferred types, load a scheme stored by UnivIS.save_scheme')
+
+    if not search_types:
+        search_types = list(SearchType)
+    if not semesters:
+        semesters = univis_instance.get_all_semesters()
+    if not search_terms:
+        search_terms = [f'^{c}' for c in string.ascii_lowercase] + _fallback_terms
+
+    limiter = TokenBucket(*sleep_freq)
+    con = db.raw_connection()
+    try:
+        writer = SQLStreamWriter(con, univis_instance.scheme)
+        for search_type in search_types:
+            invalid_db = False
+            for s in semesters:
+                for c in search_terms:
+                    limiter.acquire()
+                    try:
+                        raw = univis_instance.search_raw(search_type, sem=s, name=c)
+                    except UnivISInvalidDatabaseException:
+                        invalid_db = True
+                        break
+                    except UnivISInvalidSemesterException:
+                        break
+                    except UnivISException:
+                        continue
+                    rows = writer.write_response(raw, s)
+                    if verbose:
+                        print(f'Finished fetching {c}, {s}, {search_type} ({rows} rows).')
+                if invalid_db:
+                    break
+        # Indexing the filled tables is faster than updating the indexes for every row
+        create_indexes(con, univis_instance.scheme, verbose=verbose)
+        con.commit()
+    finally:
+        con.close()
+
+
+class SQLStreamWriter:
+    """
+    Writes UnivIS responses into the tables of `generate_sql_scheme` without building dataframes.
+    """
+
+    def __init__(self, con: Any, scheme: Dict[str, Dict[str, Union[bool, str, List[str]]]], batch_size: int = 1000):
+        """
+        Create the tables of the scheme (if they do not exist yet).
+
+        :param con:        A DBAPI connection to a SQLite database.
+        :param scheme:     The scheme of the univis.
+        :param batch_size: The maximum number of rows per `executemany` call.
+        """
+        self.con = con
+        self.scheme = scheme
+        self.batch_size = batch_size
+        # The keys that were already written per semester and table, only the first record of a key is kept
+        self.seen = set()
+        cur = con.cursor()
+        for k, v in generate_sql_scheme(scheme).items():
+            cur.execute(f'CREATE TABLE IF NOT EXISTS `{k}` ( \n{textwrap.indent(v, " " * 4)} \n); \n')
+        con.commit()
+        self.columns = {}
+        for (table,) in cur.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall():
+            self.columns[table] = [row[1] for row in cur.execute(f'PRAGMA table_info(`{table}`)').fetchall()]
+
+    def write_response(self, raw: str, semester: str) -> int:
+        """
+        Parse a response incrementally and insert its records.
+
+        :param raw:      The XML document of the response.
+        :param semester: The semester of the response.
+        :return:         The number of inserted rows.
+        """
+        rows: Dict[str, List[Dict[str, Any]]] = {}
+        parser = ET.XMLPullParser(events=('start', 'end'))
+        root = None
+        depth = 0
+        for chunk in range(0, len(raw), 1 << 16):
+            parser.feed(raw[chunk:chunk + (1 << 16)])
+            for event, elem in parser.read_events():
+                if event == 'start':
+                    if root is None:
+                        root = elem
+                    depth += 1
+                    continue
+                depth -= 1
+                # Every child of the root element is a record, it is removed after it was converted.
+                if depth == 1:
+                    self._add_record(elem, semester, rows)
+                    root.remove(elem)
+        parser.close()
+
+        cur = self.con.cursor()
+        count = 0
+        for table, table_rows in rows.items():
+            columns = list(dict.fromkeys(col for row in table_rows for col in row))
+            self._ensure_columns(cur, table, columns)
+            sql = f'INSERT INTO `{table}` ({", ".join(f"`{col}`" for col in columns)}) ' \
+                  f'VALUES ({", ".join("?" for _ in columns)})'
+            for i in range(0, len(table_rows), self.batch_size):
+                cur.executemany(sql, [[self._convert(col, row.get(col)) for col in columns]
+                                      for row in table_rows[i:i + self.batch_size]])
+            count += len(table_rows)
+        self.con.commit()
+        return count
+
+    def _add_record(self, elem: ET.Element, semester: str, rows: Dict[str, List[Dict[str, Any]]]):
+        """
+        Convert a record of a response to rows (the record itself and the elements of its lists).
+
+        :param elem:     The element of the record.
+        :param semester: The semester of the response.
+        :param rows:     The rows per table to add the new rows to.
+        """
+        key = elem.get('key')
+        if (semester, elem.tag, key) in self.seen:
+            return
+        self.seen.add((semester, elem.tag, key))
+
+        row = {'semester': semester}
+        row.update({f'@{k}': v for k, v in elem.attrib.items()})
+        for child in elem:
+            if child.tag in row:
+                continue
+            if self.scheme.get(child.tag, {}).get('is_list'):
+                attr = self.scheme[child.tag]['attr'][0]
+                flatten = attr in self.scheme and not self.scheme[attr]['is_ref']
+                for item in child:
+                    list_row = {'semester': semester, '@key': key}
+                    if flatten and len(item) > 0:
+                        list_row.update({f'@{k}': v for k, v in item.attrib.items()})
+                        list_row.update({sub.tag: _xml_value(sub) for sub in item})
+                    else:
+                        list_row[attr] = _xml_value(item)
+                    rows.setdefault(child.tag, []).append(list_row)
+            else:
+                row[child.tag] = _xml_value(child)
+        rows.setdefault(elem.tag, []).append(row)
+
+    def _ensure_columns(self, cur: Any, table: str, columns: List[str]):
+        """
+        Create a table or add the columns that are missing in a table (like undocumented columns).
+
+        :param cur:     A cursor of the connection.
+        :param table:   The name of the table.
+        :param columns: The columns the table has to contain.
+        """
+        if table not in self.columns:
+            cur.execute(f'CREATE TABLE IF NOT EXISTS `{table}` (`semester` VARCHAR(5) NOT NULL, '
+                        f'`@key` VARCHAR(255) NOT NULL)')
+            self.columns[table] = ['semester', '@key']
+        for col in columns:
+            if col not in self.columns[table]:
+                cur.execute(f'ALTER TABLE `{table}` ADD COLUMN `{col}` TEXT')
+                self.columns[table].append(col)
+
+    def _convert(self, col: str, value: Optional[str]) -> Any:
+        """
+        Convert a value to the type of its column in the scheme.
+
+        :param col:   The name of the column.
+        :param value: The value as string.
+        :return:      The converted value.
+        """
+        if value is None or col not in self.scheme:
+            return value
+        match self.scheme[col]['type']:
+            case 'BOOLEAN':
+                return {'ja': True, 'nein': False}.get(value)
+            case 'REAL' if _is_number.match(value):
+                return float(value.replace(',', '.')) if value.strip(',.') else None
+            case 'INTEGER' if _is_number.match(value):
+                value = value.split(',')[0]
+                return int(value) if value.isdigit() else float(value) if value.strip('.') else None
+        return value
+
+
+def _xml_value(elem: ET.Element) -> Optional[str]:
+    """
+    Get the value of an element like `xmltodict` would, references are replaced by their key.
+
+    :param elem: The element.
+    :return:     The text or the referenced key of the element.
+    """
+    ref = elem.find('UnivISRef')
+    if ref is not None:
+        return ref.get('key')
+    return (elem.text or '').strip() or None
+
 
 def sqlize_dfs(dfs: Dict[str, pd.DataFrame],
                semester: str,
@@ -136,7 +990,8 @@ def sqlize_dfs(dfs: Dict[str, pd.DataFrame],
     :return:         The SQL-friendly dataframes.
     """
     dfs_sql = {}
-    new_tables = []
+    # The rows of the tables that are created for list columns
+    list_rows: Dict[str, List[Dict[str, Any]]] = {}
     for table_name, df in dfs.items():
         # Clones the dataframe to avoid changing the original one.
         df = df.copy()
@@ -151,10 +1006,14 @@ def sqlize_dfs(dfs: Dict[str, pd.DataFrame],
                 }
                 scheme[table_name]['attr'].append(col)
 
+            values = df[col].astype(object)
+            is_null = values.isnull()
+            is_dict = values.map(type) == dict
+
             # Update the type of the scheme:
             # If every element in the column is a number, the type must be a real number.
             # If none of those numbers includes a decimal point, the type must be an integer.
-            if df[col].apply(lambda x: pd.isnull(x) or type(x) is str and bool(_is_number.match(x))).all():
+            if (is_null | values.str.match(_is_number).fillna(False).astype(bool)).all():
                 scheme[col]['type'] = 'REAL'
                 if pd.to_numeric(df[col].fillna(0), errors='coerce').notnull().all():
                     scheme[col]['type'] = 'INTEGER'
@@ -164,53 +1023,35 @@ def sqlize_dfs(dfs: Dict[str, pd.DataFrame],
                 scheme[col]['type'] = 'BOOLEAN'
 
             elif scheme[col]['is_list']:
-                for i in df.index:
-                    cell = df.at[i, col]
-
-                    # Skip nan values
-                    if type(cell) is not dict:
-                        continue
-
-                    attr = scheme[col]['attr'][0]
-                    tmp_cell = cell[attr]
-                    # Convert the cell to a list if it is not one already.
-                    if type(tmp_cell) is list:
-                        new_cell = tmp_cell
+                attr = scheme[col]['attr'][0]
+                # Convert the cells to lists (nan values are skipped) and explode them to one element per row.
+                elems = values[is_dict].map(lambda cell: cell[attr] if type(cell[attr]) is list else [cell[attr]])
+                elems = elems.explode()
+
+                # Create new tables for the list if it does not exist.
+                if len(elems) > 0 and col not in list_rows:
+                    dfs_sql[col] = None
+                    list_rows[col] = []
+
+                # Add the list items to the new table.
+                flatten = not scheme[attr]['is_ref']
+                for i, elem in elems.items():
+                    if flatten and type(elem) is dict:
+                        list_rows[col].append({'semester': semester, '@key': i, **elem})
+                        for k in elem:
+                            if k not in scheme[attr]['attr']:
+                                scheme[attr]['attr'].append(k)
                     else:
-                        new_cell = [tmp_cell]
-
-                    # Create new tables for the list if it does not exist.
-                    if col not in dfs_sql:
-                        dfs_sql[col] = pd.DataFrame()
-                        new_tables += [col]
-
-                    # Add the list items to the new table.
-                    for elem in new_cell:
-                        tmp = pd.DataFrame({'semester': [semester], '@key': [i]})
-                        if not scheme[attr]['is_ref'] and type(elem) is dict:
-                            for k, v in elem.items():
-                                tmp[k] = [v]
-                                if k not in scheme[attr]['attr']:
-                                    scheme[attr]['attr'].append(k)
-                        else:
-                            tmp[attr] = [elem]
-                        dfs_sql[col] = pd.concat([dfs_sql[col], tmp])
+                        list_rows[col].append({'semester': semester, '@key': i, attr: elem})
                 df = df.drop(col, axis=1)  # Remove the list column from the table.
             else:
-                is_ref = True
-                for i in df.index:
-                    cell = df.at[i, col]
-                    if not (pd.isnull(cell) or type(cell) is dict and 'UnivISRef' in cell):
-                        is_ref = False
-                        break
-                scheme[col]['is_ref'] = is_ref
+                scheme[col]['is_ref'] = bool((is_null | (is_dict & values.map(
+                    lambda cell: type(cell) is dict and 'UnivISRef' in cell))).all())
             # Handle references.
-            if scheme[col]['is_ref']:
-                for i in df.index:
-                    cell = df.at[i, col]
-                    if type(cell) is dict:
-                        df.at[i, col] = cell['UnivISRef']['@key']
-                        scheme[col]['attr'] = [cell['UnivISRef']['@type']]
+            if scheme[col]['is_ref'] and is_dict.any():
+                refs = values[is_dict]
+                df.loc[is_dict, col] = refs.map(lambda cell: cell['UnivISRef']['@key'])
+                scheme[col]['attr'] = [refs.iloc[-1]['UnivISRef']['@type']]
             # Convert the columns values to their type.
             match scheme[col]['type']:
                 case 'BOOLEAN':
@@ -225,24 +1066,22 @@ def sqlize_dfs(dfs: Dict[str, pd.DataFrame],
         dfs_sql[table_name] = df.reset_index(level=0, drop=df.index.name != '@key')
 
     # Handle the newly created dataframes.
-    if len(new_tables) > 0:
-        tmp_dfs = {}
-        for table_name in new_tables:
-            tmp_dfs[table_name] = dfs_sql[table_name].reset_index(drop=True)
+    if len(list_rows) > 0:
+        tmp_dfs = {table_name: pd.DataFrame().from_records(rows) for table_name, rows in list_rows.items()}
         tmp_dfs = sqlize_dfs(tmp_dfs, semester, scheme)
         for table_name in tmp_dfs:
             dfs_sql[table_name] = tmp_dfs[table_name]
     return dfs_sql
 
 
-def generate_sql_scheme(scheme: Dict[str, Dict[str, Union[bool, str, List[str]]]]) -> Dict[str, str]:
+def _scheme_tables(scheme: Dict[str, Dict[str, Union[bool, str, List[str]]]]) -> Dict[str, Tuple[bool, List[str]]]:
     """
-    Generate the SQL scheme from the UnivIS scheme.
+    Find the tables of the UnivIS scheme. The elements of lists are stored in the table of the list.
 
     :param scheme: The UnivIS scheme.
-    :return:       The SQL scheme for each table.
+    :return:       Whether the table stores the elements of a list and the elements of the table for each table.
     """
-    sql_scheme = {}
+    tables = {}
     ignore = []
     for table_name, data in scheme.items():
         values = data['attr']
@@ -253,11 +1092,23 @@ def generate_sql_scheme(scheme: Dict[str, Dict[str, Union[bool, str, List[str]]]
         if data['is_list']:
             list_elements = scheme[values[0]]['attr']
             ignore += [values[0]]
-            if values[0] in sql_scheme:
-                del sql_scheme[values[0]]
+            if values[0] in tables:
+                del tables[values[0]]
             if len(list_elements) > 1:
                 values = list_elements
+        tables[table_name] = (data['is_list'], values)
+    return tables
+
 
+def generate_sql_scheme(scheme: Dict[str, Dict[str, Union[bool, str, List[str]]]]) -> Dict[str, str]:
+    """
+    Generate the SQL scheme from the UnivIS scheme.
+
+    :param scheme: The UnivIS scheme.
+    :return:       The SQL scheme for each table.
+    """
+    sql_scheme = {}
+    for table_name, (_, values) in _scheme_tables(scheme).items():
         table_scheme = f'`semester` VARCHAR(5) NOT NULL, \n' \
                        f'`@key` VARCHAR(255) NOT NULL, \n'
         table_constrains = ''
@@ -278,6 +1129,28 @@ def generate_sql_scheme(scheme: Dict[str, Dict[str, Union[bool, str, List[str]]]
     return sql_scheme
 
 
+def generate_sql_indexes(scheme: Dict[str, Dict[str, Union[bool, str, List[str]]]]
+                         ) -> Dict[str, Dict[str, Tuple[bool, List[str]]]]:
+    """
+    Generate the indexes of the tables of `generate_sql_scheme`.
+    Records are unique per `(semester, @key)`, the tables of lists have one row per list element instead. References
+    (the columns with a FOREIGN KEY) and the columns of `_lookup_columns` get a secondary index.
+
+    :param scheme: The UnivIS scheme.
+    :return:       The indexes of each table by name, whether the index is unique and its columns.
+    """
+    sql_indexes = {}
+    for table_name, (is_list, values) in _scheme_tables(scheme).items():
+        indexes = {f'ix_{table_name}_key': (not is_list, ['semester', '@key'])}
+        for element in dict.fromkeys(values + _lookup_columns.get(table_name, [])):
+            if element in ['semester', '@key'] or element in scheme and scheme[element]['is_list']:
+                continue
+            if element in scheme and scheme[element]['is_ref'] or element in _lookup_columns.get(table_name, []):
+                indexes[f'ix_{table_name}_{element}'] = (False, [element, 'semester'])
+        sql_indexes[table_name] = indexes
+    return sql_indexes
+
+
 class UnivIS:
     """
     A class to get data from UnivIS.
@@ -287,22 +1160,128 @@ class UnivIS:
                  scheme: str = 'https',
                  host: str = 'univis.uni-kiel.de',
                  path: str = '/',
-                 cache_path: Optional[str] = None):
+                 cache_path: Optional[str] = None,
+                 cache_ttl: float = 24 * 60 * 60,
+                 cache_backend: str = 'directory'):
         """
         Initialize a new UnivIS instance.
 
-        :param scheme:     The scheme to use.
-        :param host:       The hostname of the UnivIS instance.
-        :param path:       The path to the UnivIS instance.
-        :param cache_path: The path to the cache directory or None, if the cache is deactivated.
+        :param scheme:        The scheme to use.
+        :param host:          The hostname of the UnivIS instance.
+        :param path:          The path to the UnivIS instance.
+        :param cache_path:    The path to the cache directory or None, if the cache is deactivated.
+        :param cache_ttl:     The number of seconds after which cached responses of current and future semesters
+                              have to be revalidated. Responses of past semesters never expire.
+        :param cache_backend: How to store the responses: 'directory' (one file per URL) or 'sqlite' (a single
+                              SQLite file in the cache directory, see `migrate_cache`).
         """
         self.base_url = f'{scheme}://{host}{path}'
-        self.scheme = self.get_database_scheme()
+        # The database scheme is fetched on first use (see `scheme`)
+        self._scheme = None
+        self.scheme_version = None
         self.cache = cache_path is not None
+        # Counts how the responses were obtained (from the cache, revalidated or downloaded). The counters are
+        # updated by the worker threads of `find_all`, so they are guarded by the lock.
+        self.cache_stats = {'hits': 0, 'not_modified': 0, 'unchanged': 0, 'downloads': 0}
+        self.lock = threading.Lock()
+        # Counts the requests, records and duplicates of every search term used by `find_all`
+        self.term_stats: Dict[str, Dict[str, int]] = {}
         if self.cache:
             self.cache_path = cache_path
             if not os.path.exists(self.cache_path):
                 os.makedirs(self.cache_path, exist_ok=True)
+            if cache_backend == 'sqlite':
+                backend = SQLiteCacheBackend(f'{cache_path}responses.sqlite')
+            else:
+                backend = DirectoryCacheBackend(cache_path)
+            self.response_cache = ResponseCache(backend, cache_ttl)
+
+    @property
+    def scheme(self) -> Dict[str, Dict[str, Union[bool, str, List[str]]]]:
+        """
+        The database scheme of the UnivIS instance. It is fetched on first use.
+
+        :return: A dictionary of the database scheme.
+        """
+        if self._scheme is None:
+            self._scheme = self.get_database_scheme()
+        return self._scheme
+
+    @scheme.setter
+    def scheme(self, scheme: Dict[str, Dict[str, Union[bool, str, List[str]]]]):
+        self._scheme = scheme
+
+    def save_scheme(self, path: str):
+        """
+        Store the database scheme (including the inferred types) in a JSON file.
+
+        :param path: The path of the file.
+        """
+        with open(path, 'w') as f:
+            json.dump({'version': self.scheme_version, 'scheme': self.scheme}, f)
+
+    def load_scheme(self, path: str):
+        """
+        Load a database scheme stored by `save_scheme`, so the DTD does not have to be fetched.
+
+        :param path: The path of the file.
+        """
+        with open(path) as f:
+            stored = json.load(f)
+        self._scheme = stored['scheme']
+        self.scheme_version = stored['version']
+
+    def _count_response(self, kind: str):
+        """
+        Count how a response was obtained in `cache_stats`.
+
+        :param kind: The counter to increment ('hits', 'not_modified', 'unchanged' or 'downloads').
+        """
+        with self.lock:
+            self.cache_stats[kind] += 1
+
+    def _get(self, url: str) -> str:
+        """
+        Get the response of an URL from the cache or from UnivIS. Expired responses are revalidated, if UnivIS can not
+        be reached, the expired response is used.
+
+        :param url: The URL to request.
+        :return:    The response text.
+        """
+        entry = self.response_cache.load(url) if self.cache else None
+
+        if entry is not None and self.response_cache.is_fresh(entry):
+            self._count_response('hits')
+            return entry['body']
+
+        # Revalidate an expired response with a conditional request
+        headers = {}
+        if entry is not None and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry is not None and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        try:
+            resp = req.get(url, headers=headers) if headers else req.get(url)
+        except req.RequestException:
+            if entry is None:
+                raise
+            # Work offline with the expired response
+            self._count_response('hits')
+            return entry['body']
+
+        if entry is not None and resp.status_code == 304:
+            self._count_response('not_modified')
+            entry['fetched'] = time.time()
+            entry['expired'] = False
+        else:
+            old_hash = entry['hash'] if entry is not None else None
+            entry = ResponseCache.entry(url, resp.text,
+                                        etag=resp.headers.get('ETag'),
+                                        last_modified=resp.headers.get('Last-Modified'))
+            self._count_response('unchanged' if entry['hash'] == old_hash else 'downloads')
+        if self.cache:
+            self.response_cache.store(url, entry)
+        return entry['body']
 
     def search(self, search_type: SearchType, **kwargs: Any) -> Dict[str, Any]:
         """
@@ -313,32 +1292,30 @@ class UnivIS:
         :return:                 A dictionary of the response from UnivIS.
         :raises UnivISException: If the search failed.
         """
+        return xmltodict.parse(self.search_raw(search_type, **kwargs))
+
+    def search_raw(self, search_type: SearchType, **kwargs: Any) -> str:
+        """
+        Send an API-request to UnivIS without parsing the response.
+
+        :param search_type:      The search type to use.
+        :param kwargs:           Any additional get-parameters to send to UnivIS.
+        :return:                 The XML document of the response from UnivIS.
+        :raises UnivISException: If the search failed.
+        """
         query = urllib.parse.urlencode({k: v for k, v in kwargs.items() if v})
 
         url = f'{self.base_url}prg?show=xml&noimports=1&search={search_type}&{query}'
-
-        fp = None
-        if self.cache:
-            fn = base64.b64encode(url.encode('utf-8'), altchars=b'-_').decode()
-            fp = f'{self.cache_path}{fn}.json'
-
-        if not self.cache or self.cache and not os.path.exists(fp):
-            raw = req.get(url).text
-            if self.cache:
-                with open(fp, 'w') as f:
-                    json.dump(raw, f)
-        else:
-            with open(fp) as f:
-                raw = json.load(f)
+        raw = self._get(url)
 
         # UnivIS returns an XML document, which is not valid XML. This is why we have to fix it.
         filtered = raw
         for c in ['&#x0C;', '&#x0B;']:
             filtered = filtered.replace(c, '')
 
-        # If the API responds xml, return the parsed XML-response. Otherwise, raise an exception.
+        # If the API responds xml, return the XML-response. Otherwise, raise an exception.
         if raw.startswith('<?xml'):
-            return xmltodict.parse(filtered)
+            return filtered
         raise UnivISException.from_response(raw, url)
 
     def get_all_semesters(self) -> List[str]:
@@ -357,102 +1334,190 @@ class UnivIS:
                  search_terms: Union[str, List[str]] = None,
                  sleep_freq: Tuple[int, int] = (1, 10),
                  sqlize: bool = True,
-                 verbose: bool = False
+                 verbose: bool = False,
+                 workers: int = 1,
+                 checkpoint: bool = False,
+                 adaptive: bool = False
                  ) -> Dict[str, Dict[str, pd.DataFrame]]:
         """
         Find all entries in UnivIS. **This is a very expensive operation.**
 
         :param search_types: The search types to use. If None, all search types are used.
         :param semesters:    The semesters to use. If None, all semesters are used.
-        :param search_terms: The search terms to use. If None, `string.ascii_lowercase` and `string.digits` are used.
-        :param sleep_freq:   The frequency with which to sleep between requests. The first value is the number of
-                             seconds to sleep, the second value is the number of requests between sleeps.
+        :param search_terms: The search terms to use. If None, `string.ascii_lowercase` and `_fallback_terms` are used
+                             (or '^' and `_fallback_terms`, if `adaptive` is True).
+        :param sleep_freq:   The rate limit of the requests. The first value is a number of seconds, the second value
+                             is the number of requests that may be sent within these seconds. The limit is shared by
+                             all workers.
         :param sqlize:       Whether to reformat the dataframes to an SQL-friendly format before returning them.
         :param verbose:      Whether to print the progress.
+        :param workers:      The number of requests to send in parallel. The result does not depend on this value.
+        :param checkpoint:   Whether to record the finished requests in a journal in the cache directory. If a crawl
+                             is interrupted, the next call resumes it. The journal is removed after a successful crawl.
+        :param adaptive:     Whether to split a search term into narrower prefixes (e.g. '^a' into '^aa', '^ab', ...)
+                             only if UnivIS asks to narrow the search. The hit and duplicate counts of every search
+                             term are collected in `term_stats` (only for inspection, they do not change which terms
+                             are sent). Anchored terms only find names that continue with characters of
+                             `_prefix_alphabet`, the other names are found by the unanchored `_fallback_terms`. If a
+                             term of `_max_prefix_length` characters still has to be narrowed, a warning is issued
+                             and the term is counted as an error.
         :return:             A dictionary of dataframes that include every entry.
         """
+        if checkpoint and not self.cache:
+            raise ValueError('A checkpoint requires a cache directory')
 
         if not search_types:
             search_types = list(SearchType)
         if not semesters:
             semesters = self.get_all_semesters()
-        if not search_terms:
-            search_terms = [f'^{c}' for c in string.ascii_lowercase] + list(string.digits) + list('()*/\'"!-,:')
-
-        req_num = 0
-
-        dfs: Dict[str, Dict[str, pd.DataFrame]] = {}
-
-        for search_type in search_types:
-            invalid_db = False
-            for s in semesters:
-                if s not in dfs:
-                    dfs[s] = {}
-                for c in search_terms:
-                    # Sleep after a certain amount of requests for a certain amount of time
-                    if req_num >= sleep_freq[1]:
-                        time.sleep(sleep_freq[0])
-                        req_num = -1
-                    req_num += 1
-
-                    try:
-                        res = self.search(search_type, sem=s, name=c)
-                    except UnivISInvalidDatabaseException:
-                        invalid_db = True
-                        break
-                    except UnivISInvalidSemesterException:
-                        del dfs[s]
-                        break
-                    except UnivISException:
-                        continue
-
-                    # Store response in dataframes
-                    for name, data in res['UnivIS'].items():
-                        # Skip attributes of the root element (like version, semester, etc.)
-                        if name[0] == '@':
+        if not search_terms and adaptive:
+            search_terms = ['^'] + _fallback_terms
+        elif not search_terms:
+            search_terms = [f'^{c}' for c in string.ascii_lowercase] + _fallback_terms
+
+        limiter = TokenBucket(*sleep_freq)
+        executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        journal = CrawlCheckpoint(f'{self.cache_path}checkpoint.sqlite') if checkpoint else None
+
+        def fetch(search_type: SearchType, semester: str, term: str) -> Dict[str, Any]:
+            if journal:
+                response = journal.load(search_type, semester, term)
+                if response is not None:
+                    return response
+            limiter.acquire()
+            try:
+                response = self.search(search_type, sem=semester, name=term)
+            except UnivISException as e:
+                if journal:
+                    journal.save(search_type, semester, term, error=e)
+                raise
+            if journal:
+                journal.save(search_type, semester, term, response=response)
+            return response
+
+        buffers: Dict[str, Dict[str, RecordBuffer]] = {}
+
+        def submit(search_type: SearchType, semester: str, term: str) -> Tuple[str, Optional[Future]]:
+            if executor:
+                future = executor.submit(fetch, search_type, semester, term)
+                futures.append(future)
+                return term, future
+            return term, None
+
+        def cancel(queue: Deque[Tuple[str, Optional[Future]]]):
+            while queue:
+                _, future = queue.popleft()
+                if future:
+                    future.cancel()
+
+        def count(term: str, stat: str, n: int = 1):
+            if term not in self.term_stats:
+                self.term_stats[term] = {'requests': 0, 'records': 0, 'duplicates': 0, 'narrowed': 0, 'errors': 0}
+            self.term_stats[term][stat] += n
+
+        try:
+            for search_type in search_types:
+                # Send all requests of the search type in advance, the responses are processed in the same order as in
+                # the sequential case, so the result stays the same.
+                futures: List[Future] = []
+                queues = [deque([submit(search_type, s, c) for c in search_terms]) for s in semesters]
+                invalid_db = False
+                for i, s in enumerate(semesters):
+                    if s not in buffers:
+                        buffers[s] = {}
+                    while queues[i]:
+                        c, future = queues[i].popleft()
+                        count(c, 'requests')
+                        try:
+                            res = future.result() if future else fetch(search_type, s, c)
+                        except UnivISInvalidDatabaseException:
+                            # The remaining requests of the search type would fail as well
+                            for queue in queues[i:]:
+                                cancel(queue)
+                            invalid_db = True
+                            break
+                        except UnivISInvalidSemesterException:
+                            cancel(queues[i])
+                            del buffers[s]
+                            break
+                        except UnivISNarrowSearchException:
+                            count(c, 'narrowed')
+                            # Replace the search term by narrower ones, which are processed next
+                            if adaptive and len(_term_chars.findall(c)) < _max_prefix_length:
+                                queues[i].extendleft(reversed([submit(search_type, s, term)
+                                                               for term in narrow_term(c)]))
+                            elif adaptive:
+                                # The records of the search term cannot be fetched at all
+                                count(c, 'errors')
+                                warnings.warn(f'The search term {c!r} ({search_type}, {s}) cannot be narrowed any '
+                                              f'further, its records are missing')
+                            continue
+                        except UnivISException:
+                            count(c, 'errors')
                             continue
 
-                        if type(data) != list:
-                            data = [data]
-
-                        df = pd.DataFrame().from_records(data).set_index(['@key'])
-
-                        # Append the data to the dataframe. If it doesn't exist yet, create an empty dataframe first.
-                        if name not in dfs[s]:
-                            dfs[s][name] = pd.DataFrame()
-                        new_df = pd.concat([dfs[s][name], df])
-                        # Remove duplicates by applying a mask
-                        dfs[s][name] = new_df[~new_df.index.duplicated(keep='first')]
-
-                    if verbose:
-                        print(f'Finished fetching {c}, {s}, {search_type}.')
-                # If the UnivISInvalidDatabaseException was raised before, break out of the semester loop
-                if invalid_db:
-                    break
+                        # Store response in the record buffers
+                        for name, data in res['UnivIS'].items():
+                            # Skip attributes of the root element (like version, semester, etc.)
+                            if name[0] == '@':
+                                continue
+
+                            if type(data) != list:
+                                data = [data]
+
+                            # Add the records to the buffer. If it doesn't exist yet, create an empty buffer first.
+                            if name not in buffers[s]:
+                                buffers[s][name] = RecordBuffer()
+                            new = buffers[s][name].add(data)
+                            count(c, 'records', len(data))
+                            count(c, 'duplicates', len(data) - new)
+
+                        if verbose:
+                            print(f'Finished fetching {c}, {s}, {search_type}.')
+                    # If the UnivISInvalidDatabaseException was raised before, break out of the semester loop
+                    if invalid_db:
+                        break
+                # Cancel the requests that are not needed anymore
+                for future in futures:
+                    future.cancel()
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+            if journal:
+                journal.close()
+
+        # Build every dataframe once
+        dfs: Dict[str, Dict[str, pd.DataFrame]] = {
+            s: {name: buffer.to_df() for name, buffer in tables.items()} for s, tables in buffers.items()
+        }
 
         if sqlize:
-            dfs['all'] = {}
-            for semester in dfs:
-                if semester == 'all':
+            for semester in list(dfs):
+                # A semester without tables needs no scheme, so it is not fetched for an empty crawl
+                if not dfs[semester]:
                     continue
-
                 dfs[semester] = sqlize_dfs(dfs[semester], semester, self.scheme)
                 for table in dfs[semester]:
-                    if table not in dfs['all']:
+                    if table not in dfs.setdefault('all', {}):
                         dfs['all'][table] = pd.DataFrame()
                     dfs['all'][table] = pd.concat([dfs['all'][table], dfs[semester][table]])
                 if verbose:
                     print(f'Finishing SQLizing {semester}.')
+        # The crawl was successful, so it does not need to be resumed anymore.
+        if checkpoint:
+            os.remove(f'{self.cache_path}checkpoint.sqlite')
         return dfs
 
     def get_database_scheme(self) -> Dict[str, Dict[str, Union[bool, str, List[str]]]]:
         """
-        Get the database scheme of the UnivIS instance.
+        Get the database scheme of the UnivIS instance. The DTD is kept in the response cache, its content hash is
+        stored as `scheme_version`.
 
         :return: A dictionary of the database scheme.
         """
-        resp = req.get(f'{self.base_url}/univis.dtd')
-        raw = resp.text.split('\n')
+        dtd = self._get(f'{self.base_url}/univis.dtd')
+        self.scheme_version = hashlib.sha256(dtd.encode('utf-8')).hexdigest()
+        raw = dtd.split('\n')
 
         schemes = {}
         for line in raw[2:]:
@@ -476,3 +1541,34 @@ class UnivIS:
                 'attr': scheme.split(',')
             }
         return schemes
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Tools for the UnivIS crawler.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    migrate_parser = commands.add_parser('migrate-cache', help='pack a cache directory into a single SQLite file')
+    migrate_parser.add_argument('cache_path', help='the path to the cache directory (should end with "/")')
+    sync_parser = commands.add_parser('sync', help='update the missing, current and upcoming semesters of a database')
+    sync_parser.add_argument('db_path', help='the sqlalchemy URL of the database (e.g. sqlite:////path/to/univis.db)')
+    sync_parser.add_argument('--cache-path', help='the path to the cache directory (should end with "/")')
+    sync_parser.add_argument('--workers', type=int, default=1, help='the number of requests to send in parallel')
+    index_parser = commands.add_parser('index', help='add the missing indexes of the scheme to an existing database')
+    index_parser.add_argument('db_path', help='the sqlalchemy URL of the database (e.g. sqlite:////path/to/univis.db)')
+    index_parser.add_argument('--cache-path', help='the path to the cache directory (should end with "/")')
+    index_parser.add_argument('--scheme', help='a scheme file written by UnivIS.save_scheme (instead of the DTD)')
+    args = parser.parse_args()
+
+    if args.command == 'migrate-cache':
+        print(f'Migrated {migrate_cache(args.cache_path, verbose=True)} responses.')
+    elif args.command == 'sync':
+        synced = sync_univis_to_sql(UnivIS(cache_path=args.cache_path), sqlalchemy.create_engine(args.db_path),
+                                    verbose=True, workers=args.workers)
+        print(f'Synchronized {len(synced)} semesters: {", ".join(synced)}')
+    elif args.command == 'index':
+        instance = UnivIS(cache_path=args.cache_path)
+        if args.scheme:
+            instance.load_scheme(args.scheme)
+        created = add_indexes(sqlalchemy.create_engine(args.db_path), instance.scheme, verbose=True)
+        print(f'Created {created} indexes.')
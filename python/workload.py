@@ -1,6 +1,7 @@
 import pandas as pd
 import sqlalchemy
 from python.faculty import Faculty
+from python.sqlparams import in_clause
 
 
 def workloads(db: sqlalchemy.engine.Engine) -> pd.DataFrame:
@@ -10,22 +11,22 @@ def workloads(db: sqlalchemy.engine.Engine) -> pd.DataFrame:
     :param db: sql database
     :return: dictionary containing the average workload for every semester sorted by faculty
     """
-    con = db.connect()
-    faculties = str(tuple([str(x) for x in Faculty]))
+    faculties, params = in_clause('faculty', [str(x) for x in Faculty])
     # get the average workload for every semester sorted by faculty
     sql = f'''
     SELECT AVG(anzahl) AS Arbeitsbelastung, semester AS Semester, orgunit AS Fakultät
     FROM (
-        SELECT LD.semester, orgunit, Person.[@key], COUNT(*) AS anzahl 
-        FROM (Lecture NATURAL JOIN dozs) LD 
-            LEFT JOIN Person ON Person.[@key] = LD.doz AND Person.semester = LD.semester 
-            LEFT JOIN orgunits o on LD.semester = o.semester and LD.[@key] = o.[@key] 
-        WHERE Person.title NOT NULL 
+        SELECT LF.semester, orgunit, Person.[@key], COUNT(*) AS anzahl 
+        FROM lecture_facts LF 
+            INNER JOIN dozs ON dozs.[@key] = LF.key AND dozs.semester = LF.semester 
+            LEFT JOIN Person ON Person.[@key] = dozs.doz AND Person.semester = dozs.semester 
+        WHERE LF.first_term AND LF.is_lecture 
+            AND Person.title NOT NULL 
             AND Person.lehr = 1 
             AND orgunit IN {faculties}
-            AND LD.type NOT IN ('AG', 'FPUE', 'KL', 'KO', 'UAK', 'KU', 'SPUE', 'P', 'P-SEM', 'PRUE', 'TU', 'broken')
-            GROUP BY LD.semester, orgunit, Person.[@key]
+            AND LF.type NOT IN ('AG', 'FPUE', 'KL', 'KO', 'UAK', 'KU', 'SPUE', 'P', 'P-SEM', 'PRUE', 'TU', 'broken')
+            GROUP BY LF.semester, orgunit, Person.[@key]
     ) 
     GROUP BY semester, orgunit;
     '''
-    return pd.read_sql(sql, db)
+    return pd.read_sql(sql, db, params=params)